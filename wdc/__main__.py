@@ -0,0 +1,4 @@
+from .src.cli import main
+import sys
+
+sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Import-time benchmark: measures the cold start of importing the datacube in fresh interpreters,
+and the one-off cost paid by the first decoder needing pandas or PIL.
+
+Run from the wdc directory:
+
+    python benchmarks/import_time.py [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+WDC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import src.Datacube": "import src.Datacube",
+    "+ first CSV decode (pandas)": (
+        "import src.Datacube\n"
+        "from src.helpers.decoders import decode\n"
+        "decode({'success': True, 'result': b'1,2'}, 'CSV')"
+    ),
+    "+ first image decode (PIL)": "import src.Datacube\nimport PIL.Image",
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, runs: int) -> list[float]:
+    """Seconds spent executing code in each of runs fresh interpreters"""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=WDC_DIRECTORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def heavyModules() -> list[str]:
+    """Heavy optional dependencies loaded by importing the datacube"""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, src.Datacube; "
+            "print(' '.join(sorted({'pandas', 'PIL'} & set(sys.modules))))",
+        ],
+        cwd=WDC_DIRECTORY,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return output.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'scenario':32} {'median':>10} {'min':>10}")
+    for name, code in SCENARIOS.items():
+        timings = measure(code, args.runs)
+        print(
+            f"{name:32} {statistics.median(timings) * 1000:8.1f}ms"
+            f" {min(timings) * 1000:8.1f}ms"
+        )
+    print(f"heavy modules loaded on import: {heavyModules() or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+from .helpers.types import NetworkRequestResult
+
+from collections import deque
+from threading import Condition
+from typing import Callable, Optional
+import time
+
+
+class AdaptiveLimiter:
+    """
+    Adaptive limit on the number of requests in flight to the server (AIMD).
+
+    The limit grows additively while the latency of completed requests stays close to the
+    baseline latency, and is cut multiplicatively when latency grows or the server signals
+    overload (429/503 responses, timeouts). The baseline is a low percentile of the latencies
+    in a sliding window, and growth is judged on the median of the most recent requests, so a
+    single large query among small ones does not read as congestion while a permanently slower
+    server is accepted once the window has moved on. Requests beyond the limit wait for a slot.
+
+    Parameters:
+        initialLimit (int): Number of requests allowed in flight at first
+        minLimit (int): Lower bound of the limit
+        maxLimit (int): Upper bound of the limit
+        latencyTolerance (float): Latency relative to the baseline latency regarded as growth
+        backoff (float): Factor the limit is multiplied with on latency growth or overload
+        overloadCodes tuple(int): HTTP status codes signalling an overloaded server
+        window (int): Number of recent latencies the baseline is computed from
+        recentSamples (int): Number of most recent latencies compared with the baseline
+        baselinePercentile (float): Percentile of the window used as the baseline latency
+    """
+
+    def __init__(
+        self,
+        initialLimit: int = 4,
+        minLimit: int = 1,
+        maxLimit: int = 64,
+        latencyTolerance: float = 2.0,
+        backoff: float = 0.5,
+        overloadCodes: tuple[int, ...] = (429, 503),
+        window: int = 100,
+        recentSamples: int = 5,
+        baselinePercentile: float = 10.0,
+    ):
+        if not 1 <= minLimit <= initialLimit <= maxLimit:
+            raise ValueError(
+                "Limits have to satisfy 1 <= minLimit <= initialLimit <= maxLimit!"
+            )
+        if not 0 < backoff < 1:
+            raise ValueError("backoff has to be between 0 and 1!")
+        if not 1 <= recentSamples <= window:
+            raise ValueError("recentSamples has to be between 1 and window!")
+
+        self.minLimit = minLimit
+        self.maxLimit = maxLimit
+        self.latencyTolerance = latencyTolerance
+        self.backoff = backoff
+        self.overloadCodes = overloadCodes
+        self.recentSamples = recentSamples
+        self.baselinePercentile = baselinePercentile
+
+        self.inFlight = 0
+        self.queueDelay = 0.0
+        self.decreases = 0
+
+        self.__latencies = deque(maxlen=window)
+
+        self.__limit = float(initialLimit)
+        self.__lastDecrease = float("-inf")
+        self.__condition = Condition()
+
+    def __repr__(self):
+        return (
+            f"AdaptiveLimiter(limit={self.limit}, inFlight={self.inFlight}, "
+            f"queueDelay={self.queueDelay:.3f}s)"
+        )
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight"""
+        return int(self.__limit)
+
+    @property
+    def baselineLatency(self) -> Optional[float]:
+        """Latency regarded as uncongested, None until a request completed"""
+        if not self.__latencies:
+            return None
+        latencies = sorted(self.__latencies)
+        return latencies[int(self.baselinePercentile / 100 * (len(latencies) - 1))]
+
+    def acquire(self) -> float:
+        """Waits for a free slot
+
+        Returns:
+            start (float): the time the slot was granted, to be passed to release
+        """
+        queued = time.monotonic()
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.inFlight < self.limit)
+            self.inFlight += 1
+            start = time.monotonic()
+            ## Exponentially weighted so the metric follows the recent queueing delay
+            self.queueDelay += 0.2 * ((start - queued) - self.queueDelay)
+        return start
+
+    def release(self, start: float, overloaded: bool = False):
+        """Frees a slot and adapts the limit to the outcome of the request
+
+        Parameters:
+            start (float): the value returned by acquire
+            overloaded (bool): True if the server signalled overload
+        """
+        latency = time.monotonic() - start
+        with self.__condition:
+            self.inFlight -= 1
+
+            congested = overloaded
+            if not overloaded:
+                self.__latencies.append(latency)
+                if len(self.__latencies) >= self.recentSamples:
+                    recent = sorted(list(self.__latencies)[-self.recentSamples :])
+                    congested = (
+                        recent[len(recent) // 2]
+                        > self.baselineLatency * self.latencyTolerance
+                    )
+
+            if congested:
+                ## Only requests started after the last cut may cut again, a single
+                ## congestion event is reported by every request in flight at the time
+                if start > self.__lastDecrease:
+                    self.__limit = max(self.minLimit, self.__limit * self.backoff)
+                    self.__lastDecrease = time.monotonic()
+                    self.decreases += 1
+            else:
+                self.__limit = min(self.maxLimit, self.__limit + 1 / self.__limit)
+
+            self.__condition.notify_all()
+
+    def isOverloaded(self, response: NetworkRequestResult) -> bool:
+        """True if a response signals an overloaded server: an overload status code or a timeout"""
+        if response.get("success", False):
+            return False
+        return (
+            response.get("timedOut", False)
+            or response.get("httpCode", None) in self.overloadCodes
+        )
+
+    def call(
+        self, send: Callable[[str], NetworkRequestResult], query: str
+    ) -> NetworkRequestResult:
+        """Sends a query once a slot is free
+
+        Returns:
+            response (NetworkRequestResult): the result of the request
+        """
+        start = self.acquire()
+        response = None
+        try:
+            response = send(query)
+            return response
+        finally:
+            self.release(start, response is None or self.isOverloaded(response))
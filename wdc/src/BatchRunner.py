@@ -0,0 +1,269 @@
+from .QueryBuilder import QueryBuilder
+from .helpers.types import NetworkRequestResult
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Optional, TextIO
+import base64
+import json
+import os
+import re
+import sys
+import time
+
+# QueryBuilder methods a spec may chain after its subset
+SPEC_OPERATIONS = {
+    "arthimetic",
+    "expFuncs",
+    "compareFuncs",
+    "trigFuncs",
+    "aggregationFuncs",
+    "clip",
+    "scale",
+}
+
+FILE_EXTENSIONS = {"CSV": "csv", "PNG": "png", "JPEG": "jpg", None: "txt"}
+
+# Ids usable as file names in outputDir: no separators and no leading dot
+_FILE_ID = re.compile(r"\w[\w.-]*")
+
+
+def buildQuery(spec: dict) -> QueryBuilder:
+    """Builds the query described by a spec
+
+    A spec names the coverage, its subset and the operations applied to it in order, e.g.
+    {"coverage": "AvgLandTemp", "subset": {"lat": [50, 52], "startDate": "2014-01"},
+    "operations": [{"op": "compareFuncs", "args": ["GT", 20]}, {"op": "aggregationFuncs", "args": ["COUNT"]}]}
+
+    Parameters:
+        spec (dict): The query spec
+
+    Returns:
+        query (QueryBuilder): The query of the spec
+
+    Raises:
+        ValueError: If the spec has no coverage or uses an unknown operation
+    """
+    if not spec.get("coverage"):
+        raise ValueError("A query spec requires a coverage!")
+
+    query = QueryBuilder(spec["coverage"])
+    subset = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in spec.get("subset", {}).items()
+    }
+    if subset:
+        query.subset(**subset)
+
+    for operation in spec.get("operations", []):
+        if operation.get("op") not in SPEC_OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation.get('op')}")
+        getattr(query, operation["op"])(
+            *operation.get("args", []), **operation.get("kwargs", {})
+        )
+    return query
+
+
+class BatchRunner:
+    """
+    Runs query specs read from JSONL concurrently and writes every result as soon as it arrives.
+
+    Specs are read lazily, at most twice as many queries as workers are in flight, so arbitrarily
+    long inputs run in constant memory. Each finished query is written as a JSON record, with the
+    result inline or in its own file in outputDir. Ids of succeeded queries are appended to the
+    checkpoint, a rerun with the same checkpoint skips them and retries only the rest. Queries
+    that can not be built or sent, e.g. because the connection raises, are written as failed
+    records without stopping the run.
+
+    Parameters:
+        dbc (DatabaseConnection): The connection queries are sent with
+        workers (int): Number of queries sent concurrently
+        output (TextIO): Receives one JSON record per query
+        outputDir optional(str): Directory results are written to as <id>.<extension>, ids
+            have to consist of letters, digits, "_", "-" and "." and must not start with a dot
+        checkpoint optional(str): File with the ids of completed queries
+    """
+
+    def __init__(
+        self,
+        dbc,
+        workers: int = 4,
+        output: TextIO = sys.stdout,
+        outputDir: Optional[str] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        if workers < 1:
+            raise ValueError("At least one worker is required!")
+
+        self.dbc = dbc
+        self.workers = workers
+        self.output = output
+        self.outputDir = outputDir
+        self.checkpoint = checkpoint
+
+        self.completed = set()
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                self.completed = {line.strip() for line in file if line.strip()}
+        if outputDir is not None:
+            os.makedirs(outputDir, exist_ok=True)
+
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.latencies = []
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (
+            f"BatchRunner(succeeded={self.succeeded}, failed={self.failed}, "
+            f"skipped={self.skipped})"
+        )
+
+    def run(self, lines: Iterable[str]) -> dict:
+        """Runs the specs of the given JSONL lines
+
+        Parameters:
+            lines (Iterable[str]): One spec per line, lines are consumed lazily
+
+        Returns:
+            report (dict): Throughput of the run, see report()
+        """
+        start = time.monotonic()
+        checkpoint = open(self.checkpoint, "a") if self.checkpoint is not None else None
+        pending = set()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for index, line in enumerate(lines):
+                    if not line.strip():
+                        continue
+                    if len(pending) >= 2 * self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self.__finish(done, checkpoint)
+
+                    try:
+                        spec = json.loads(line)
+                        queryId = str(spec.get("id", index))
+                    except (ValueError, AttributeError) as error:
+                        self.__write(
+                            {"id": str(index), "success": False, "error": str(error)},
+                            checkpoint,
+                        )
+                        continue
+
+                    if queryId in self.completed:
+                        self.skipped += 1
+                        continue
+                    pending.add(executor.submit(self.__execute, queryId, spec))
+
+                self.__finish(wait(pending).done, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+            self.elapsed += time.monotonic() - start
+
+        return self.report()
+
+    def report(self) -> dict:
+        """Throughput of the queries run so far
+
+        Returns:
+            report (dict): Counts of succeeded, failed and skipped queries, elapsed seconds,
+                queries and result bytes per second, median and 95th percentile latency
+        """
+        latencies = sorted(self.latencies)
+        percentile = lambda q: latencies[
+            min(int(q * len(latencies)), len(latencies) - 1)
+        ]
+        executed = self.succeeded + self.failed
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed": self.elapsed,
+            "queriesPerSecond": executed / self.elapsed if self.elapsed else 0.0,
+            "bytesPerSecond": self.bytes / self.elapsed if self.elapsed else 0.0,
+            "latencyP50": percentile(0.5) if latencies else None,
+            "latencyP95": percentile(0.95) if latencies else None,
+        }
+
+    def __execute(self, queryId: str, spec: dict) -> dict:
+        """Sends the query of a spec, returns its record"""
+        try:
+            encoding = spec.get("encoding")
+            query = buildQuery(spec).composeQueryFromOPS(encoding)
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            return {"id": queryId, "success": False, "error": str(error)}
+
+        if self.outputDir is not None and not _FILE_ID.fullmatch(queryId):
+            return {
+                "id": queryId,
+                "success": False,
+                "error": f"Query id {queryId!r} can not be used as a file name",
+            }
+
+        start = time.monotonic()
+        try:
+            response: NetworkRequestResult = self.dbc.send_request(query)
+        except Exception as error:
+            return {
+                "id": queryId,
+                "success": False,
+                "latency": time.monotonic() - start,
+                "error": f"{type(error).__name__}: {error}",
+            }
+        latency = time.monotonic() - start
+
+        if not response.get("success"):
+            return {
+                "id": queryId,
+                "success": False,
+                "latency": latency,
+                "httpCode": response.get("httpCode"),
+                "httpError": response.get("httpError"),
+            }
+
+        result = response.get("result") or b""
+        record = {
+            "id": queryId,
+            "success": True,
+            "latency": latency,
+            "bytes": len(result),
+        }
+
+        if self.outputDir is not None:
+            extension = FILE_EXTENSIONS.get(encoding, encoding.lower())
+            path = os.path.join(self.outputDir, f"{queryId}.{extension}")
+            with open(path, "wb") as file:
+                file.write(result)
+            record["path"] = path
+        else:
+            try:
+                record["result"] = result.decode()
+            except UnicodeDecodeError:
+                record["result"] = base64.b64encode(result).decode()
+                record["resultEncoding"] = "base64"
+        return record
+
+    def __finish(self, futures, checkpoint):
+        """Writes the records of finished queries"""
+        for future in futures:
+            self.__write(future.result(), checkpoint)
+
+    def __write(self, record: dict, checkpoint):
+        """Writes a record and checkpoints it if the query succeeded"""
+        self.output.write(json.dumps(record) + "\n")
+        self.output.flush()
+
+        if "latency" in record:
+            self.latencies.append(record["latency"])
+        self.bytes += record.get("bytes", 0)
+
+        if record["success"]:
+            self.succeeded += 1
+            if checkpoint is not None:
+                checkpoint.write(record["id"] + "\n")
+                checkpoint.flush()
+        else:
+            self.failed += 1
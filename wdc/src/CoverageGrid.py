@@ -0,0 +1,169 @@
+from .helpers.types import SubsetType, CoverageAxes
+
+import numpy as np
+
+# Axes of a coverage, in the order they are indexed locally
+LOCAL_AXIS_ORDER = ("lat", "long", "time")
+
+
+class CoverageGrid:
+    """
+    Describes the grid of a coverage: the coordinates of each cell along the lat, long and time axes.
+
+    Parameters:
+        lats (array-like): Latitude of each cell centre in grid order
+        longs (array-like): Longitude of each cell centre in grid order
+        dates (list[str]): Ansi date of each time step in grid order
+        serverAxisOrder (tuple): Order of the axes in the results of the server
+    """
+
+    def __init__(
+        self,
+        lats,
+        longs,
+        dates: list[str],
+        serverAxisOrder: tuple[CoverageAxes, ...] = ("time", "lat", "long"),
+    ):
+        if sorted(serverAxisOrder) != sorted(LOCAL_AXIS_ORDER):
+            raise ValueError(
+                f"serverAxisOrder has to be a permutation of {LOCAL_AXIS_ORDER}"
+            )
+
+        self.lats = np.asarray(lats, dtype=float)
+        self.longs = np.asarray(longs, dtype=float)
+        self.dates = list(dates)
+        self.serverAxisOrder = tuple(serverAxisOrder)
+
+    def __repr__(self):
+        return (
+            f"CoverageGrid(shape={self.shape}, "
+            f"lat=[{self.lats[0]}..{self.lats[-1]}], "
+            f"long=[{self.longs[0]}..{self.longs[-1]}], "
+            f"time=[{self.dates[0]}..{self.dates[-1]}])"
+        )
+
+    @classmethod
+    def regular(
+        cls,
+        latRange: tuple[float, float],
+        longRange: tuple[float, float],
+        resolution: float,
+        dates: list[str],
+        latDescending: bool = True,
+        **gridOptions,
+    ):
+        """Creates a grid with evenly spaced cells covering the given extent
+
+        Parameters:
+            latRange tuple(float, float): Southern and northern edge of the coverage
+            longRange tuple(float, float): Western and eastern edge of the coverage
+            resolution (float): Size of a cell in degrees
+            dates list[str]: Ansi date of each time step
+            latDescending (bool): True if the first row of the grid is the northernmost one
+
+        Returns:
+            grid (CoverageGrid): the described grid
+        """
+        lats = np.arange(latRange[0] + resolution / 2, latRange[1], resolution)
+        longs = np.arange(longRange[0] + resolution / 2, longRange[1], resolution)
+        return cls(lats[::-1] if latDescending else lats, longs, dates, **gridOptions)
+
+    @property
+    def shape(self):
+        """Number of cells along the lat, long and time axes"""
+        return (len(self.lats), len(self.longs), len(self.dates))
+
+    @property
+    def coords(self):
+        """Coordinates of the cells along the lat, long and time axes"""
+        return {"lat": self.lats, "long": self.longs, "time": self.dates}
+
+    def indexRange(self, axis: CoverageAxes, lower, upper=None):
+        """Grid index range of the cells whose coordinate lies within [lower, upper]
+
+        Parameters:
+            axis OneOf("lat", "long", "time"): The axis to search
+            lower (float | str): Lower coordinate, or the only coordinate if upper is omitted
+            upper optional(float | str): Upper coordinate
+
+        Returns:
+            indexRange tuple(int, int): start and stop index, stop is exclusive
+        """
+        upper = lower if upper is None else upper
+        if axis == "time":
+            ## Dates are compared as strings, "2014-07" selects every time step of July 2014
+            coordinates = np.array(self.dates)
+            inside = (coordinates >= str(lower)) & (
+                coordinates <= str(upper) + "\uffff"
+            )
+        else:
+            coordinates = self.coords[axis]
+            lower, upper = min(lower, upper), max(lower, upper)
+            inside = (coordinates >= lower) & (coordinates <= upper)
+
+        indices = np.flatnonzero(inside)
+        if not indices.size:
+            ## A single coordinate between two cell centres selects the nearest cell
+            if axis != "time" and lower == upper:
+                nearest = int(np.argmin(np.abs(coordinates - lower)))
+                return nearest, nearest + 1
+            return 0, 0
+        return int(indices[0]), int(indices[-1]) + 1
+
+    def snapRange(self, axis: CoverageAxes, lower: float, upper: float):
+        """Coordinates of the cells nearest to lower and upper
+
+        A trim between the snapped coordinates selects exactly the cells from the one to the other.
+
+        Parameters:
+            axis OneOf("lat", "long"): The axis to snap
+            lower (float): Lower coordinate
+            upper (float): Upper coordinate
+
+        Returns:
+            range tuple(float, float): coordinates of the nearest cells, lower first
+        """
+        coordinates = self.coords[axis]
+        nearest = lambda value: float(
+            coordinates[int(np.argmin(np.abs(coordinates - value)))]
+        )
+        return nearest(min(lower, upper)), nearest(max(lower, upper))
+
+    def subsetArgs(self, latRange, longRange, timeRange) -> SubsetType:
+        """Subset arguments trimming the coverage to the given index ranges
+
+        Every axis is trimmed, never sliced, so the result keeps all three dimensions.
+
+        Parameters:
+            latRange tuple(int, int): start and stop index along the lat axis
+            longRange tuple(int, int): start and stop index along the long axis
+            timeRange tuple(int, int): start and stop index along the time axis
+
+        Returns:
+            subset (SubsetType): keyword arguments for QueryBuilder.subset
+        """
+        lats = self.lats[latRange[0] : latRange[1]]
+        longs = self.longs[longRange[0] : longRange[1]]
+        return {
+            "lat": (float(lats.min()), float(lats.max())),
+            "long": (float(longs.min()), float(longs.max())),
+            "startDate": self.dates[timeRange[0]],
+            "endDate": self.dates[timeRange[1] - 1],
+        }
+
+    def toLocalOrder(self, array: np.ndarray, ranges) -> np.ndarray:
+        """Reshapes a server result of the given index ranges into (lat, long, time) order
+
+        Parameters:
+            array (np.ndarray): values returned by the server
+            ranges list[tuple(int, int)]: index ranges along the lat, long and time axes
+
+        Returns:
+            array (np.ndarray): values with shape (lat, long, time)
+        """
+        sizes = dict(zip(LOCAL_AXIS_ORDER, [stop - start for start, stop in ranges]))
+        serverShape = [sizes[axis] for axis in self.serverAxisOrder]
+        array = np.asarray(array).reshape(serverShape)
+        return array.transpose(
+            [self.serverAxisOrder.index(axis) for axis in LOCAL_AXIS_ORDER]
+        )
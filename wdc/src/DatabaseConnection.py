@@ -1,36 +1,200 @@
 import requests
-from requests.exceptions import HTTPError, Timeout, ConnectionError
+from requests.exceptions import HTTPError, Timeout, ConnectionError, ChunkedEncodingError
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
 from .helpers.types import NetworkRequestResult
+from .AdaptiveLimiter import AdaptiveLimiter
+from .EndpointPool import EndpointPool
+from .MemoryBudget import MemoryBudget, currentReservation
+from .helpers.compression import DecompressionErrors, acceptEncoding, decompressor
+from contextlib import nullcontext
+from threading import Lock
+from typing import Callable, Optional, Union
+import time
 
 class DatabaseConnection:
     """
     Handles HTTP connections to a database server for sending queries.
     """
 
-    def __init__(self, endpoint_url="https://ows.rasdaman.org/rasdaman/ows"):
+    def __init__(self,
+                 endpoint_url: Union[str, list[str]] = "https://ows.rasdaman.org/rasdaman/ows",
+                 limiter: Optional[AdaptiveLimiter] = None,
+                 compression: bool = False,
+                 memory_budget: Optional[MemoryBudget] = None,
+                 timeout: Optional[float] = None):
         """
         Initialize the connection with the URL of the database endpoint.
         Args:
-            endpoint_url (str): The endpoint URL of the database server.
+            endpoint_url (str | list[str]): The endpoint URL of the database server, or the URLs of several replicas
+                queries are balanced between.
+            limiter (AdaptiveLimiter, optional): Adapts the number of concurrent requests to the server load.
+            compression (bool): Request compressed responses (gzip, deflate, and brotli/zstd if installed)
+                and decompress them incrementally. Byte counts are only reported for streamed responses,
+                i.e. with compression, a memory budget or stream_request.
+            memory_budget (MemoryBudget, optional): Reserves the size of every result before the request is sent
+                and waits while results in flight exceed the budget.
+            timeout (float, optional): Seconds to wait for the server to respond, or between two chunks of the response.
+                Requests exceeding it fail with timedOut set, waiting indefinitely if omitted.
         """
         self.endpoint_url = endpoint_url
+        self.limiter = limiter
+        self.endpoints = EndpointPool(endpoint_url) if isinstance(endpoint_url, (list, tuple)) else None
+        self.compression = compression
+        self.memory_budget = memory_budget
+        self.timeout = timeout
+        self.compressed_bytes = 0
+        self.uncompressed_bytes = 0
+        self.__transfer_lock = Lock()
 
     def send_request(self, query) -> NetworkRequestResult:
         """
         Send a POST request to the database endpoint with the provided query.
+        Waits for a free slot first if a limiter is configured.
         Args:
             query (str): The database query to send.
         Returns:
             requests.Response: The HTTP response returned by the server.
         """
+        return self._send(self._post, query)
+
+    def get_coverage(self, params: dict, sink: Optional[Callable[[bytes], None]] = None,
+                     chunk_size: int = 65536) -> NetworkRequestResult:
+        """
+        Send a WCS GetCoverage request with the given key-value parameters to the database endpoint.
+        Plain subsets are answered without going through the WCPS query processor.
+        Args:
+            params (dict): The request parameters, e.g. composed by QueryBuilder.composeGetCoverage.
+            sink (Callable[[bytes], None], optional): Called with each decompressed chunk of the response body,
+                like in stream_request, instead of buffering it.
+            chunk_size (int): Number of bytes read from the connection at a time.
+        Returns:
+            NetworkRequestResult: The outcome of the request, like send_request or stream_request with a sink.
+        """
+        return self._send(lambda params: self._post(None, sink, chunk_size, params=params), params)
+
+    def stream_request(self, query, sink: Callable[[bytes], None], chunk_size: int = 65536) -> NetworkRequestResult:
+        """
+        Send a query and pass the decompressed response body to sink chunk by chunk instead of buffering it.
+        Args:
+            query (str): The database query to send.
+            sink (Callable[[bytes], None]): Called with each decompressed chunk of the response body.
+            chunk_size (int): Number of bytes read from the connection at a time.
+        Returns:
+            NetworkRequestResult: The outcome of the request without the result, and the byte counts of the response.
+        """
+        return self._send(lambda query: self._post(query, sink, chunk_size), query)
+
+    def _send(self, post, query) -> NetworkRequestResult:
+        """
+        Send through the memory budget and the limiter, if configured.
+        Memory is reserved before waiting for a slot, so requests holding a slot never wait for memory.
+        """
+        with self._reservation():
+            if self.limiter is not None:
+                return self.limiter.call(post, query)
+            return post(query)
+
+    def _reservation(self):
+        """
+        The reservation of the current thread if a datacube reserved memory for decoding the result,
+        otherwise a new reservation held until the result is returned.
+        """
+        current = currentReservation()
+        if self.memory_budget is None or (current is not None and current.budget is self.memory_budget):
+            return nullcontext(current)
+        return self.memory_budget.reserve()
+
+    def _post(self, query, sink=None, chunk_size=65536, params=None) -> NetworkRequestResult:
+        """
+        Send the query, or the GetCoverage request if params are given, to the database endpoint without limiting concurrency.
+        With several replicas the query goes to the fastest healthy one, failing over to the others on connection errors,
+        server errors (5xx) and timeouts. Only successful requests and client errors count as latency samples.
+        A streamed response failing after part of its body reached the sink is returned as failure instead, since
+        the next replica would send the body again from the start.
+        """
+        if self.endpoints is None:
+            return self._post_to(self.endpoint_url, query, sink=sink, chunk_size=chunk_size, params=params)
+
+        delivered = False
+        if sink is not None:
+            target = sink
+
+            def sink(data):
+                nonlocal delivered
+                delivered = True
+                target(data)
+
+        tried = []
+        while (url := self.endpoints.acquire(exclude=tried)) is not None:
+            tried.append(url)
+            start = time.monotonic()
+            try:
+                result = self._post_to(url, query, failover=True, sink=sink, chunk_size=chunk_size, params=params)
+            except ConnectionError as conn_err:
+                self.endpoints.release(url)
+                last_failure = {
+                    "success": False,
+                    "result": None,
+                    "httpCode": None,
+                    "httpError": str(conn_err),
+                    "errorDetails": None,
+                }
+                if delivered:
+                    return last_failure
+                continue
+            if result.get("timedOut", False) or (result["httpCode"] or 0) >= 500:
+                self.endpoints.release(url)
+                last_failure = result
+                if delivered:
+                    return last_failure
+                continue
+            self.endpoints.release(url, time.monotonic() - start)
+            return result
+
+        return last_failure
+
+    def _post_to(self, url, query, failover=False, sink=None, chunk_size=65536, params=None) -> NetworkRequestResult:
+        """
+        Send the query to a single endpoint. Connection errors are raised instead of returned if failover is set.
+        The response body is streamed if compression is enabled or a sink is given, errors while reading or
+        decompressing it (an unsupported or corrupt encoding, a broken connection) are returned as failures.
+        """
+        response = None
         try:
-            response = requests.post(self.endpoint_url, data={"query": query})
+            if sink is None and not self.compression and self.memory_budget is None:
+                if params is not None:
+                    response = requests.get(url, params=params, timeout=self.timeout)
+                else:
+                    response = requests.post(url, data={"query": query}, timeout=self.timeout)
+                response.raise_for_status()
+
+                return {
+                    "success": True,
+                    "result": response.content,
+                    "httpCode": response.status_code,
+                }
+
+            headers = {"Accept-Encoding": acceptEncoding()} if self.compression else None
+            if params is not None:
+                response = requests.get(url, params=params, headers=headers, stream=True, timeout=self.timeout)
+            else:
+                response = requests.post(url, data={"query": query}, headers=headers, stream=True, timeout=self.timeout)
             response.raise_for_status()
 
+            reservation = currentReservation() if self.memory_budget is not None else None
+            if reservation is not None and "Content-Length" in response.headers:
+                reservation.resize(int(response.headers["Content-Length"]))
+
+            chunks = []
+            compressed, uncompressed = self._read_body(response, sink or chunks.append, chunk_size)
+            if reservation is not None and sink is None:
+                reservation.resize(uncompressed)
             return {
                 "success": True,
-                "result": response.content,
+                "result": b"".join(chunks) if sink is None else None,
                 "httpCode": response.status_code,
+                "compressedBytes": compressed,
+                "uncompressedBytes": uncompressed,
             }
         except HTTPError as http_err:
             return {
@@ -47,8 +211,11 @@ class DatabaseConnection:
                 "httpCode": None,
                 "httpError": str(timeout_err),
                 "errorDetails": None,
+                "timedOut": True,
             }
         except ConnectionError as conn_err:
+            if failover:
+                raise
             return {
                 "success": False,
                 "result": None,
@@ -56,3 +223,47 @@ class DatabaseConnection:
                 "httpError": str(conn_err),
                 "errorDetails": None,
             }
+        except ReadTimeoutError as timeout_err:
+            return {
+                "success": False,
+                "result": None,
+                "httpCode": getattr(response, "status_code", None),
+                "httpError": str(timeout_err),
+                "errorDetails": None,
+                "timedOut": True,
+            }
+        except (ValueError, ChunkedEncodingError, ProtocolError, DecodeError) + DecompressionErrors as body_err:
+            return {
+                "success": False,
+                "result": None,
+                "httpCode": getattr(response, "status_code", None),
+                "httpError": f"Reading the response failed: {body_err}",
+                "errorDetails": None,
+            }
+
+    def _read_body(self, response, sink, chunk_size):
+        """
+        Decompress a streamed response body incrementally into sink.
+        Returns:
+            tuple(int, int): The number of bytes received and the number of bytes after decompression.
+        """
+        decoder = decompressor(response.headers.get("Content-Encoding", ""))
+        compressed, uncompressed = 0, 0
+        try:
+            for chunk in response.raw.stream(chunk_size, decode_content=False):
+                compressed += len(chunk)
+                data = decoder.decompress(chunk)
+                if data:
+                    uncompressed += len(data)
+                    sink(data)
+            data = decoder.flush()
+            if data:
+                uncompressed += len(data)
+                sink(data)
+        finally:
+            response.close()
+
+        with self.__transfer_lock:
+            self.compressed_bytes += compressed
+            self.uncompressed_bytes += uncompressed
+        return compressed, uncompressed
@@ -1,8 +1,43 @@
-from .helpers.utils import decodeCsv, decodeImage, decodeText
+from .helpers.utils import OPEN_END, CsvArrayDecoder, decodeCsvArray
+from .helpers.decoders import decode
 from .DatabaseConnection import DatabaseConnection
 from .QueryBuilder import QueryBuilder
-from .helpers.types import ReturnTypes
-from typing import Optional
+from .QueryPlanner import QueryPlanner
+from .ZonalStatistics import ZonalStatistics
+from .PointSampler import PointSampler
+from .CoverageGrid import CoverageGrid
+from .LazyCoverageArray import LazyCoverageArray
+from .TileCache import TileCache
+from .TimeSeriesStore import TimeSeriesStore
+from .Prefetcher import Prefetcher
+from .DecodePipeline import DecodePipeline
+from .ParquetDatasetWriter import ParquetDatasetWriter
+from .QuerySplitter import QuerySplitter
+from .helpers.geometry import cellCentres
+from .helpers.types import (
+    NetworkRequestResult,
+    ReturnTypes,
+    ResultTypes,
+    PolygonType,
+    ZonalStatisticTypes,
+    SamplingMethods,
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from threading import Lock
+from typing import Optional, Hashable, Union, Callable
+import asyncio
+import re
+import time
+import numpy as np
+
+## OWS exceptions of GetCoverage requests the server can not answer as such,
+## an unsupported subset or format, which are retried as WCPS queries
+_GET_COVERAGE_UNSUPPORTED = re.compile(
+    r'exceptionCode="(InvalidSubsetting|InvalidAxisLabel|InvalidEncodingSyntax'
+    r'|EncodingNotSupported|OperationNotSupported|NotImplemented)"'
+    r'|exceptionCode="InvalidParameterValue"\s+locator="(subset|format)"'
+)
 
 
 class Datacube:
@@ -10,41 +45,654 @@ class Datacube:
     Manages operations on a datacube such as querying data through the DatabaseConnection.
     """
 
-    def __init__(self, dbc: DatabaseConnection, coverageId: str):
+    def __init__(
+        self,
+        dbc: DatabaseConnection,
+        coverageId: str,
+        grid: Optional[CoverageGrid] = None,
+        tileCache: Optional[TileCache] = None,
+        getCoverage: bool = True,
+    ):
         """
         Initialize the Datacube instance with a DatabaseConnection.
+        The optional CoverageGrid describes the coordinates of the coverage cells,
+        together with a TileCache it lets plain subsets be answered from cached tiles.
+        Unless getCoverage is disabled, plain subsets with an encoding are sent to a
+        DatabaseConnection as WCS GetCoverage requests instead of WCPS queries.
         """
         self.dbc = dbc
         self.coverage = coverageId
+        self.grid = grid
+        self.tileCache = tileCache
+        self.getCoverage = getCoverage
+        self.prefetcher = None
+        self.splitter = None
 
-    def getQueryBuilder(self, debug: bool = False):
-        return QueryBuilder(coverageId=self.coverage, debug=debug)
+        ## Number of requests and seconds spent per query path, e.g. to measure the GetCoverage gain
+        self.queryPaths = {
+            "wcs": {"requests": 0, "seconds": 0.0, "fallbacks": 0},
+            "wcps": {"requests": 0, "seconds": 0.0},
+        }
+        self.__pathLock = Lock()
+
+    def getQueryBuilder(self, debug: bool = False, immutable: bool = False):
+        return QueryBuilder(coverageId=self.coverage, debug=debug, immutable=immutable)
 
     def execute_query(
         self,
         queryObject: QueryBuilder,
         encodingFormat: Optional[ReturnTypes] = None,
         raw: bool = False,
+        resultType: ResultTypes = "default",
+        targetSize: Optional[tuple[int, int]] = None,
     ):
         """
         Executes the provided query using the DatabaseConnection.
 
+        With resultType "array" results are decoded into numpy arrays: images (PNG, JPEG) as
+        (height, width[, bands]) downscaled to the optional targetSize (width, height),
+        CSV and scalar results shaped after their dimensions. With resultType "arrow" CSV and
+        scalar results are decoded into pyarrow tables with a row per cell and coordinate columns.
+
+        If the connection has a memory budget, the result holds its reservation until it is decoded.
+
         Returns:
             if raw is true: Bytes object directly from the network request
             else: decoded image (PNG, JPEG), pandas dataframe (CSV), or decoded text
         """
+        with self.__reserve():
+            if self.prefetcher is not None:
+                response = self.prefetcher.fetch(queryObject, encodingFormat)
+            else:
+                response = self.send(queryObject, encodingFormat)
+
+            if response.get("result", None):
+                if raw:
+                    return response.get("result", None)
+                else:
+                    options = (
+                        {"targetSize": targetSize} if targetSize is not None else {}
+                    )
+                    if resultType == "arrow":
+                        options["coordinates"] = lambda shape: self.resultCoordinates(
+                            queryObject, shape
+                        )
+                    return decode(response, encodingFormat, resultType, **options)
+            else:
+                return response
+
+    def __reserve(self):
+        """
+        Reserves memory for a result until it is decoded, if the connection has a memory budget.
+        """
+        if (
+            isinstance(self.dbc, DatabaseConnection)
+            and self.dbc.memory_budget is not None
+        ):
+            return self.dbc.memory_budget.reserve()
+        return nullcontext()
+
+    def send(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes] = None,
+    ) -> NetworkRequestResult:
+        """
+        Sends a query without decoding its result, through the splitter if splitting is enabled,
+        as GetCoverage request if it is a plain subset and as WCPS query otherwise.
+        Every request of the datacube and its helpers (prefetcher, tile cache, planner, pipeline) goes through it.
+
+        Returns:
+            the network request result
+        """
+        if self.splitter is not None:
+            return self.splitter.send(queryObject, encodingFormat, self.__sendPath)
+        return self.__sendPath(queryObject, encodingFormat)
+
+    def __sendPath(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes],
+        sink: Optional[Callable[[bytes], None]] = None,
+    ):
+        """
+        Sends a query as GetCoverage request if it is a plain subset, otherwise as WCPS query.
+        Falls back to WCPS if the server reports that it can not answer the subset or format
+        as GetCoverage request, other errors of the GetCoverage request are returned.
+        With a sink the response body is streamed into it, which requires a DatabaseConnection.
+
+        Returns:
+            the network request result, with the query path taken and the seconds it took
+        """
+        params = None
+        if self.getCoverage and isinstance(self.dbc, DatabaseConnection):
+            params = queryObject.composeGetCoverage(encodingFormat)
+
+        if params is not None:
+            start = time.perf_counter()
+            response = self.dbc.get_coverage(params, sink)
+            elapsed = time.perf_counter() - start
+            fallback = not response["success"] and self.__unsupported(response)
+            self.__recordPath("wcs", elapsed, fallback)
+            if not fallback:
+                return {**response, "queryPath": "wcs", "elapsed": elapsed}
+
+        start = time.perf_counter()
         query = queryObject.composeQueryFromOPS(encodingFormat)
-        response = self.dbc.send_request(query)
+        if sink is not None:
+            response = self.dbc.stream_request(query, sink)
+        else:
+            response = self.dbc.send_request(query)
+        elapsed = time.perf_counter() - start
+        self.__recordPath("wcps", elapsed)
+        return {**response, "queryPath": "wcps", "elapsed": elapsed}
+
+    @staticmethod
+    def __unsupported(response: NetworkRequestResult) -> bool:
+        """True if a failed GetCoverage request reports a subset or format GetCoverage can not express"""
+        details = response.get("errorDetails", None) or b""
+        if isinstance(details, bytes):
+            details = details.decode("utf-8", errors="replace")
+        return _GET_COVERAGE_UNSUPPORTED.search(details) is not None
+
+    def __recordPath(self, path: str, elapsed: float, fallback: bool = False):
+        with self.__pathLock:
+            self.queryPaths[path]["requests"] += 1
+            self.queryPaths[path]["seconds"] += elapsed
+            if fallback:
+                self.queryPaths[path]["fallbacks"] += 1
+
+    def fetchImageArrays(
+        self,
+        queries: list[QueryBuilder],
+        encodingFormat: ReturnTypes = "PNG",
+        targetSize: Optional[tuple[int, int]] = None,
+        maxWorkers: int = 4,
+    ):
+        """
+        Executes image queries concurrently and decodes the results into numpy arrays.
+
+        Returns:
+            list of arrays in the order of the queries, or network request results for failed queries
+        """
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            return list(
+                executor.map(
+                    lambda query: self.execute_query(
+                        query,
+                        encodingFormat,
+                        resultType="array",
+                        targetSize=targetSize,
+                    ),
+                    queries,
+                )
+            )
+
+    def executeBatch(
+        self,
+        queries: list[QueryBuilder],
+        encodingFormat: Optional[ReturnTypes] = "CSV",
+        targetSize: Optional[tuple[int, int]] = None,
+        pipeline: Optional[DecodePipeline] = None,
+        **pipelineOptions,
+    ):
+        """
+        Executes queries concurrently and decodes the results into numpy arrays in worker processes,
+        overlapping the network requests with the decoding.
+
+        A pipeline is created for the call unless one is passed, reusing a pipeline avoids
+        starting the worker processes for every batch.
+
+        Returns:
+            list of arrays in the order of the queries, or network request results for failed queries
+        """
+        if pipeline is not None:
+            return pipeline.run(self, queries, encodingFormat, targetSize)
+        with DecodePipeline(**pipelineOptions) as pipeline:
+            return pipeline.run(self, queries, encodingFormat, targetSize)
+
+    def progressiveQueries(
+        self,
+        queryObject: QueryBuilder,
+        levels: tuple[float, ...] = (0.125, 0.25, 0.5, 1),
+    ):
+        """
+        Downscaled variants of a query, from the coarsest to the full resolution level.
+
+        Returns:
+            list of (level, QueryBuilder) tuples, the query itself is used for level 1
+        """
+        queries = []
+        for level in sorted(levels):
+            if not 0 < level <= 1:
+                raise ValueError("Progressive levels have to be in the range (0, 1]!")
+            queries.append(
+                (level, queryObject if level == 1 else queryObject.copy().scale(level))
+            )
+        return queries
+
+    def iterProgressive(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes] = "PNG",
+        levels: tuple[float, ...] = (0.125, 0.25, 0.5, 1),
+        raw: bool = False,
+    ):
+        """
+        Executes a query progressively, from a coarse preview up to the full resolution.
+        The next level is fetched in the background while the current one is consumed.
+
+        Yields:
+            (level, result) tuples, result as returned by execute_query
+        """
+        queries = self.progressiveQueries(queryObject, levels)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self.execute_query, queries[0][1], encodingFormat, raw
+            )
+            for index, (level, _) in enumerate(queries):
+                result = future.result()
+                if index + 1 < len(queries):
+                    future = executor.submit(
+                        self.execute_query, queries[index + 1][1], encodingFormat, raw
+                    )
+                yield level, result
+
+    def executeProgressive(
+        self,
+        queryObject: QueryBuilder,
+        callback: Callable,
+        encodingFormat: Optional[ReturnTypes] = "PNG",
+        levels: tuple[float, ...] = (0.125, 0.25, 0.5, 1),
+        raw: bool = False,
+    ):
+        """
+        Executes a query progressively and delivers every level to callback(level, result).
+
+        Returns:
+            the result of the full resolution level
+        """
+        result = None
+        for level, result in self.iterProgressive(
+            queryObject, encodingFormat, levels, raw
+        ):
+            callback(level, result)
+        return result
+
+    async def aiterProgressive(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes] = "PNG",
+        levels: tuple[float, ...] = (0.125, 0.25, 0.5, 1),
+        raw: bool = False,
+    ):
+        """
+        Asynchronous variant of iterProgressive, requests are executed in a worker thread.
+
+        Yields:
+            (level, result) tuples, result as returned by execute_query
+        """
+        queries = self.progressiveQueries(queryObject, levels)
+        task = asyncio.create_task(
+            asyncio.to_thread(self.execute_query, queries[0][1], encodingFormat, raw)
+        )
+        for index, (level, _) in enumerate(queries):
+            result = await task
+            if index + 1 < len(queries):
+                task = asyncio.create_task(
+                    asyncio.to_thread(
+                        self.execute_query, queries[index + 1][1], encodingFormat, raw
+                    )
+                )
+            yield level, result
+
+    def enablePrefetch(self, **prefetchOptions):
+        """
+        Enables background prefetching of the subsets following the ones executed by execute_query,
+        e.g. the next month when stepping through time or the next tile when panning.
+
+        Returns:
+            Prefetcher watching the executed queries
+        """
+        self.disablePrefetch()
+        self.prefetcher = Prefetcher(self, **prefetchOptions)
+        return self.prefetcher
+
+    def disablePrefetch(self):
+        """
+        Cancels pending prefetches and stops prefetching.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
 
-        if response.get("result", None):
-            if raw:
-                return response.get("result", None)
+    def enableSplitting(self, **splitterOptions):
+        """
+        Recovers queries that are too large for the server: on timeouts, 413/5xx errors or size
+        errors their subset is bisected and the results of the halves are merged.
+
+        Returns:
+            the QuerySplitter, which holds the learned maximum safe size per coverage
+        """
+        self.splitter = QuerySplitter(self, **splitterOptions)
+        return self.splitter
+
+    def disableSplitting(self):
+        """
+        Sends queries as they are again.
+        """
+        self.splitter = None
+
+    def fetchArray(self, queryObject: QueryBuilder):
+        """
+        Executes the provided query with CSV encoding and decodes the result into a numpy array.
+
+        Plain subsets are assembled from the tile cache if one is configured. If the connection
+        requests compressed responses, the response is decompressed and parsed as it streams in,
+        unless splitting is enabled: the results of split queries are merged before they are decoded.
+
+        Returns:
+            numpy array shaped after the dimensions of the result, or the network request result on failure
+        """
+        operations = queryObject.operations
+        if (
+            self.tileCache is not None
+            and self.grid is not None
+            and len(operations) == 1
+            and operations[0]["OP"] == "SLICE"
+        ):
+            array = self.tileCache.read(self, self.grid, operations[0]["args"])
+            if array is not None:
+                return array
+
+        with self.__reserve():
+            if (
+                isinstance(self.dbc, DatabaseConnection)
+                and self.dbc.compression
+                and self.splitter is None
+            ):
+                decoder = CsvArrayDecoder()
+                response = self.__sendPath(queryObject, "CSV", decoder.feed)
+                return decoder.finish() if response["success"] else response
+
+            response = self.send(queryObject, "CSV")
+
+            if response.get("result", None):
+                return decodeCsvArray(response)
             else:
-                if encodingFormat == "CSV":
-                    return decodeCsv(response)
-                elif encodingFormat in {"JPEG", "PNG"}:
-                    return decodeImage(response)
+                return response
+
+    def planQueries(self, queries: list[QueryBuilder], **plannerOptions):
+        """
+        Decides whether queries sharing a subset are evaluated locally on a single fetch
+        of the subset, or pushed down to the server one by one.
+
+        Returns:
+            QueryPlan describing the chosen strategy
+        """
+        return QueryPlanner(self, **plannerOptions).plan(queries)
+
+    def executeMany(self, queries: list[QueryBuilder], **plannerOptions):
+        """
+        Executes queries sharing a subset with as few round trips as the planner deems worthwhile.
+
+        Returns:
+            list of results aligned with the queries: scalars for aggregations, numpy arrays otherwise
+        """
+        return QueryPlanner(self, **plannerOptions).execute(queries)
+
+    def zonalStatistics(
+        self,
+        polygons: list[PolygonType],
+        startDate: str,
+        endDate: Optional[str] = None,
+        stats: tuple[ZonalStatisticTypes, ...] = ("AVG", "MIN", "MAX", "COUNT"),
+        zoneIds: Optional[list[Hashable]] = None,
+        **zonalOptions,
+    ):
+        """
+        Computes statistics for many polygons, fetching one raster per group of neighbouring polygons
+        and rasterizing the polygons locally.
+
+        Returns:
+            pandas dataframe with one row per zone, one column per statistic and an error column
+        """
+        return ZonalStatistics(self, **zonalOptions).compute(
+            polygons, startDate, endDate, stats, zoneIds
+        )
+
+    def samplePoints(
+        self,
+        lats,
+        longs,
+        startDate: str,
+        endDate: Optional[str] = None,
+        method: SamplingMethods = "nearest",
+        **samplingOptions,
+    ):
+        """
+        Samples the coverage at many points, fetching one tile per cluster of points
+        and looking the values up with vectorized nearest or bilinear indexing.
+
+        Returns:
+            numpy array aligned with the points, with one column per time step if endDate is given
+        """
+        return PointSampler(self, **samplingOptions).sample(
+            lats, longs, startDate, endDate, method
+        )
+
+    def lazy(self, grid: Optional[CoverageGrid] = None, **lazyOptions):
+        """
+        Returns a lazy array view of the coverage, indexed as [lat, long, time] in grid indices.
+        Only the chunks touched by an index are fetched.
+
+        Returns:
+            LazyCoverageArray over the given grid, or the grid of the datacube
+        """
+        grid = grid or self.grid
+        if grid is None:
+            raise ValueError("A CoverageGrid is required to index the coverage lazily!")
+        return LazyCoverageArray(self, grid, **lazyOptions)
+
+    def seriesTimestamps(
+        self,
+        startDate: str,
+        count: int,
+        timeStep: Optional[str] = None,
+        endDate: Optional[str] = None,
+    ):
+        """
+        Timestamps of consecutive time steps starting at startDate, taken from the grid
+        of the datacube if available, generated with the pandas frequency timeStep otherwise.
+        Without timeStep, yearly, monthly or daily steps are inferred from the precision of
+        startDate if exactly count of them span startDate to endDate.
+
+        Returns:
+            list of timestamps formatted like startDate, or finer if needed to tell them apart
+
+        Raises:
+            ValueError: If there is no grid and the time step can not be inferred
+        """
+        if self.grid is not None:
+            start, _ = self.grid.indexRange("time", startDate, self.grid.dates[-1])
+            return self.grid.dates[start : start + count]
+
+        from pandas import date_range
+
+        ## Dates are formatted at the precision of startDate, or finer if that is ambiguous
+        formats = ["%Y", "%Y-%m", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%SZ"]
+        precision = {4: 0, 7: 1, 10: 2}.get(len(startDate), 3)
+
+        if timeStep is None:
+            if count == 1:
+                return [startDate]
+            inferredStep = ("YS", "MS", "D", None)[precision]
+            if (
+                inferredStep is None
+                or endDate is None
+                or len(date_range(startDate, endDate, freq=inferredStep)) != count
+            ):
+                raise ValueError(
+                    f"The time steps of {count} values from {startDate} to {endDate} can not be "
+                    "inferred, pass a timeStep or set a CoverageGrid!"
+                )
+            timeStep = inferredStep
+
+        timestamps = date_range(startDate, periods=count, freq=timeStep)
+        for dateFormat in formats[precision:]:
+            labels = [timestamp.strftime(dateFormat) for timestamp in timestamps]
+            if len(set(labels)) == len(labels):
+                break
+        return labels
+
+    def resultCoordinates(
+        self, queryObject: QueryBuilder, shape: tuple, timeStep: Optional[str] = None
+    ):
+        """
+        Coordinates of the axes of a subset result. They are taken from the grid of the datacube
+        if available, and derived from the subset otherwise: cell centres spanning lat/long ranges,
+        time steps as of seriesTimestamps.
+
+        Returns:
+            dict of axis name to coordinates in the axis order of the result,
+            empty if the axes can not be determined
+        """
+        subset = next(
+            (op["args"] for op in queryObject.operations if op["OP"] == "SLICE"), None
+        )
+        if subset is None:
+            return {}
+
+        ranged = {
+            "lat": type(subset.get("lat", None)) in {tuple, type(None)},
+            "long": type(subset.get("long", None)) in {tuple, type(None)},
+            "time": bool(subset.get("endDate", None)),
+        }
+        axisOrder = (
+            self.grid.serverAxisOrder
+            if self.grid is not None
+            else ("time", "lat", "long")
+        )
+        axes = [axis for axis in axisOrder if ranged[axis]]
+        if len(axes) != len(shape):
+            return {}
+
+        coordinates = {}
+        for axis, count in zip(axes, shape):
+            values = None
+            if self.grid is not None:
+                if axis == "time":
+                    start, stop = self.grid.indexRange(
+                        "time", subset["startDate"], subset["endDate"]
+                    )
+                elif subset.get(axis, None) is None:
+                    start, stop = 0, len(self.grid.coords[axis])
                 else:
-                    return decodeText(response)
+                    start, stop = self.grid.indexRange(axis, *subset[axis])
+                if stop - start == count:
+                    values = self.grid.coords[axis][start:stop]
+
+            if values is None:
+                if axis == "time":
+                    values = self.seriesTimestamps(
+                        subset["startDate"], count, timeStep, subset["endDate"]
+                    )
+                elif subset.get(axis, None) is not None:
+                    values = cellCentres(*subset[axis], count, axis == "lat")
+                else:
+                    return {}
+            coordinates[axis] = values
+        return coordinates
+
+    def exportParquet(
+        self,
+        queries: list[QueryBuilder],
+        dataset: Union[ParquetDatasetWriter, str],
+        partitionCols: Optional[list[str]] = None,
+        maxWorkers: int = 4,
+    ):
+        """
+        Executes queries concurrently and streams each result as an Arrow table with coordinate
+        columns into a Parquet dataset, e.g. the tiles or time steps of a large extraction.
+
+        Returns:
+            list with the number of rows written per query, or the network request result for failed queries
+        """
+        if not isinstance(dataset, ParquetDatasetWriter):
+            dataset = ParquetDatasetWriter(dataset, partitionCols)
+
+        def export(query):
+            table = self.execute_query(query, "CSV", resultType="arrow")
+            if isinstance(table, dict):
+                return table
+            dataset.write(table)
+            return table.num_rows
+
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            return list(executor.map(export, queries))
+
+    def refreshTimeSeries(
+        self,
+        queryObject: QueryBuilder,
+        store: Union[TimeSeriesStore, str],
+        endDate: Optional[str] = None,
+        timeStep: Optional[str] = None,
+    ):
+        """
+        Incrementally refreshes a stored time series. The first refresh stores the date range of the subset,
+        later ones only request the time steps after the last stored timestamp, by rewriting the start date
+        of the subset, up to endDate or by default the latest time step of the coverage, and append them.
+        Without a grid or timeStep, the time step of the new rows is inferred from the stored timestamps.
+        The operations of the query have to preserve the time axis.
+
+        Returns:
+            pandas dataframe with the merged series, or the network request result on failure
+        """
+        store = store if isinstance(store, TimeSeriesStore) else TimeSeriesStore(store)
+        subset = next(
+            (op["args"] for op in queryObject.operations if op["OP"] == "SLICE"), {}
+        )
+        if not (endDate or subset.get("endDate", None)):
+            raise ValueError("Refreshing a time series requires a date range!")
+
+        rows = store.load()
+        if rows is None or rows.empty:
+            lastTimestamp, width = None, None
+            startDate, endDate = subset["startDate"], endDate or subset["endDate"]
         else:
-            return response
+            lastTimestamp, width = rows["time"].iloc[-1], len(rows.columns) - 1
+            startDate = lastTimestamp
+            endDate = endDate or (
+                self.grid.dates[-1] if self.grid is not None else OPEN_END
+            )
+            if endDate == lastTimestamp:
+                return rows
+            if timeStep is None and self.grid is None and len(rows) >= 3:
+                from pandas import infer_freq, to_datetime
+
+                timeStep = infer_freq(to_datetime(rows["time"]))
+
+        values = self.fetchArray(
+            queryObject.withSubset(startDate=startDate, endDate=endDate)
+        )
+        if isinstance(values, dict):
+            return values
+
+        ## Time steps are counted in rows of the stored width, a single step may come without its time axis
+        values = np.atleast_1d(values)
+        if width is not None:
+            values = values.reshape(-1, width)
+        timestamps = self.seriesTimestamps(
+            startDate,
+            len(values),
+            timeStep,
+            endDate if endDate != OPEN_END else None,
+        )
+
+        ## The new range starts at the last stored time step, which is already stored
+        if lastTimestamp:
+            values, timestamps = values[1:], timestamps[1:]
+        if not len(timestamps):
+            return rows
+
+        return store.append(timestamps, values)
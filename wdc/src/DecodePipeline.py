@@ -0,0 +1,171 @@
+from .QueryBuilder import QueryBuilder
+from .helpers.types import NetworkRequestResult, ReturnTypes
+from .helpers.utils import decodeImageArray, decodeText, parseCsvArray
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+import numpy as np
+
+
+def _toSharedMemory(data) -> SharedMemory:
+    """Copies bytes or an array into a new shared memory block"""
+    buffer = memoryview(data).cast("B")
+    shm = SharedMemory(create=True, size=max(buffer.nbytes, 1))
+    try:
+        shm.buf[: buffer.nbytes] = buffer
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm
+
+
+def _decodeShared(
+    name: str,
+    size: int,
+    encodingFormat: Optional[ReturnTypes],
+    targetSize: Optional[tuple[int, int]],
+):
+    """Decodes a payload from shared memory in a worker process
+
+    Returns:
+        (name, shape, dtype) of the shared memory block holding the decoded array
+    """
+    shm = SharedMemory(name=name)
+    try:
+        payload = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+
+    response = {"success": True, "result": payload}
+    if encodingFormat in {"JPEG", "PNG"}:
+        array = decodeImageArray(response, targetSize)
+    else:
+        array = parseCsvArray(decodeText(response))
+
+    array = np.ascontiguousarray(array)
+    ## The block is unlinked by the parent once the array has been copied out
+    result = _toSharedMemory(array)
+    result.close()
+    return result.name, array.shape, array.dtype.str
+
+
+class DecodePipeline:
+    """
+    Decodes query results in a pool of worker processes while further results are fetched.
+
+    Payloads are handed to the workers and decoded arrays back through shared memory, so large
+    buffers are not pickled. Decoding runs outside the GIL of the calling process, so bulk
+    extractions use several cores while the network threads keep fetching.
+
+    Parameters:
+        processes optional(int): Number of decoding processes, defaults to the number of CPUs
+        fetchWorkers (int): Number of queries fetched concurrently
+        startMethod (str): Start method of the worker processes
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        fetchWorkers: int = 4,
+        startMethod: str = "spawn",
+    ):
+        self.fetchWorkers = fetchWorkers
+        self.__pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context(startMethod)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def decode(
+        self,
+        payload: bytes,
+        encodingFormat: Optional[ReturnTypes] = "CSV",
+        targetSize: Optional[tuple[int, int]] = None,
+    ) -> np.ndarray:
+        """Decodes a single payload in a worker process
+
+        Returns:
+            array (np.ndarray): the decoded values
+        """
+        return self.__collect(self.__submit(payload, encodingFormat, targetSize))
+
+    def __submit(self, payload, encodingFormat, targetSize):
+        shm = _toSharedMemory(payload)
+        try:
+            future = self.__pool.submit(
+                _decodeShared, shm.name, len(payload), encodingFormat, targetSize
+            )
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        return shm, future
+
+    def __collect(self, submitted) -> np.ndarray:
+        shm, future = submitted
+        try:
+            name, shape, dtype = future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        result = SharedMemory(name=name)
+        try:
+            return np.ndarray(shape, dtype=dtype, buffer=result.buf).copy()
+        finally:
+            result.close()
+            result.unlink()
+
+    def run(
+        self,
+        datacube,
+        queries: list[QueryBuilder],
+        encodingFormat: Optional[ReturnTypes] = "CSV",
+        targetSize: Optional[tuple[int, int]] = None,
+    ) -> list:
+        """Fetches queries in threads and decodes each result in a worker process as soon as it arrives
+
+        Returns:
+            list of arrays in the order of the queries, or network request results for failed queries
+        """
+        results: list = [None] * len(queries)
+        decoding = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetchWorkers) as executor:
+                fetching = {
+                    executor.submit(datacube.send, query, encodingFormat): index
+                    for index, query in enumerate(queries)
+                }
+                for future in as_completed(fetching):
+                    index = fetching[future]
+                    response: NetworkRequestResult = future.result()
+                    if response.get("result", None):
+                        decoding[index] = self.__submit(
+                            response["result"], encodingFormat, targetSize
+                        )
+                    else:
+                        results[index] = response
+        finally:
+            ## Collect every submitted payload so all shared memory is released, even if one failed
+            failure = None
+            for index, submitted in decoding.items():
+                try:
+                    results[index] = self.__collect(submitted)
+                except Exception as error:
+                    failure = failure or error
+
+        if failure is not None:
+            raise failure
+        return results
+
+    def shutdown(self):
+        """Stops the worker processes"""
+        self.__pool.shutdown(cancel_futures=True)
@@ -0,0 +1,107 @@
+from threading import Lock
+from typing import Optional
+import random
+import time
+
+
+class EndpointPool:
+    """
+    Latency-aware selection between replicas of a database server.
+
+    Each endpoint keeps an exponentially weighted moving average of its latency and the number
+    of requests in flight. Queries go to the better of two randomly picked healthy endpoints
+    (power of two choices), scoring each by its average latency times its load. An endpoint is
+    marked unhealthy after a failed request (a connection error, a server error or a timeout)
+    and retried once its cooldown, doubling with each consecutive failure, has passed. Failed
+    requests never count as latency samples, so quickly failing endpoints do not score well.
+
+    Parameters:
+        endpoints list[str]: URLs of the replicas
+        smoothing (float): Weight of the latest latency in the moving average
+        cooldown (float): Seconds an endpoint is skipped after its first failed request
+        maxCooldown (float): Upper bound of the cooldown after consecutive failures
+    """
+
+    def __init__(
+        self,
+        endpoints: list[str],
+        smoothing: float = 0.3,
+        cooldown: float = 1.0,
+        maxCooldown: float = 60.0,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required!")
+
+        self.endpoints = list(endpoints)
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self.maxCooldown = maxCooldown
+
+        self.latency = {url: None for url in self.endpoints}
+        self.inFlight = {url: 0 for url in self.endpoints}
+        self.failures = {url: 0 for url in self.endpoints}
+        self.__unhealthyUntil = {url: 0.0 for url in self.endpoints}
+        self.__lock = Lock()
+
+    def __repr__(self):
+        return f"EndpointPool(healthy={self.healthy()}, latency={self.latency})"
+
+    def healthy(self) -> list[str]:
+        """Endpoints not in their cooldown"""
+        now = time.monotonic()
+        return [url for url in self.endpoints if self.__unhealthyUntil[url] <= now]
+
+    def __score(self, url):
+        ## Endpoints without measurements score 0 so they are probed first
+        return (self.latency[url] or 0.0) * (self.inFlight[url] + 1)
+
+    def acquire(self, exclude=()) -> Optional[str]:
+        """Picks the endpoint for the next request and counts it as in flight
+
+        Parameters:
+            exclude (Collection[str]): Endpoints already tried for the request
+
+        Returns:
+            url (str): the chosen endpoint, or None if all endpoints have been tried
+        """
+        with self.__lock:
+            candidates = [url for url in self.healthy() if url not in exclude]
+            if not candidates:
+                ## Every remaining endpoint is cooling down, try the one failing the longest ago
+                candidates = sorted(
+                    (url for url in self.endpoints if url not in exclude),
+                    key=lambda url: self.__unhealthyUntil[url],
+                )[:1]
+            if not candidates:
+                return None
+
+            if len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+            url = min(candidates, key=self.__score)
+            self.inFlight[url] += 1
+            return url
+
+    def release(self, url: str, latency: Optional[float] = None):
+        """Records the outcome of a request sent to an endpoint
+
+        Parameters:
+            url (str): the endpoint returned by acquire
+            latency optional(float): Seconds the request took, None if it failed
+        """
+        with self.__lock:
+            self.inFlight[url] -= 1
+            if latency is None:
+                self.failures[url] += 1
+                self.__unhealthyUntil[url] = time.monotonic() + min(
+                    self.maxCooldown, self.cooldown * 2 ** (self.failures[url] - 1)
+                )
+                return
+
+            self.failures[url] = 0
+            self.__unhealthyUntil[url] = 0.0
+            previous = self.latency[url]
+            self.latency[url] = (
+                latency
+                if previous is None
+                else previous + self.smoothing * (latency - previous)
+            )
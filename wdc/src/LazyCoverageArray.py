@@ -0,0 +1,208 @@
+from .CoverageGrid import CoverageGrid
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from itertools import product
+import numpy as np
+
+
+class LazyCoverageArray:
+    """
+    Array-like view of a coverage indexed as [lat, long, time] in grid indices.
+
+    Indexing with integers, slices and integer sequences is translated into chunk-aligned subsets,
+    only the chunks touched by an index are fetched (concurrently) and kept in a bounded
+    least-recently-used chunk cache, so overlapping indexing patterns reuse chunks instead of
+    querying them again. Strided and scattered indices skip the chunks between their cells.
+
+    Parameters:
+        datacube (Datacube): The datacube the chunks are fetched from
+        grid (CoverageGrid): Description of the coverage grid
+        chunks tuple(int, int, int): Number of cells per chunk along the lat, long and time axes
+        maxCachedChunks (int): Maximum number of chunks kept in memory
+        maxWorkers (int): Number of chunks fetched concurrently
+    """
+
+    def __init__(
+        self,
+        datacube,
+        grid: CoverageGrid,
+        chunks: tuple[int, int, int] = (64, 64, 12),
+        maxCachedChunks: int = 64,
+        maxWorkers: int = 4,
+    ):
+        if len(chunks) != 3 or min(chunks) < 1:
+            raise ValueError(
+                "chunks has to contain a positive size for lat, long and time"
+            )
+
+        self.datacube = datacube
+        self.grid = grid
+        self.chunks = tuple(chunks)
+        self.maxCachedChunks = maxCachedChunks
+        self.maxWorkers = maxWorkers
+
+        self.chunkRequests = 0
+        self.__cache = OrderedDict()
+        self.__lock = Lock()
+
+    def __repr__(self):
+        return f"LazyCoverageArray({self.datacube.coverage}, shape={self.shape}, chunks={self.chunks})"
+
+    @property
+    def shape(self):
+        """Number of cells along the lat, long and time axes"""
+        return self.grid.shape
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def dtype(self):
+        return np.dtype(float)
+
+    @property
+    def coords(self):
+        """Coordinates of the cells along the lat, long and time axes"""
+        return self.grid.coords
+
+    def chunkRanges(self, chunkIndex: tuple[int, int, int]):
+        """Grid index ranges covered by a chunk
+
+        Returns:
+            ranges list[tuple(int, int)]: start and stop index along the lat, long and time axes
+        """
+        return [
+            (index * size, min((index + 1) * size, length))
+            for index, size, length in zip(chunkIndex, self.chunks, self.shape)
+        ]
+
+    def fetchChunk(self, chunkIndex: tuple[int, int, int]) -> np.ndarray:
+        """Fetches a single chunk from the server
+
+        Returns:
+            chunk (np.ndarray): values with shape (lat, long, time)
+        """
+        ranges = self.chunkRanges(chunkIndex)
+        query = self.datacube.getQueryBuilder()
+        query.subset(**self.grid.subsetArgs(*ranges))
+
+        with self.__lock:
+            self.chunkRequests += 1
+
+        array = self.datacube.fetchArray(query)
+        if isinstance(array, dict):
+            raise ValueError(
+                f"Fetching chunk {chunkIndex} failed: {array.get('httpError', None)}"
+            )
+        return self.grid.toLocalOrder(array, ranges)
+
+    def getChunks(self, chunkIndices: list[tuple[int, int, int]]):
+        """Returns the requested chunks, fetching the ones missing from the cache concurrently
+
+        Returns:
+            chunks dict[tuple, np.ndarray]: chunk index to chunk values
+        """
+        chunks = {}
+        with self.__lock:
+            for chunkIndex in chunkIndices:
+                if chunkIndex in self.__cache:
+                    self.__cache.move_to_end(chunkIndex)
+                    chunks[chunkIndex] = self.__cache[chunkIndex]
+
+        missing = [
+            chunkIndex for chunkIndex in chunkIndices if chunkIndex not in chunks
+        ]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+                chunks.update(zip(missing, executor.map(self.fetchChunk, missing)))
+
+            with self.__lock:
+                for chunkIndex in missing:
+                    self.__cache[chunkIndex] = chunks[chunkIndex]
+                while len(self.__cache) > self.maxCachedChunks:
+                    self.__cache.popitem(last=False)
+
+        return chunks
+
+    def clearCache(self):
+        """Drops all cached chunks"""
+        with self.__lock:
+            self.__cache.clear()
+
+    def __normalizeKey(self, key):
+        """Converts an index into the selected grid indices along each axis"""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError("Too many indices, the coverage has three dimensions")
+        key = key + (slice(None),) * (3 - len(key))
+
+        selections, dropAxes = [], []
+        for axis, (index, length) in enumerate(zip(key, self.shape)):
+            if isinstance(index, slice):
+                selections.append(np.arange(*index.indices(length)))
+            elif isinstance(index, (int, np.integer)):
+                position = int(index) + length if index < 0 else int(index)
+                if not 0 <= position < length:
+                    raise IndexError(f"Index {index} is out of bounds for axis {axis}")
+                selections.append(np.array([position]))
+                dropAxes.append(axis)
+            elif isinstance(index, (list, tuple, np.ndarray)):
+                positions = np.asarray(index)
+                if positions.ndim != 1 or (
+                    positions.size and positions.dtype.kind not in "iu"
+                ):
+                    raise TypeError(
+                        "Only one-dimensional integer sequences are supported as indices"
+                    )
+                positions = positions.astype(int)
+                positions = np.where(positions < 0, positions + length, positions)
+                if positions.size and not (
+                    0 <= positions.min() and positions.max() < length
+                ):
+                    raise IndexError(f"Index {index} is out of bounds for axis {axis}")
+                selections.append(positions)
+            else:
+                raise TypeError(
+                    "Only integers, slices and integer sequences are supported as indices"
+                )
+
+        return selections, tuple(dropAxes)
+
+    def __getitem__(self, key) -> np.ndarray:
+        selections, dropAxes = self.__normalizeKey(key)
+
+        if any(not selection.size for selection in selections):
+            shape = [selection.size for selection in selections]
+            return np.empty(shape).squeeze(axis=dropAxes)
+
+        ## Only the chunks holding a selected cell are fetched, also for strided or scattered indices
+        chunkAxes = [
+            np.unique(selection // size).tolist()
+            for selection, size in zip(selections, self.chunks)
+        ]
+        chunkIndices = list(product(*chunkAxes))
+        chunks = self.getChunks(chunkIndices)
+
+        ## Copy the selected cells of every chunk to their positions in the result
+        result = np.empty([selection.size for selection in selections])
+        for chunkIndex, chunk in chunks.items():
+            ranges = self.chunkRanges(chunkIndex)
+            positions = [
+                np.flatnonzero(selection // size == index)
+                for selection, size, index in zip(selections, self.chunks, chunkIndex)
+            ]
+            result[np.ix_(*positions)] = chunk[
+                np.ix_(
+                    *(
+                        selection[position] - start
+                        for selection, position, (start, _) in zip(
+                            selections, positions, ranges
+                        )
+                    )
+                )
+            ]
+        return result.squeeze(axis=dropAxes)
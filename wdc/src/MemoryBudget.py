@@ -0,0 +1,163 @@
+from collections import deque
+from contextvars import ContextVar
+from threading import Condition
+from typing import Optional
+import time
+
+## Reservation of the request executed by the current thread, shared by the layers it passes
+_currentReservation: ContextVar[Optional["Reservation"]] = ContextVar(
+    "currentReservation", default=None
+)
+
+
+def currentReservation() -> Optional["Reservation"]:
+    """The reservation entered by the current thread, None if there is none"""
+    return _currentReservation.get()
+
+
+class Reservation:
+    """
+    Bytes of a MemoryBudget held by one request until its result is consumed.
+
+    Used as a context manager, the reservation is the current one of the thread while the request
+    is sent, read and decoded, and is released on exit.
+
+    Parameters:
+        budget (MemoryBudget): The budget the bytes are reserved from
+        nbytes (int): Number of bytes reserved
+    """
+
+    def __init__(self, budget, nbytes: int):
+        self.budget = budget
+        self.bytes = nbytes
+        self.released = False
+        self.__token = None
+
+    def __repr__(self):
+        return f"Reservation(bytes={self.bytes}, released={self.released})"
+
+    def __enter__(self):
+        self.__token = _currentReservation.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _currentReservation.reset(self.__token)
+        self.release()
+
+    def resize(self, nbytes: int):
+        """Adjusts the reservation to the known size of a result, e.g. its Content-Length
+
+        Resizing never blocks, as the request is already in flight; new reservations wait
+        until the usage is back within the budget.
+        """
+        self.budget._resize(self, nbytes)
+
+    def release(self):
+        """Returns the reserved bytes to the budget, releasing twice has no effect"""
+        self.budget._release(self)
+
+
+class MemoryBudget:
+    """
+    Process-wide limit on the bytes held by results in flight.
+
+    Every request reserves an estimate of its result before it is sent, adjusted to the
+    Content-Length once the response headers arrive, and keeps the reservation until its result
+    is consumed (decoded by the datacube or returned to the caller). New requests wait in order of
+    arrival while the budget is exhausted. A single request larger than the budget is admitted
+    once nothing else is reserved. Share one instance between all connections of a process.
+
+    Parameters:
+        limitBytes (int): Number of bytes results in flight may hold
+        defaultEstimate (int): Bytes reserved for a request whose result size is unknown
+    """
+
+    def __init__(self, limitBytes: int = 512 * 2**20, defaultEstimate: int = 2**20):
+        if limitBytes <= 0 or defaultEstimate < 0:
+            raise ValueError(
+                "limitBytes has to be positive and defaultEstimate not negative!"
+            )
+
+        self.limitBytes = limitBytes
+        self.defaultEstimate = defaultEstimate
+
+        self.used = 0
+        self.peak = 0
+        self.reservations = 0
+        self.waits = 0
+        self.waitTime = 0.0
+
+        self.__queue = deque()
+        self.__condition = Condition()
+
+    def __repr__(self):
+        return (
+            f"MemoryBudget(used={self.used}/{self.limitBytes}, waiting={self.waiting}, "
+            f"waitTime={self.waitTime:.3f}s)"
+        )
+
+    @property
+    def available(self) -> int:
+        """Bytes which can be reserved without waiting"""
+        return max(self.limitBytes - self.used, 0)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a reservation"""
+        return len(self.__queue)
+
+    def reserve(self, nbytes: Optional[int] = None, timeout: Optional[float] = None):
+        """Reserves bytes for a request, waiting until the budget allows it
+
+        Parameters:
+            nbytes optional(int): Estimated size of the result, defaultEstimate if omitted
+            timeout optional(float): Maximum number of seconds to wait
+
+        Returns:
+            reservation (Reservation): The reserved bytes, release them once the result is consumed
+
+        Raises:
+            TimeoutError: If the bytes could not be reserved within the timeout
+        """
+        nbytes = self.defaultEstimate if nbytes is None else int(nbytes)
+        start = time.monotonic()
+        ticket = object()
+
+        with self.__condition:
+            self.__queue.append(ticket)
+            admissible = lambda: self.__queue[0] is ticket and (
+                self.used + nbytes <= self.limitBytes or self.used == 0
+            )
+            waited = not admissible()
+            try:
+                if waited and not self.__condition.wait_for(admissible, timeout):
+                    raise TimeoutError(f"Could not reserve {nbytes} bytes in time!")
+            finally:
+                self.__queue.remove(ticket)
+                self.__condition.notify_all()
+                if waited:
+                    self.waits += 1
+                    self.waitTime += time.monotonic() - start
+
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+            self.reservations += 1
+
+        return Reservation(self, nbytes)
+
+    def _resize(self, reservation: Reservation, nbytes: int):
+        with self.__condition:
+            if reservation.released:
+                return
+            self.used += int(nbytes) - reservation.bytes
+            reservation.bytes = int(nbytes)
+            self.peak = max(self.peak, self.used)
+            self.__condition.notify_all()
+
+    def _release(self, reservation: Reservation):
+        with self.__condition:
+            if reservation.released:
+                return
+            reservation.released = True
+            self.used -= reservation.bytes
+            self.__condition.notify_all()
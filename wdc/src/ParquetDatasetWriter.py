@@ -0,0 +1,78 @@
+from .helpers.arrow import importPyarrow
+
+from threading import Lock
+from typing import Optional
+import os
+import uuid
+
+
+class ParquetDatasetWriter:
+    """
+    Streams Arrow tables into a Parquet dataset on disk, optionally partitioned by columns.
+
+    Every written table becomes its own set of files (one per partition), so results of a batch
+    or of the tiles of a large extraction are persisted as they arrive and never held together.
+    File names carry a prefix unique to the writer, so several writers (or reruns) can append to
+    the same dataset without replacing each other's files.
+
+    Parameters:
+        directory (str): Root directory of the dataset
+        partitionCols optional(list[str]): Columns the dataset is partitioned by (hive style, e.g. time=2014-01)
+        compression (str): Parquet compression codec
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        partitionCols: Optional[list[str]] = None,
+        compression: str = "zstd",
+    ):
+        importPyarrow()
+        self.directory = directory
+        self.partitionCols = list(partitionCols or [])
+        self.compression = compression
+
+        self.prefix = uuid.uuid4().hex
+        self.tables = 0
+        self.rows = 0
+        self.__lock = Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return f"ParquetDatasetWriter({self.directory}, tables={self.tables}, rows={self.rows})"
+
+    def write(self, table):
+        """Appends a table to the dataset
+
+        Parameters:
+            table (pyarrow.Table): rows to append, including the partition columns
+        """
+        import pyarrow.parquet as pq
+
+        with self.__lock:
+            part = self.tables
+            self.tables += 1
+
+        pq.write_to_dataset(
+            table,
+            self.directory,
+            partition_cols=self.partitionCols or None,
+            basename_template=f"part-{self.prefix}-{part}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            compression=self.compression,
+        )
+
+        with self.__lock:
+            self.rows += table.num_rows
+
+    def read(self):
+        """Reads the whole dataset
+
+        Returns:
+            table (pyarrow.Table): all rows written so far
+        """
+        import pyarrow.dataset as ds
+
+        partitioning = "hive" if self.partitionCols else None
+        return ds.dataset(self.directory, partitioning=partitioning).to_table()
@@ -0,0 +1,198 @@
+from .helpers.types import SamplingMethods
+from .helpers.geometry import rasterCoordinates
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+import numpy as np
+
+
+def _axisPositions(coordinates: np.ndarray, values: np.ndarray):
+    """Fractional grid position of each value along a monotonic axis, clipped to its ends"""
+    if len(coordinates) == 1 or coordinates[0] == coordinates[-1]:
+        return np.zeros(len(values))
+    indices = np.arange(len(coordinates), dtype=float)
+    if coordinates[0] > coordinates[-1]:
+        coordinates, indices = coordinates[::-1], indices[::-1]
+    return np.interp(values, coordinates, indices)
+
+
+class PointSampler:
+    """
+    Samples a coverage at many (lat, long) points with one request per tile.
+
+    Points are clustered into tiles of a fixed size in degrees, the bounding box of the
+    points of each tile is fetched once and the values are looked up with vectorized indexing.
+    Points of tiles that could not be fetched are NaN, the reason is kept in errors.
+
+    Parameters:
+        datacube (Datacube): The datacube the points are sampled from
+        tileDegrees (float): Size in degrees of the tiles points are clustered into
+        cellSize optional(float): Resolution of the coverage, tiles are padded by one cell
+            so neighbouring cells are available for bilinear interpolation
+        maxWorkers (int): Number of tiles fetched concurrently
+        latDescending (bool): True if the latitude axis of the coverage runs from north to south
+    """
+
+    def __init__(
+        self,
+        datacube,
+        tileDegrees: float = 2.0,
+        cellSize: Optional[float] = None,
+        maxWorkers: int = 4,
+        latDescending: bool = True,
+    ):
+        self.datacube = datacube
+        self.tileDegrees = tileDegrees
+        self.cellSize = cellSize
+        self.maxWorkers = maxWorkers
+        self.latDescending = latDescending
+
+        ## Index of each point of a failed tile to the reason, of the last sample
+        self.errors = {}
+
+    def clusterPoints(self, lats: np.ndarray, longs: np.ndarray):
+        """Clusters points into tiles
+
+        Returns:
+            tiles list[np.ndarray]: indices of the points belonging to each tile
+        """
+        keys = np.stack(
+            [
+                np.floor(lats / self.tileDegrees).astype(np.int64),
+                np.floor(longs / self.tileDegrees).astype(np.int64),
+            ],
+            axis=1,
+        )
+        _, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        return np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+
+    def fetchTile(self, lats, longs, startDate: str, endDate: Optional[str] = None):
+        """Fetches the raster covering a set of points
+
+        Returns:
+            tile tuple: the raster with latitude and longitude as the last two axes,
+                and the latitude and longitude of its cells, taken from the grid of the datacube if it has one
+        """
+        padding = self.cellSize or 0
+        latRange = (float(lats.min()) - padding, float(lats.max()) + padding)
+        longRange = (float(longs.min()) - padding, float(longs.max()) + padding)
+        if self.datacube.grid is not None:
+            latRange = self.datacube.grid.snapRange("lat", *latRange)
+            longRange = self.datacube.grid.snapRange("long", *longRange)
+
+        query = self.datacube.getQueryBuilder()
+        query.subset(lat=latRange, long=longRange, startDate=startDate, endDate=endDate)
+
+        raster = self.datacube.fetchArray(query)
+        if isinstance(raster, dict):
+            raise ValueError(
+                f"Fetching tile {latRange}, {longRange} failed: {raster.get('httpError', None)}"
+            )
+        return rasterCoordinates(
+            raster,
+            latRange,
+            longRange,
+            startDate,
+            endDate,
+            self.datacube.grid,
+            self.latDescending,
+        )
+
+    def lookup(
+        self, raster, rasterLats, rasterLongs, lats, longs, method: SamplingMethods
+    ):
+        """Looks up the values of points in a fetched raster
+
+        Returns:
+            values (np.ndarray): shape (points,) or (points, time steps)
+        """
+        rows = _axisPositions(rasterLats, lats)
+        cols = _axisPositions(rasterLongs, longs)
+
+        if method == "nearest":
+            values = raster[..., np.rint(rows).astype(int), np.rint(cols).astype(int)]
+        elif method == "bilinear":
+            row0 = np.minimum(np.floor(rows).astype(int), raster.shape[-2] - 1)
+            col0 = np.minimum(np.floor(cols).astype(int), raster.shape[-1] - 1)
+            row1 = np.minimum(row0 + 1, raster.shape[-2] - 1)
+            col1 = np.minimum(col0 + 1, raster.shape[-1] - 1)
+            rowWeight, colWeight = rows - row0, cols - col0
+
+            values = (
+                raster[..., row0, col0] * (1 - rowWeight) * (1 - colWeight)
+                + raster[..., row0, col1] * (1 - rowWeight) * colWeight
+                + raster[..., row1, col0] * rowWeight * (1 - colWeight)
+                + raster[..., row1, col1] * rowWeight * colWeight
+            )
+        else:
+            raise NotImplementedError(f"Sampling method {method} not supported!")
+
+        ## Time steps are the leading axis of the raster, points come first in the result
+        return np.moveaxis(values, -1, 0)
+
+    def sample(
+        self,
+        lats,
+        longs,
+        startDate: str,
+        endDate: Optional[str] = None,
+        method: SamplingMethods = "nearest",
+    ) -> np.ndarray:
+        """Samples the coverage at the given points
+
+        Parameters:
+            lats (np.ndarray): Latitude of each point
+            longs (np.ndarray): Longitude of each point
+            startDate (str): Date information
+            endDate optional(str): End Date information, one value per time step is returned
+            method OneOf("nearest", "bilinear"): Interpolation between cells
+
+        Returns:
+            values (np.ndarray): shape (points,) for a single date, (points, time steps) otherwise,
+                NaN for the points of tiles that could not be fetched
+
+        Raises:
+            ValueError: If no tile could be fetched
+        """
+        lats = np.asarray(lats, dtype=float).ravel()
+        longs = np.asarray(longs, dtype=float).ravel()
+        if lats.shape != longs.shape:
+            raise ValueError(
+                "lats and longs have to contain the same number of points!"
+            )
+
+        self.errors = {}
+        if not len(lats):
+            return np.empty(0)
+
+        values = None
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            futures = {
+                executor.submit(
+                    self.fetchTile, lats[points], longs[points], startDate, endDate
+                ): points
+                for points in self.clusterPoints(lats, longs)
+            }
+
+            for future in as_completed(futures):
+                points = futures[future]
+                try:
+                    tile = future.result()
+                except Exception as error:
+                    ## A failed tile only fails its own points
+                    failure = failure or error
+                    self.errors.update(dict.fromkeys(points.tolist(), str(error)))
+                    continue
+
+                tileValues = self.lookup(*tile, lats[points], longs[points], method)
+                if values is None:
+                    values = np.full((len(lats),) + tileValues.shape[1:], np.nan)
+                values[points] = tileValues
+
+        ## Without a single fetched tile the shape of the result is unknown
+        if values is None:
+            raise failure
+        return values
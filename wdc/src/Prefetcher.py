@@ -0,0 +1,251 @@
+from .QueryBuilder import QueryBuilder
+from .helpers.types import NetworkRequestResult, ReturnTypes, SubsetType
+from .helpers.utils import monthIndex, shiftMonths
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional
+import time
+
+
+def subsetDelta(previous: SubsetType, current: SubsetType) -> Optional[dict]:
+    """
+    Step between two subsets: degrees along lat/long and months along time.
+
+    Returns:
+        delta (dict): step per subset argument, or None if the subsets are not comparable
+    """
+    if previous.keys() != current.keys():
+        return None
+
+    delta = {}
+    for key, value in current.items():
+        before = previous[key]
+        if key in {"startDate", "endDate"}:
+            if (value is None) != (before is None):
+                return None
+            delta[key] = monthIndex(value) - monthIndex(before) if value else 0
+        elif type(value) is tuple and type(before) is tuple:
+            delta[key] = tuple(round(a - b, 10) for a, b in zip(value, before))
+        elif isinstance(value, (int, float)) and isinstance(before, (int, float)):
+            delta[key] = round(value - before, 10)
+        elif value != before:
+            return None
+        else:
+            delta[key] = 0
+    return delta
+
+
+def isMovement(delta: Optional[dict]) -> bool:
+    """True if a step computed by subsetDelta moves the subset along any axis"""
+    if not delta:
+        return False
+    return any(any(step) if type(step) is tuple else step for step in delta.values())
+
+
+def shiftSubset(subset: SubsetType, delta: dict) -> SubsetType:
+    """
+    Apply a step computed by subsetDelta to a subset.
+
+    Returns:
+        subset (SubsetType): the shifted subset
+    """
+    shifted = {}
+    for key, value in subset.items():
+        step = delta.get(key, 0)
+        if key in {"startDate", "endDate"}:
+            shifted[key] = shiftMonths(value, step) if value and step else value
+        elif type(value) is tuple:
+            shifted[key] = tuple(round(a + b, 10) for a, b in zip(value, step))
+        elif isinstance(value, (int, float)) and step:
+            shifted[key] = round(value + step, 10)
+        else:
+            shifted[key] = value
+    return shifted
+
+
+class Prefetcher:
+    """
+    Predicts the next subsets of an interactive session and fetches them in the background.
+
+    The subsets of executed queries are watched; once two consecutive queries differ by a
+    constant step (e.g. one month later, or panned by a fixed number of degrees) the next
+    subsets along that step are fetched into a local cache. Prefetches are cancelled when
+    the observed step changes. Failed prefetches are never served, and cached results are
+    dropped after maxAge seconds.
+
+    Parameters:
+        datacube (Datacube): The datacube queries are executed upon
+        maxWorkers (int): Maximum number of concurrent prefetches
+        byteBudget (int): Maximum number of bytes kept in the prefetch cache
+        lookahead (int): Number of steps fetched ahead
+        maxAge (float): Seconds a prefetched result is served from the cache
+    """
+
+    def __init__(
+        self,
+        datacube,
+        maxWorkers: int = 2,
+        byteBudget: int = 64 * 1024 * 1024,
+        lookahead: int = 1,
+        maxAge: float = 60.0,
+    ):
+        self.datacube = datacube
+        self.byteBudget = byteBudget
+        self.lookahead = lookahead
+        self.maxAge = maxAge
+
+        self.hits = 0
+        self.misses = 0
+        self.cachedBytes = 0
+
+        self.__executor = ThreadPoolExecutor(max_workers=maxWorkers)
+        self.__maxPending = maxWorkers * lookahead
+        self.__lock = Lock()
+        self.__cache = OrderedDict()
+        self.__pending = {}
+        self.__lastSubset = None
+        self.__lastDelta = None
+
+    def __repr__(self):
+        return (
+            f"Prefetcher(hits={self.hits}, misses={self.misses}, "
+            f"cachedBytes={self.cachedBytes}, pending={len(self.__pending)})"
+        )
+
+    @property
+    def pending(self) -> tuple[str, ...]:
+        """Queries currently being prefetched"""
+        with self.__lock:
+            return tuple(self.__pending)
+
+    def fetch(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes] = None,
+    ) -> NetworkRequestResult:
+        """Answers a query from the prefetch cache or the server and schedules the predicted next queries
+
+        Returns:
+            response (NetworkRequestResult): the result of the query
+        """
+        query = queryObject.composeQueryFromOPS(encodingFormat)
+
+        with self.__lock:
+            entry = self.__cache.pop(query, None)
+            response = None
+            if entry is not None:
+                self.cachedBytes -= len(entry[0]["result"])
+                if time.monotonic() - entry[1] <= self.maxAge:
+                    response = entry[0]
+            future = self.__pending.pop(query, None) if response is None else None
+
+        if response is None and future is not None and not future.cancel():
+            response = self.__result(future)
+
+        with self.__lock:
+            if response is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if response is None:
+            response = self.datacube.send(queryObject, encodingFormat)
+
+        self.observe(queryObject, encodingFormat)
+        return response
+
+    def observe(
+        self, queryObject: QueryBuilder, encodingFormat: Optional[ReturnTypes] = None
+    ):
+        """Records the subset of an executed query and prefetches along a constant step"""
+        subset = next(
+            (op["args"] for op in queryObject.operations if op["OP"] == "SLICE"), None
+        )
+        if subset is None:
+            return
+
+        with self.__lock:
+            delta = (
+                subsetDelta(self.__lastSubset, subset)
+                if self.__lastSubset is not None
+                else None
+            )
+            patternChanged = delta != self.__lastDelta
+            self.__lastSubset, self.__lastDelta = subset, delta
+
+        if patternChanged:
+            self.cancel()
+        if not isMovement(delta):
+            return
+
+        predicted = subset
+        for _ in range(self.lookahead):
+            predicted = shiftSubset(predicted, delta)
+            nextQuery = queryObject.withSubset(**predicted)
+            nextQuery.debug = False
+            self.schedule(nextQuery, encodingFormat)
+
+    def schedule(
+        self, queryObject: QueryBuilder, encodingFormat: Optional[ReturnTypes] = None
+    ):
+        """Fetches a query in the background unless it is cached, pending or the budget is exhausted"""
+        query = queryObject.composeQueryFromOPS(encodingFormat)
+        with self.__lock:
+            if (
+                query in self.__cache
+                or query in self.__pending
+                or len(self.__pending) >= self.__maxPending
+                or self.cachedBytes >= self.byteBudget
+            ):
+                return
+            future = self.__executor.submit(
+                self.datacube.send, queryObject, encodingFormat
+            )
+            self.__pending[query] = future
+
+        future.add_done_callback(lambda done: self.__store(query, done))
+
+    @staticmethod
+    def __result(future) -> Optional[NetworkRequestResult]:
+        """Result of a completed prefetch, None if it failed and the query has to be sent live"""
+        try:
+            response = future.result()
+        except Exception:
+            return None
+        if not response.get("success", False) or not response.get("result", None):
+            return None
+        return response
+
+    def __store(self, query: str, future):
+        """Moves a completed prefetch into the cache if it is still wanted and fits the budget"""
+        if future.cancelled():
+            return
+        response = self.__result(future)
+
+        with self.__lock:
+            if self.__pending.get(query, None) is not future:
+                return
+            del self.__pending[query]
+
+            if response is None or len(response["result"]) > self.byteBudget:
+                return
+            size = len(response["result"])
+            while self.__cache and self.cachedBytes + size > self.byteBudget:
+                _, (evicted, _) = self.__cache.popitem(last=False)
+                self.cachedBytes -= len(evicted["result"])
+            self.__cache[query] = (response, time.monotonic())
+            self.cachedBytes += size
+
+    def cancel(self):
+        """Cancels pending prefetches, results of prefetches already running are discarded"""
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        for future in pending.values():
+            future.cancel()
+
+    def shutdown(self):
+        """Cancels pending prefetches and stops the background workers"""
+        self.cancel()
+        self.__executor.shutdown(wait=False, cancel_futures=True)
@@ -11,7 +11,8 @@ from .helpers.types import (
     LinestringType,
     ReturnTypes,
 )
-from .helpers.utils import getSubset
+from .helpers.utils import getSubset, getCoverageSubsets
+from .helpers.geometry import boundingBox, simplifyLine, simplifyPolygon
 
 from .helpers.constants import (
     BinaryOperations,
@@ -26,23 +27,117 @@ from .helpers.expressionComposers import (
     composeUnaryOperations,
 )
 
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Unpack, Optional, Union, Self
 
 
+def freezeArgs(value):
+    """Read-only copy of operation arguments, nested dicts become mappings and lists tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freezeArgs(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freezeArgs(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+class OperationNode:
+    """Operation of an immutable query, linked to the operation preceding it
+
+    Queries derived from the same base share the nodes of their common prefix. Like the
+    operation dicts of mutable queries, nodes are read with node["OP"] and node["args"].
+
+    Parameters:
+        OP (str): Name of the operation
+        args optional(Mapping): Read-only arguments of the operation, see freezeArgs
+        parent optional(OperationNode): The preceding operation
+    """
+
+    __slots__ = ("OP", "args", "parent")
+
+    def __init__(self, OP: str, args=None, parent=None):
+        object.__setattr__(self, "OP", OP)
+        object.__setattr__(self, "args", args)
+        object.__setattr__(self, "parent", parent)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Operation nodes are immutable!")
+
+    def __getitem__(self, key: str):
+        if key == "OP":
+            return self.OP
+        if key == "args" and self.args is not None:
+            return self.args
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        args = dict(self.args) if self.args is not None else None
+        return f"OperationNode({self.OP!r}, {args!r})"
+
+
 class QueryBuilder:
     """A class representing the query for a WCPS server
 
+    In immutable mode every operation returns a new query instead of modifying the current one.
+    Derived queries share the operations of their common prefix, so forking a base query into
+    many variants is cheap and queries can be shared between threads.
+
     Parameters:
         dco (DataCubeObject): The associated datacube which the query is going to be executed upon
         debug (bool): If true every query sent to the server will be printed out
+        immutable (bool): If true operations return new queries sharing the operations of the current one
     """
 
-    def __init__(self, coverageId: str, debug: bool = False):
+    __slots__ = ("coverageId", "debug", "immutable", "__operations", "__head")
+
+    __coverageVar = "$c"
+
+    def __init__(self, coverageId: str, debug: bool = False, immutable: bool = False):
         self.coverageId = coverageId
         self.debug = debug
+        self.immutable = immutable
 
-        self.__operations = []
-        self.__coverageVar = "$c"
+        self.__operations = None if immutable else []
+        self.__head = None
+
+    def __derive(self, head: Optional[OperationNode]):
+        """Immutable query with the given last operation"""
+        query = QueryBuilder(self.coverageId, self.debug, immutable=True)
+        query.__head = head
+        return query
+
+    def __push(self, op: str, args: Optional[dict] = None):
+        """Appends an operation, to a new query in immutable mode
+
+        Returns:
+            query (QueryBuilder): the query holding the operation
+        """
+        if self.immutable:
+            frozenArgs = freezeArgs(args) if args is not None else None
+            return self.__derive(OperationNode(op, frozenArgs, self.__head))
+
+        self.__operations.append(
+            {"OP": op, "args": args} if args is not None else {"OP": op}
+        )
+        return self
+
+    def __replaceLast(self, op: str, args: dict):
+        """Replaces the last operation, in a new query in immutable mode"""
+        if self.immutable:
+            return self.__derive(
+                OperationNode(op, freezeArgs(args), self.__head.parent)
+            )
+
+        self.__operations[-1] = {"OP": op, "args": args}
+        return self
 
     def __repr__(self):
         """String representation of the current query
@@ -52,7 +147,7 @@ class QueryBuilder:
         """
         composedOps = ""
 
-        for operation in self.__operations:
+        for operation in self.operations:
             op = operation["OP"]
 
             if op == "SLICE":
@@ -115,12 +210,134 @@ class QueryBuilder:
 
         return finalQuery
 
+    def composeGetCoverage(self, encodingFormat: Optional[ReturnTypes] = None):
+        """Composes the WCS GetCoverage request equivalent to a plain subset query
+
+        Only queries consisting of at most one subset operation can be expressed as GetCoverage
+        requests, which the server answers without parsing and planning a WCPS query.
+
+        Parameters:
+            encodingFormat (str): The desired encoding format of our query result
+
+        Returns:
+            params (dict | None): Key-value parameters of the request, None if the query has other
+                operations or no encoding format
+        """
+        operations = self.operations
+        if (
+            encodingFormat not in VALID_RETURN_TYPES
+            or len(operations) > 1
+            or any(operation["OP"] != "SLICE" for operation in operations)
+        ):
+            return None
+
+        params = {
+            "service": "WCS",
+            "version": "2.0.1",
+            "request": "GetCoverage",
+            "coverageId": self.coverageId,
+            "format": VALID_RETURN_TYPES[encodingFormat],
+        }
+        if operations:
+            params["subset"] = getCoverageSubsets(**operations[0]["args"])
+
+        ## Print composed request if debug mode is on
+        if self.debug:
+            print(params)
+
+        return params
+
+    @property
+    def operations(self):
+        """Read-only view of the operations composing the current query
+
+        Returns:
+            operations (tuple[dict | OperationNode]): operation entries in the order they were added
+        """
+        if not self.immutable:
+            return tuple(self.__operations)
+
+        operations = []
+        node = self.__head
+        while node is not None:
+            operations.append(node)
+            node = node.parent
+        return tuple(reversed(operations))
+
+    def copy(self):
+        """Creates an independent copy of the query sharing the same coverage and debug mode
+
+        Immutable queries share their operations with the copy, so copying takes constant time.
+
+        Returns:
+            query (QueryBuilder): a new query with the same operations
+        """
+        if self.immutable:
+            return self.__derive(self.__head)
+
+        query = QueryBuilder(coverageId=self.coverageId, debug=self.debug)
+        for operation in self.__operations:
+            query.__operations.append(operation)
+        return query
+
+    def withSubset(self, **kwargs: Unpack[SubsetType]):
+        """Creates a copy of the query with the arguments of its first subset operation replaced
+
+        Parameters:
+            **kwargs: subset arguments overriding the ones of the first subset operation
+
+        Returns:
+            query (QueryBuilder): a new query with the updated subset
+
+        Raises:
+            ValueError: If the query contains no subset operation
+        """
+        if self.immutable:
+            operations = self.operations
+            for index, operation in enumerate(operations):
+                if operation["OP"] == "SLICE":
+                    ## The operations before the subset stay shared, the ones after it are relinked
+                    query = self.__derive(operation.parent).__push(
+                        "SLICE", {**operation["args"], **kwargs}
+                    )
+                    for following in operations[index + 1 :]:
+                        query = query.__derive(
+                            OperationNode(following.OP, following.args, query.__head)
+                        )
+                    return query
+            raise ValueError("The query contains no subset operation!")
+
+        query = self.copy()
+        for index, operation in enumerate(query.__operations):
+            if operation["OP"] == "SLICE":
+                query.__operations[index] = {
+                    "OP": "SLICE",
+                    "args": {**operation["args"], **kwargs},
+                }
+                return query
+
+        raise ValueError("The query contains no subset operation!")
+
     def pop(self):
-        """Removes last operation from operation list"""
+        """Removes last operation from operation list
+
+        Returns:
+            query (QueryBuilder): in immutable mode a new query without the last operation
+        """
+        if self.immutable:
+            if self.__head is None:
+                raise IndexError("pop from empty query")
+            return self.__derive(self.__head.parent)
         self.__operations.pop()
 
     def reset(self):
-        """Resets operation stack to reuse instance for another query"""
+        """Resets operation stack to reuse instance for another query
+
+        Returns:
+            query (QueryBuilder): in immutable mode a new query without operations
+        """
+        if self.immutable:
+            return self.__derive(None)
         self.__operations = []
 
     # Operations
@@ -137,13 +354,7 @@ class QueryBuilder:
         Returns:
             self: current query for chaining more operations
         """
-        self.__operations.append(
-            {
-                "OP": "SLICE",
-                "args": kwargs,
-            }
-        )
-        return self
+        return self.__push("SLICE", kwargs)
 
     def arthimetic(
         self,
@@ -163,8 +374,7 @@ class QueryBuilder:
         if operation in {"ADD", "SUB", "PROD", "DIV", "MOD"} and value == None:
             raise ValueError(f"Value required for operation: {operation}")
 
-        self.__operations.append({"OP": operation, "args": {"value": value}})
-        return self
+        return self.__push(operation, {"value": value})
 
     def expFuncs(
         self,
@@ -184,8 +394,7 @@ class QueryBuilder:
         if operation == "POW" and value == None:
             raise ValueError(f"Value required for operation: {operation}")
 
-        self.__operations.append({"OP": operation, "args": {"value": value}})
-        return self
+        return self.__push(operation, {"value": value})
 
     def compareFuncs(
         self,
@@ -203,8 +412,7 @@ class QueryBuilder:
             self: current query for chaining more operations
         """
 
-        self.__operations.append({"OP": operation, "args": {"value": value}})
-        return self
+        return self.__push(operation, {"value": value})
 
     def trigFuncs(self, operation: TrigonometricOperationTypes):
         """Trignometric Operations
@@ -217,8 +425,7 @@ class QueryBuilder:
             self: current query for chaining more operations
         """
 
-        self.__operations.append({"OP": operation})
-        return self
+        return self.__push(operation)
 
     def aggregationFuncs(self, operation: AggregationOperationTypes):
         """Aggregation Operations
@@ -230,14 +437,16 @@ class QueryBuilder:
         Returns:
             self: current query for chaining more operations
         """
-        self.__operations.append({"OP": operation})
-        return self
+        return self.__push(operation)
 
     def clip(
         self,
         clipType: ClippingTypes,
         clippingValue: Union[PolygonType, MultipolygonType, LinestringType],
         crsValue: Optional[str] = None,
+        autoSubset: bool = True,
+        simplifyTolerance: Optional[float] = None,
+        precision: Optional[int] = None,
     ):
         """Clipping Operation
         ex: clip(c,
@@ -251,22 +460,72 @@ class QueryBuilder:
             clipType OneOf("Polygon", "Multipolygon", "LineString"):
             clippingValue OneOf[PolygonType, MultipolygonType, LinestringType]: An array of tuples, where each entry represents a coordinate
             crsValue: Optional Crs URL or string
+            autoSubset (bool): Restrict the clipped coverage to the bounding box of the geometry,
+                either by extending a preceding date-only subset or by trimming the result of the
+                preceding operations. Skipped if a crs is given or a subset already restricts lat/long.
+            simplifyTolerance optional(float): Simplify the geometry with Douglas-Peucker,
+                no removed vertex is farther than the tolerance (in degrees) from the simplified geometry
+            precision optional(int): Number of decimals the coordinates are rounded to in the query
 
         Returns:
             self: current query for chaining more operations
         """
+        if simplifyTolerance:
+            if clipType == "Polygon":
+                clippingValue = simplifyPolygon(clippingValue, simplifyTolerance)
+            elif clipType == "Multipolygon":
+                clippingValue = [
+                    simplifyPolygon(polygon, simplifyTolerance)
+                    for polygon in clippingValue
+                ]
+            elif clipType == "LineString":
+                clippingValue = simplifyLine(clippingValue, simplifyTolerance)
+
+        bbox = None
+        query = self
+        if autoSubset and not crsValue and len(clippingValue):
+            vertices = (
+                [vertice for polygon in clippingValue for vertice in polygon]
+                if clipType == "Multipolygon"
+                else clippingValue
+            )
+            latRange, longRange = boundingBox(vertices)
+            operations = self.operations
+            lastOperation = operations[-1] if operations else None
+            restricted = any(
+                operation["OP"] == "SLICE"
+                and (
+                    operation["args"].get("lat", None) is not None
+                    or operation["args"].get("long", None) is not None
+                )
+                for operation in operations
+            )
 
-        self.__operations.append(
+            if restricted:
+                pass
+            elif lastOperation is not None and lastOperation["OP"] == "SLICE":
+                query = self.__replaceLast(
+                    "SLICE",
+                    {
+                        **lastOperation["args"],
+                        "lat": latRange,
+                        "long": longRange,
+                    },
+                )
+            else:
+                ## The result of the preceding operations, e.g. arithmetic, is trimmed as a whole
+                bbox = (latRange, longRange)
+
+        return query.__push(
+            "CLIP",
             {
-                "OP": "CLIP",
-                "args": {
-                    "clipType": clipType,
-                    "clippingValue": clippingValue,
-                    "crs": crsValue,
-                },
-            }
+                "clipType": clipType,
+                "clippingValue": clippingValue,
+                "crs": crsValue,
+                "bbox": bbox,
+                "precision": precision,
+            },
         )
-        return self
 
     def conditionalReturn(self, conditions, returnType="RGB"):
         """Switch Case operation
@@ -285,13 +544,9 @@ class QueryBuilder:
         Returns:
             self: current query for chaining more operations
         """
-        self.__operations.append(
-            {
-                "OP": "SWITCH_CASE",
-                "args": {"returnType": returnType, "conditions": conditions},
-            }
+        return self.__push(
+            "SWITCH_CASE", {"returnType": returnType, "conditions": conditions}
         )
-        return self
 
     def scale(self, scalarValue: float | int):
         """Scaling Operation
@@ -303,5 +558,4 @@ class QueryBuilder:
         Returns:
             self: current query for chaining more operations
         """
-        self.__operations.append({"OP": "SCALE", "args": {"value": scalarValue}})
-        return self
+        return self.__push("SCALE", {"value": scalarValue})
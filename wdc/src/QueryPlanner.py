@@ -0,0 +1,131 @@
+from .QueryBuilder import QueryBuilder
+from .helpers.types import QueryPlan
+from .helpers.utils import decodeCsvArray, decodeText, estimateSubsetSize, parseScalar
+from .helpers.localEvaluation import (
+    canEvaluateLocally,
+    evaluateOperations,
+    hasScalarResult,
+)
+
+
+class QueryPlanner:
+    """
+    Plans the execution of several queries sharing the same subset.
+
+    Either the raw subset is fetched once and every query is finished locally,
+    or each query is pushed down to the server on its own.
+
+    Parameters:
+        datacube (Datacube): The datacube the queries are executed upon
+        cellsPerDegree (float): Spatial resolution of the coverage, used to estimate subset sizes
+        stepsPerMonth (float): Temporal resolution of the coverage, used to estimate subset sizes
+        cellsPerRoundTrip (int): Number of cells which can be transferred in the time of one round trip
+        maxLocalCells (int): Upper bound of cells fetched for local evaluation
+    """
+
+    def __init__(
+        self,
+        datacube,
+        cellsPerDegree: float = 1.0,
+        stepsPerMonth: float = 1.0,
+        cellsPerRoundTrip: int = 100_000,
+        maxLocalCells: int = 10_000_000,
+    ):
+        self.datacube = datacube
+        self.cellsPerDegree = cellsPerDegree
+        self.stepsPerMonth = stepsPerMonth
+        self.cellsPerRoundTrip = cellsPerRoundTrip
+        self.maxLocalCells = maxLocalCells
+
+    def plan(self, queries: list[QueryBuilder]) -> QueryPlan:
+        """Decides how a set of queries sharing a subset is executed
+
+        Parameters:
+            queries list[QueryBuilder]: Queries starting with the same slice operation
+
+        Returns:
+            plan (QueryPlan): The execution plan
+
+        Raises:
+            ValueError: If the queries do not share the same subset
+        """
+        subsets = []
+        for query in queries:
+            operations = query.operations
+            if not operations or operations[0]["OP"] != "SLICE":
+                raise ValueError("Every query has to start with a subset operation!")
+            subsets.append(operations[0]["args"])
+
+        if any(subset != subsets[0] for subset in subsets[1:]):
+            raise ValueError("The given queries do not share the same subset!")
+
+        localQueries = [
+            index
+            for index, query in enumerate(queries)
+            if canEvaluateLocally(query.operations[1:])
+        ]
+
+        estimatedCells = estimateSubsetSize(
+            cellsPerDegree=self.cellsPerDegree,
+            stepsPerMonth=self.stepsPerMonth,
+            **subsets[0],
+        )
+
+        ## One round trip for the subset itself plus the time needed to transfer it
+        localCost = 1 + estimatedCells / self.cellsPerRoundTrip
+        if estimatedCells <= self.maxLocalCells and localCost < len(localQueries):
+            mode = "LOCAL"
+        else:
+            mode = "PUSHDOWN"
+            localQueries = []
+
+        return {
+            "mode": mode,
+            "subset": subsets[0],
+            "estimatedCells": estimatedCells,
+            "localQueries": localQueries,
+            "pushdownQueries": [
+                index for index in range(len(queries)) if index not in localQueries
+            ],
+        }
+
+    def execute(self, queries: list[QueryBuilder], plan: QueryPlan = None):
+        """Executes a set of queries sharing a subset according to a plan
+
+        Parameters:
+            queries list[QueryBuilder]: Queries starting with the same slice operation
+            plan (QueryPlan): Optional plan, computed from the queries if omitted
+
+        Returns:
+            results (list): One result per query, a scalar for aggregations, a numpy array otherwise.
+                Failed requests are returned as the network request result.
+        """
+        plan = plan or self.plan(queries)
+        results = [None] * len(queries)
+
+        if plan["localQueries"]:
+            subsetQuery = self.datacube.getQueryBuilder(debug=queries[0].debug)
+            subsetQuery.subset(**plan["subset"])
+            array = self.datacube.fetchArray(subsetQuery)
+
+            for index in plan["localQueries"]:
+                if isinstance(array, dict):
+                    results[index] = array
+                else:
+                    results[index] = evaluateOperations(
+                        array, queries[index].operations[1:]
+                    )
+
+        for index in plan["pushdownQueries"]:
+            query = queries[index]
+            if hasScalarResult(query.operations):
+                response = self.datacube.send(query)
+                results[index] = (
+                    parseScalar(decodeText(response))
+                    if response.get("result", None)
+                    else response
+                )
+            else:
+                results[index] = self.datacube.fetchArray(query)
+
+        return results
@@ -0,0 +1,265 @@
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_UPSTREAM = "https://ows.rasdaman.org/rasdaman/ows"
+
+## String literals are kept as they are, everything else is normalized
+_LITERAL = re.compile(r'("[^"]*")')
+_PUNCTUATION = re.compile(r"\s*([()\[\]{},:=<>+\-*/])\s*")
+_DECIMAL = re.compile(r"(?<![\w.])(\d+\.\d+?)0+(?![\w.])")
+
+
+def normalizeQuery(query: str) -> str:
+    """Normalizes a WCPS query into the cache key of the proxy
+
+    Queries composed differently but equal for QueryBuilder share a key: whitespace is collapsed
+    and removed around operators and delimiters, redundant trailing zeros of decimals are dropped
+    (8.80 becomes 8.8, like QueryBuilder formats numbers). String literals such as dates and
+    formats are left untouched.
+
+    Parameters:
+        query (str): The WCPS query
+
+    Returns:
+        query (str): The normalized query
+    """
+    parts = _LITERAL.split(query.strip())
+    for index in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[index])
+        part = _PUNCTUATION.sub(r"\1", part)
+        parts[index] = _DECIMAL.sub(r"\1", part)
+    return "".join(parts)
+
+
+class QueryProxy:
+    """
+    Local caching proxy in front of a WCPS server, shared by many clients.
+
+    Accepts the interface of the server: POST or GET requests with a query parameter, and WCS
+    key-value requests such as GetCoverage. Successful responses are kept in a shared LRU cache
+    under the normalized query, and concurrent requests for the same query wait for a single
+    upstream request. Misses are forwarded over a pool of keep-alive connections. Clients point
+    the endpoint_url of their DatabaseConnection at the url of the proxy.
+
+    Failed or timed out upstream requests are answered with 502 or 504 and never cached. Cached
+    responses expire after ttl seconds, as the result of a query changes when the server ingests
+    new data; with ttl=None they are served until evicted.
+
+    Parameters:
+        upstream (str): URL of the WCPS server
+        host (str): Interface the proxy listens on
+        port (int): Port the proxy listens on, 0 picks a free port
+        maxBytes (int): Size of the cache
+        ttl optional(float): Seconds a cached response is served, forever if None
+        poolSize (int): Number of connections kept open to the server
+        timeout optional(float): Seconds to wait for the server, and for a pending request of
+            the same query, indefinitely if None
+    """
+
+    def __init__(
+        self,
+        upstream: str = DEFAULT_UPSTREAM,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        maxBytes: int = 256 * 2**20,
+        ttl: Optional[float] = 3600.0,
+        poolSize: int = 16,
+        timeout: Optional[float] = 60.0,
+    ):
+        self.upstream = upstream
+        self.maxBytes = maxBytes
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.cachedBytes = 0
+
+        self.__cache = OrderedDict()
+        self.__inFlight = {}
+        self.__lock = Lock()
+        self.__thread = None
+
+        self.server = ThreadingHTTPServer((host, port), _ProxyRequestHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+
+    def __repr__(self):
+        return (
+            f"QueryProxy({self.url} -> {self.upstream}, hits={self.hits}, "
+            f"misses={self.misses}, coalesced={self.coalesced})"
+        )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    @property
+    def url(self) -> str:
+        """URL clients send their queries to"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Serves requests in a background thread
+
+        Returns:
+            self: the running proxy
+        """
+        self.__thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def serveForever(self):
+        """Serves requests in the current thread until shutdown() is called"""
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stops serving and closes the connections to the server"""
+        if self.__thread is not None:
+            self.server.shutdown()
+            self.__thread.join()
+            self.__thread = None
+        self.server.server_close()
+        self.session.close()
+
+    def clear(self):
+        """Drops all cached responses"""
+        with self.__lock:
+            self.__cache.clear()
+            self.cachedBytes = 0
+
+    def fetch(self, query: Optional[str] = None, params: Optional[dict] = None):
+        """Answers a query or a key-value request from the cache, or forwards it to the server
+
+        Parameters:
+            query optional(str): WCPS query
+            params optional(dict): Parameters of a key-value request, if no query is given
+
+        Returns:
+            response tuple(tuple(int, str, bytes), str): status, content type and body of the
+                response, and whether it was a HIT, MISS or COALESCED with a pending request
+        """
+        if query is not None:
+            key = ("query", normalizeQuery(query))
+        else:
+            key = ("params", urlencode(sorted(params.items()), doseq=True))
+
+        with self.__lock:
+            entry = self.__cache.get(key, None)
+            if entry is not None and (
+                self.ttl is None or time.monotonic() - entry[1] < self.ttl
+            ):
+                self.__cache.move_to_end(key)
+                self.hits += 1
+                return entry[0], "HIT"
+
+            future = self.__inFlight.get(key, None)
+            leader = future is None
+            if leader:
+                future = self.__inFlight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=self.timeout), "COALESCED"
+            except FutureTimeoutError:
+                message = b"Timed out waiting for the pending request of the query"
+                return (504, "text/plain", message), "COALESCED"
+
+        response = (502, "text/plain", b"")
+        try:
+            response = self.__forward(query, params)
+        except Exception as error:
+            response = (502, "text/plain", f"{type(error).__name__}: {error}".encode())
+        finally:
+            with self.__lock:
+                del self.__inFlight[key]
+                if response[0] == 200:
+                    self.__store(key, response)
+            future.set_result(response)
+        return response, "MISS"
+
+    def __forward(self, query, params):
+        """Sends a request to the server over the connection pool"""
+        try:
+            if query is not None:
+                upstream = self.session.post(
+                    self.upstream, data={"query": query}, timeout=self.timeout
+                )
+            else:
+                upstream = self.session.get(
+                    self.upstream, params=params, timeout=self.timeout
+                )
+        except requests.exceptions.RequestException as error:
+            return 502, "text/plain", str(error).encode()
+
+        contentType = upstream.headers.get("Content-Type", "application/octet-stream")
+        return upstream.status_code, contentType, upstream.content
+
+    def __store(self, key, response):
+        """Caches a response, evicting the least recently used ones beyond maxBytes"""
+        size = len(response[2])
+        if size > self.maxBytes:
+            return
+        if key in self.__cache:
+            self.cachedBytes -= len(self.__cache.pop(key)[0][2])
+
+        self.__cache[key] = (response, time.monotonic())
+        self.cachedBytes += size
+        while self.cachedBytes > self.maxBytes:
+            _, (evicted, _) = self.__cache.popitem(last=False)
+            self.cachedBytes -= len(evicted[2])
+
+
+class _ProxyRequestHandler(BaseHTTPRequestHandler):
+    """Translates HTTP requests to the proxy into QueryProxy.fetch calls"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        self.__answer(params)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        params = parse_qs(self.rfile.read(length).decode())
+        self.__answer(params)
+
+    def __answer(self, params: dict):
+        if "query" in params:
+            response, source = self.server.proxy.fetch(query=params["query"][0])
+        elif params:
+            response, source = self.server.proxy.fetch(params=params)
+        else:
+            response, source = (400, "text/plain", b"A query is required"), "MISS"
+
+        status, contentType, body = response
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Cache", source)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
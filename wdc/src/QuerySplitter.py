@@ -0,0 +1,353 @@
+from .QueryBuilder import QueryBuilder
+from .helpers.types import NetworkRequestResult, ReturnTypes, SubsetType
+from .helpers.utils import (
+    decodeCsvArray,
+    decodeText,
+    estimateSubsetSize,
+    formatCsvArray,
+    monthIndex,
+    parseScalar,
+    shiftMonths,
+)
+from .helpers.localEvaluation import canEvaluateLocally, hasScalarResult
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Optional
+import contextvars
+import numpy as np
+import re
+
+# Aggregations whose result over a subset can be combined from the results over its halves
+MERGEABLE_AGGREGATIONS = {
+    "SUM": sum,
+    "COUNT": sum,
+    "MIN": min,
+    "MAX": max,
+    "SOME": any,
+    "ALL": all,
+}
+
+# Order of the result axes if the datacube has no grid
+DEFAULT_SERVER_AXIS_ORDER = ("time", "lat", "long")
+
+
+class QuerySplitter:
+    """
+    Recovers queries that are too large for the server by splitting their subset.
+
+    If a query times out, fails with one of the splitCodes or the server reports a result that is
+    too large, its subset is bisected along the axis with the most cells and both halves are sent
+    concurrently, recursively up to maxDepth times. Timeouts and server errors may be transient, so
+    such queries are retried once before they are split. Array results (CSV) are concatenated along
+    the split axis, aggregations (SUM, COUNT, MIN, MAX, SOME, ALL) are combined.
+
+    The largest size known to be safe is learned per coverage, later queries exceeding it are
+    split before they are sent. It is only lowered by explicit size errors (413, "too large"), or
+    by other failures once the halves of the query succeeded, and never below minCells. After
+    growAfter successful queries of at least half the limit, the limit is doubled again. With a
+    grid, subsets are split on cell boundaries along any axis; without one, only monthly time
+    ranges ("2014-01":"2014-12") can be split.
+
+    Parameters:
+        datacube (Datacube): The datacube the queries are executed upon
+        maxDepth (int): Maximum number of bisections of a query
+        workers (int): Maximum number of halves sent concurrently
+        cellsPerDegree (float): Spatial resolution of the coverage, used to estimate sizes without a grid
+        stepsPerMonth (float): Temporal resolution of the coverage, used to estimate sizes without a grid
+        splitCodes (tuple[int]): HTTP status codes a query is split on
+        minCells (int): Lower bound of the learned limit, smaller queries are never split up front
+        growAfter (int): Number of successful queries after which the learned limit is doubled
+    """
+
+    def __init__(
+        self,
+        datacube,
+        maxDepth: int = 6,
+        workers: int = 4,
+        cellsPerDegree: float = 1.0,
+        stepsPerMonth: float = 1.0,
+        splitCodes: tuple[int, ...] = (413, 500, 502, 503, 504),
+        minCells: int = 1024,
+        growAfter: int = 16,
+    ):
+        self.datacube = datacube
+        self.maxDepth = maxDepth
+        self.cellsPerDegree = cellsPerDegree
+        self.stepsPerMonth = stepsPerMonth
+        self.splitCodes = tuple(splitCodes)
+        self.minCells = minCells
+        self.growAfter = growAfter
+
+        self.maxSafeCells = {}
+        self.splits = 0
+        self.retries = 0
+        self.__successes = {}
+        self.__lock = Lock()
+        self.__slots = BoundedSemaphore(workers)
+
+    def __repr__(self):
+        return (
+            f"QuerySplitter(splits={self.splits}, retries={self.retries}, "
+            f"maxSafeCells={self.maxSafeCells})"
+        )
+
+    def isTooLarge(self, response: NetworkRequestResult) -> bool:
+        """True if a response explicitly reports a query too large for the server: 413 or a size error"""
+        if response.get("success", False):
+            return False
+        if response.get("httpCode", None) == 413:
+            return True
+        details = f"{response.get('httpError', '')} {response.get('errorDetails', '')}"
+        return re.search(r"too large|exceed", details, re.IGNORECASE) is not None
+
+    def shouldSplit(self, response: NetworkRequestResult) -> bool:
+        """True if a query may succeed in parts: it is too large, timed out or failed with a split code"""
+        if response.get("success", False):
+            return False
+        return (
+            self.isTooLarge(response)
+            or response.get("timedOut", False)
+            or response.get("httpCode", None) in self.splitCodes
+        )
+
+    def send(
+        self,
+        queryObject: QueryBuilder,
+        encodingFormat: Optional[ReturnTypes],
+        send: Callable[[QueryBuilder, Optional[ReturnTypes]], NetworkRequestResult],
+    ) -> NetworkRequestResult:
+        """Sends a query, splitting it if it is too large
+
+        Parameters:
+            queryObject (QueryBuilder): The query to send
+            encodingFormat (str): The desired encoding format of the result
+            send (Callable): Sends a single query and returns its network request result
+
+        Returns:
+            response (NetworkRequestResult): The result of the query, merged from the results of
+                its parts if it was split, or the failed result if it could not be recovered
+        """
+        merge = self.__merger(queryObject, encodingFormat)
+        if merge is None:
+            return send(queryObject, encodingFormat)
+        return self.__execute(queryObject, encodingFormat, send, merge, 0)
+
+    def cells(self, subset: SubsetType) -> int:
+        """Number of cells selected by a subset, counted on the grid or estimated without one"""
+        grid = self.datacube.grid
+        if grid is None:
+            return estimateSubsetSize(
+                cellsPerDegree=self.cellsPerDegree,
+                stepsPerMonth=self.stepsPerMonth,
+                **subset,
+            )
+        return int(
+            np.prod([stop - start for start, stop in self.__ranges(subset).values()])
+        )
+
+    def bisect(self, subset: SubsetType):
+        """Splits a subset into two halves along the axis with the most cells
+
+        Parameters:
+            subset (SubsetType): arguments of the subset operation
+
+        Returns:
+            split tuple(int, dict, dict): position of the split axis in the result and the subset
+                arguments of both halves, or None if the subset can not be split
+        """
+        grid = self.datacube.grid
+        order = grid.serverAxisOrder if grid is not None else DEFAULT_SERVER_AXIS_ORDER
+        ranges = self.__ranges(subset)
+        resultAxes = [axis for axis in order if axis in ranges]
+
+        if grid is None:
+            startDate, endDate = subset.get("startDate", ""), subset.get("endDate", "")
+            monthly = r"^\d{4}-\d{2}$"
+            if (
+                self.stepsPerMonth != 1
+                or not re.match(monthly, str(startDate))
+                or not re.match(monthly, str(endDate))
+            ):
+                return None
+            months = monthIndex(endDate) - monthIndex(startDate) + 1
+            if months < 2:
+                return None
+            half = months // 2
+            return (
+                resultAxes.index("time"),
+                {"startDate": startDate, "endDate": shiftMonths(startDate, half - 1)},
+                {"startDate": shiftMonths(startDate, half), "endDate": endDate},
+            )
+
+        axis, (start, stop) = max(
+            ranges.items(), key=lambda item: item[1][1] - item[1][0]
+        )
+        if stop - start < 2:
+            return None
+        middle = (start + stop) // 2
+        return (
+            resultAxes.index(axis),
+            self.__trim(axis, start, middle),
+            self.__trim(axis, middle, stop),
+        )
+
+    def __ranges(self, subset: SubsetType):
+        """Grid index ranges of the trimmed axes of a subset, sliced axes are left out"""
+        grid = self.datacube.grid
+        ranges = {}
+        for axis in ("lat", "long"):
+            value = subset.get(axis, None)
+            if value is None:
+                ranges[axis] = (0, len(grid.coords[axis]) if grid is not None else 0)
+            elif type(value) is tuple:
+                ranges[axis] = (
+                    grid.indexRange(axis, *value) if grid is not None else (0, 0)
+                )
+
+        if subset.get("endDate", None):
+            ranges["time"] = (
+                grid.indexRange("time", subset["startDate"], subset["endDate"])
+                if grid is not None
+                else (0, 0)
+            )
+        return ranges
+
+    def __trim(self, axis: str, start: int, stop: int) -> SubsetType:
+        """Subset arguments trimming an axis to a grid index range"""
+        grid = self.datacube.grid
+        if axis == "time":
+            return {"startDate": grid.dates[start], "endDate": grid.dates[stop - 1]}
+        coordinates = grid.coords[axis][start:stop]
+        return {axis: (float(coordinates.min()), float(coordinates.max()))}
+
+    def __merger(self, queryObject: QueryBuilder, encodingFormat):
+        """Function merging the results of two halves of a query, None if they can not be merged"""
+        operations = queryObject.operations
+        if not operations or operations[0]["OP"] != "SLICE":
+            return None
+
+        tail = operations[1:]
+        aggregation = (
+            tail[-1]["OP"]
+            if tail and tail[-1]["OP"] in MERGEABLE_AGGREGATIONS
+            else None
+        )
+        elementwise = tail[:-1] if aggregation else tail
+        if not canEvaluateLocally(elementwise) or hasScalarResult(elementwise):
+            return None
+
+        if aggregation is not None:
+            combine = MERGEABLE_AGGREGATIONS[aggregation]
+
+            def mergeScalars(position, *responses):
+                value = combine(
+                    parseScalar(decodeText(response).strip().strip("{}"))
+                    for response in responses
+                )
+                return str(value).lower() if isinstance(value, bool) else str(value)
+
+            return mergeScalars
+
+        if encodingFormat != "CSV":
+            return None
+
+        def mergeArrays(position, *responses):
+            return formatCsvArray(
+                np.concatenate(
+                    [decodeCsvArray(response) for response in responses], axis=position
+                )
+            )
+
+        return mergeArrays
+
+    def __execute(self, query, encodingFormat, send, merge, depth):
+        """Sends a query, or its halves if it is known or found to be too large"""
+        cells = self.cells(query.operations[0]["args"])
+        limit = self.maxSafeCells.get(query.coverageId, None)
+        if depth < self.maxDepth and limit is not None and cells > limit:
+            response = self.__split(query, encodingFormat, send, merge, depth)
+            if response is not None:
+                return response
+
+        response = self.__send(query, encodingFormat, send, cells)
+        if depth >= self.maxDepth or not self.shouldSplit(response):
+            return response
+
+        if self.isTooLarge(response):
+            self.__shrink(query.coverageId, cells)
+            return self.__split(query, encodingFormat, send, merge, depth) or response
+
+        ## Timeouts and server errors may be transient, they lower the limit only if splitting helps
+        with self.__lock:
+            self.retries += 1
+        response = self.__send(query, encodingFormat, send, cells)
+        if not self.shouldSplit(response):
+            return response
+        if self.isTooLarge(response):
+            self.__shrink(query.coverageId, cells)
+
+        merged = self.__split(query, encodingFormat, send, merge, depth)
+        if merged is not None and merged.get("success", False):
+            self.__shrink(query.coverageId, cells)
+        return merged or response
+
+    def __send(self, query, encodingFormat, send, cells):
+        """Sends a single query and adjusts the learned limit to its outcome"""
+        with self.__slots:
+            response = send(query, encodingFormat)
+
+        coverageId = query.coverageId
+        with self.__lock:
+            limit = self.maxSafeCells.get(coverageId, None)
+            if not response.get("success", False):
+                self.__successes[coverageId] = 0
+            elif limit is not None and 2 * cells >= limit:
+                successes = self.__successes.get(coverageId, 0) + 1
+                if successes >= self.growAfter:
+                    self.maxSafeCells[coverageId] = 2 * limit
+                    successes = 0
+                self.__successes[coverageId] = successes
+        return response
+
+    def __shrink(self, coverageId, cells):
+        """Lowers the learned limit below a query found to be too large"""
+        with self.__lock:
+            limit = min(self.maxSafeCells.get(coverageId, cells), cells - 1)
+            self.maxSafeCells[coverageId] = max(limit, self.minCells)
+            self.__successes[coverageId] = 0
+
+    def __split(self, query, encodingFormat, send, merge, depth):
+        """Sends both halves of a query concurrently and merges their results, None if it can not be split"""
+        split = self.bisect(query.operations[0]["args"])
+        if split is None:
+            return None
+        position, first, second = split
+        with self.__lock:
+            self.splits += 1
+
+        ## The first half runs in the context of the query, so it shares e.g. its memory reservation
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            firstHalf = executor.submit(
+                contextvars.copy_context().run,
+                self.__execute,
+                query.withSubset(**first),
+                encodingFormat,
+                send,
+                merge,
+                depth + 1,
+            )
+            secondHalf = self.__execute(
+                query.withSubset(**second), encodingFormat, send, merge, depth + 1
+            )
+            responses = (firstHalf.result(), secondHalf)
+
+        for response in responses:
+            if not response.get("success", False):
+                return response
+        return {
+            "success": True,
+            "result": merge(position, *responses).encode(),
+            "httpCode": 200,
+            "pieces": sum(response.get("pieces", 1) for response in responses),
+        }
@@ -0,0 +1,188 @@
+from .helpers.types import NetworkRequestResult
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import Optional
+import time
+
+
+class ScheduledConnection:
+    """
+    Connection-like view of a RequestScheduler with fixed scheduling options.
+
+    Can be passed to a Datacube in place of a DatabaseConnection, so all queries of the
+    datacube are scheduled with the same priority, tenant and timeout.
+
+    Parameters:
+        scheduler (RequestScheduler): The scheduler requests are submitted to
+        priority (int): Priority class, 0 is served first
+        tenant (str): Tenant the requests are accounted to
+        timeout optional(float): Seconds after submission a request is dropped if not yet sent
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        priority: int = 0,
+        tenant: str = "default",
+        timeout: Optional[float] = None,
+    ):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+        self.timeout = timeout
+
+    def send_request(self, query: str) -> NetworkRequestResult:
+        """Sends a query through the scheduler and waits for the result"""
+        return self.scheduler.submit(
+            query, self.priority, self.tenant, self.timeout
+        ).result()
+
+
+class RequestScheduler:
+    """
+    Schedules requests to a DatabaseConnection by priority, deadline and tenant.
+
+    Requests of a lower priority class are only sent when no request of a higher class is
+    waiting. Within a class, tenants (e.g. users or coverages) are served round-robin so a
+    tenant with a long backlog does not starve the others. Requests whose deadline passed
+    while waiting are dropped without being sent.
+
+    Parameters:
+        dbc (DatabaseConnection): The connection requests are sent with
+        workers (int): Number of requests sent concurrently
+    """
+
+    def __init__(self, dbc, workers: int = 4):
+        self.dbc = dbc
+        self.sent = 0
+        self.dropped = 0
+
+        ## priority -> tenant -> queue of (deadline, query, future), tenants in round-robin order
+        self.__queues: dict[int, OrderedDict] = {}
+        self.__condition = Condition()
+        self.__running = True
+        self.__workers = [
+            Thread(target=self.__work, daemon=True) for _ in range(workers)
+        ]
+        for worker in self.__workers:
+            worker.start()
+
+    def __repr__(self):
+        return f"RequestScheduler(waiting={self.waiting}, sent={self.sent}, dropped={self.dropped})"
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting to be sent"""
+        with self.__condition:
+            return sum(
+                len(queue)
+                for tenants in self.__queues.values()
+                for queue in tenants.values()
+            )
+
+    def submit(
+        self,
+        query: str,
+        priority: int = 0,
+        tenant: str = "default",
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Queues a query
+
+        Parameters:
+            query (str): The query to send
+            priority (int): Priority class, 0 is served first
+            tenant (str): Tenant the request is accounted to
+            timeout optional(float): Seconds after which the request is dropped if not yet sent
+
+        Returns:
+            future (Future): resolves to the NetworkRequestResult of the request
+        """
+        future = Future()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.__condition:
+            if not self.__running:
+                raise RuntimeError("The scheduler has been shut down!")
+            tenants = self.__queues.setdefault(priority, OrderedDict())
+            tenants.setdefault(tenant, deque()).append((deadline, query, future))
+            self.__condition.notify()
+        return future
+
+    def send_request(self, query: str) -> NetworkRequestResult:
+        """Sends a query with the default scheduling options and waits for the result"""
+        return self.submit(query).result()
+
+    def bind(
+        self,
+        priority: int = 0,
+        tenant: str = "default",
+        timeout: Optional[float] = None,
+    ) -> ScheduledConnection:
+        """Connection sending all its queries with the given scheduling options
+
+        Returns:
+            connection (ScheduledConnection): usable in place of a DatabaseConnection
+        """
+        return ScheduledConnection(self, priority, tenant, timeout)
+
+    def __next(self):
+        """Pops the next request to send, dropping expired requests on the way. Requires the lock."""
+        now = time.monotonic()
+        for priority in sorted(self.__queues):
+            tenants = self.__queues[priority]
+            while tenants:
+                tenant, queue = next(iter(tenants.items()))
+                deadline, query, future = queue.popleft()
+
+                ## Rotate the tenant to the back, forget it once its queue is drained
+                if queue:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+
+                if deadline is not None and deadline < now:
+                    self.dropped += 1
+                    future.set_result(
+                        {
+                            "success": False,
+                            "result": None,
+                            "httpCode": None,
+                            "httpError": "Deadline exceeded before the request was sent",
+                            "errorDetails": None,
+                        }
+                    )
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+                return query, future
+            del self.__queues[priority]
+        return None
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                request = self.__next()
+                while request is None:
+                    if not self.__running:
+                        return
+                    self.__condition.wait()
+                    request = self.__next()
+                self.sent += 1
+
+            query, future = request
+            try:
+                future.set_result(self.dbc.send_request(query))
+            except Exception as error:
+                future.set_exception(error)
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers once the waiting requests are sent"""
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        if wait:
+            for worker in self.__workers:
+                worker.join()
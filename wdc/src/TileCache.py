@@ -0,0 +1,278 @@
+from .CoverageGrid import CoverageGrid, LOCAL_AXIS_ORDER
+from .helpers.types import SubsetType
+from .helpers.utils import decodeCsvArray
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional
+import hashlib
+import os
+import re
+import numpy as np
+
+
+class TileCache:
+    """
+    Coverage-aware cache storing subset results as grid-aligned tiles.
+
+    Each tile holds a fixed block of lat/long cells of a single time step. Subsets fully
+    covered by cached tiles are assembled locally, otherwise only the missing tiles are fetched.
+    Tiles are kept in memory, or as memory-mapped .npy files if a directory is given. Tiles are
+    keyed by the layout of their grid and tile shape, so a directory shared by caches with other
+    tile shapes or grids never serves their tiles.
+
+    Parameters:
+        tileShape tuple(int, int): Number of cells per tile along the lat and long axes
+        directory optional(str): Directory the tiles are persisted to, tiles are kept in memory if omitted
+        maxTiles (int): Maximum number of tiles kept, least recently used tiles are evicted first
+        maxWorkers (int): Number of tiles fetched concurrently
+    """
+
+    def __init__(
+        self,
+        tileShape: tuple[int, int] = (64, 64),
+        directory: Optional[str] = None,
+        maxTiles: int = 1024,
+        maxWorkers: int = 4,
+    ):
+        self.tileShape = tuple(tileShape)
+        self.directory = directory
+        self.maxTiles = maxTiles
+        self.maxWorkers = maxWorkers
+
+        self.hits = 0
+        self.misses = 0
+        self.__tiles = OrderedDict()
+        self.__lock = Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.__tiles)
+
+    def __tilePath(self, key):
+        coverageId, layout, date, row, col = key
+        safeCoverage = re.sub(r"[^\w.-]", "_", coverageId)
+        safeDate = re.sub(r"[^\w.-]", "_", date)
+        return os.path.join(
+            self.directory, f"{safeCoverage}_{layout}_{safeDate}_{row}_{col}.npy"
+        )
+
+    def layout(self, grid: CoverageGrid) -> str:
+        """Identifies the tiling of a grid by the tile shape and the coordinates of the grid cells
+
+        Returns:
+            layout (str): part of the tile keys, equal for equal tilings
+        """
+        digest = hashlib.sha1(repr(self.tileShape).encode())
+        digest.update(np.asarray(grid.lats, dtype=float).tobytes())
+        digest.update(np.asarray(grid.longs, dtype=float).tobytes())
+        return digest.hexdigest()[:16]
+
+    def get(self, key) -> Optional[np.ndarray]:
+        """Returns a cached tile, or None if it is not cached
+
+        Parameters:
+            key tuple(str, str, str, int, int): coverage id, layout, date, tile row and tile column
+        """
+        with self.__lock:
+            if key in self.__tiles:
+                self.__tiles.move_to_end(key)
+                tile = self.__tiles[key]
+                return (
+                    tile
+                    if tile is not None
+                    else np.load(self.__tilePath(key), mmap_mode="r")
+                )
+
+        if self.directory and os.path.exists(self.__tilePath(key)):
+            tile = np.load(self.__tilePath(key), mmap_mode="r")
+            self.__remember(key, None)
+            return tile
+        return None
+
+    def put(self, key, tile: np.ndarray):
+        """Stores a tile, evicting the least recently used tiles beyond maxTiles
+
+        Parameters:
+            key tuple(str, str, str, int, int): coverage id, layout, date, tile row and tile column
+            tile (np.ndarray): values of the tile with shape (lat, long)
+        """
+        if self.directory:
+            np.save(self.__tilePath(key), tile)
+            tile = None
+        self.__remember(key, tile)
+
+    def __remember(self, key, tile: Optional[np.ndarray]):
+        """Marks a tile as most recently used, evicting the least recently used tiles beyond maxTiles"""
+        with self.__lock:
+            self.__tiles[key] = tile
+            self.__tiles.move_to_end(key)
+            while len(self.__tiles) > self.maxTiles:
+                evicted, _ = self.__tiles.popitem(last=False)
+                if self.directory and os.path.exists(self.__tilePath(evicted)):
+                    os.remove(self.__tilePath(evicted))
+
+    def clear(self):
+        """Drops all cached tiles"""
+        with self.__lock:
+            keys = list(self.__tiles)
+            self.__tiles.clear()
+        if self.directory:
+            for key in keys:
+                if os.path.exists(self.__tilePath(key)):
+                    os.remove(self.__tilePath(key))
+
+    def subsetRanges(self, grid: CoverageGrid, subset: SubsetType):
+        """Grid index ranges selected by a subset
+
+        Returns:
+            ranges tuple(list, tuple): index ranges along the lat, long and time axes and the sliced axes,
+                or None if the subset can not be resolved on the grid
+        """
+        ranges, slicedAxes = [], []
+        for axis in ("lat", "long"):
+            value = subset.get(axis, None)
+            if value is None:
+                ranges.append((0, len(grid.coords[axis])))
+            elif type(value) is tuple:
+                ranges.append(grid.indexRange(axis, *value))
+            else:
+                ranges.append(grid.indexRange(axis, value))
+                slicedAxes.append(axis)
+
+        startDate, endDate = subset.get("startDate", None), subset.get("endDate", None)
+        ranges.append(grid.indexRange("time", startDate, endDate))
+        if not endDate:
+            slicedAxes.append("time")
+
+        for axis, (start, stop) in zip(LOCAL_AXIS_ORDER, ranges):
+            if stop <= start or (axis in slicedAxes and stop - start != 1):
+                return None
+        return ranges, slicedAxes
+
+    def fetchTiles(self, datacube, grid: CoverageGrid, tileIndex, timeIndices):
+        """Fetches the given time steps of a spatial tile with a single request
+
+        Returns:
+            tiles dict[int, np.ndarray]: time index to tile values
+        """
+        row, col = tileIndex
+        latRange = (
+            row * self.tileShape[0],
+            min((row + 1) * self.tileShape[0], grid.shape[0]),
+        )
+        longRange = (
+            col * self.tileShape[1],
+            min((col + 1) * self.tileShape[1], grid.shape[1]),
+        )
+        timeRange = (min(timeIndices), max(timeIndices) + 1)
+
+        query = datacube.getQueryBuilder()
+        query.subset(**grid.subsetArgs(latRange, longRange, timeRange))
+        response = datacube.send(query, "CSV")
+        if not response.get("result", None):
+            raise ValueError(
+                f"Fetching tile {tileIndex} failed: {response.get('httpError', None)}"
+            )
+
+        block = grid.toLocalOrder(
+            decodeCsvArray(response), [latRange, longRange, timeRange]
+        )
+        return {
+            timeIndex: np.ascontiguousarray(block[:, :, timeIndex - timeRange[0]])
+            for timeIndex in range(*timeRange)
+        }
+
+    def read(
+        self, datacube, grid: CoverageGrid, subset: SubsetType
+    ) -> Optional[np.ndarray]:
+        """Assembles the result of a plain subset from cached tiles, fetching missing tiles
+
+        Parameters:
+            datacube (Datacube): The datacube missing tiles are fetched from
+            grid (CoverageGrid): Description of the coverage grid
+            subset (SubsetType): arguments of the subset operation
+
+        Returns:
+            values (np.ndarray): values shaped like the server result, or None if the subset
+                can not be resolved on the grid
+        """
+        resolved = self.subsetRanges(grid, subset)
+        if resolved is None:
+            return None
+        ranges, slicedAxes = resolved
+
+        tileRows = range(
+            ranges[0][0] // self.tileShape[0],
+            (ranges[0][1] - 1) // self.tileShape[0] + 1,
+        )
+        tileCols = range(
+            ranges[1][0] // self.tileShape[1],
+            (ranges[1][1] - 1) // self.tileShape[1] + 1,
+        )
+        timeIndices = range(*ranges[2])
+        layout = self.layout(grid)
+
+        tiles, missing = {}, {}
+        for row in tileRows:
+            for col in tileCols:
+                for timeIndex in timeIndices:
+                    key = (datacube.coverage, layout, grid.dates[timeIndex], row, col)
+                    tile = self.get(key)
+                    if tile is None:
+                        missing.setdefault((row, col), []).append(timeIndex)
+                    else:
+                        tiles[(timeIndex, row, col)] = tile
+
+        with self.__lock:
+            self.hits += len(tiles)
+            self.misses += sum(len(indices) for indices in missing.values())
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+                fetched = executor.map(
+                    lambda item: (item[0], self.fetchTiles(datacube, grid, *item)),
+                    missing.items(),
+                )
+                for (row, col), timeTiles in fetched:
+                    for timeIndex, tile in timeTiles.items():
+                        key = (
+                            datacube.coverage,
+                            layout,
+                            grid.dates[timeIndex],
+                            row,
+                            col,
+                        )
+                        self.put(key, tile)
+                        tiles[(timeIndex, row, col)] = tile
+
+        block = np.empty([stop - start for start, stop in ranges])
+        for (timeIndex, row, col), tile in tiles.items():
+            if timeIndex not in timeIndices:
+                continue
+            rowStart, colStart = row * self.tileShape[0], col * self.tileShape[1]
+            rows = slice(
+                max(rowStart, ranges[0][0]), min(rowStart + tile.shape[0], ranges[0][1])
+            )
+            cols = slice(
+                max(colStart, ranges[1][0]), min(colStart + tile.shape[1], ranges[1][1])
+            )
+            block[
+                rows.start - ranges[0][0] : rows.stop - ranges[0][0],
+                cols.start - ranges[1][0] : cols.stop - ranges[1][0],
+                timeIndex - ranges[2][0],
+            ] = tile[
+                rows.start - rowStart : rows.stop - rowStart,
+                cols.start - colStart : cols.stop - colStart,
+            ]
+
+        ## Mirror the server result: axes in server order, sliced axes removed
+        block = block.transpose(
+            [LOCAL_AXIS_ORDER.index(axis) for axis in grid.serverAxisOrder]
+        )
+        return block.squeeze(
+            axis=tuple(grid.serverAxisOrder.index(axis) for axis in slicedAxes)
+        )
@@ -0,0 +1,84 @@
+from typing import TYPE_CHECKING, Optional
+import os
+import numpy as np
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class TimeSeriesStore:
+    """
+    Persists the rows of a time series result in a CSV file with one row per time step.
+
+    The first column holds the timestamp of the row, the remaining columns the values
+    of the time step ("value" for a point series, "value_<i>" for flattened cells otherwise).
+
+    Parameters:
+        path (str): Location of the CSV file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __repr__(self):
+        return f"TimeSeriesStore({self.path})"
+
+    def load(self) -> Optional["DataFrame"]:
+        """Loads the stored rows
+
+        Returns:
+            rows (DataFrame): stored rows, or None if nothing was stored yet
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        from pandas import read_csv
+
+        return read_csv(self.path, dtype={"time": str})
+
+    @property
+    def lastTimestamp(self) -> Optional[str]:
+        """Timestamp of the newest stored row, or None if nothing was stored yet"""
+        rows = self.load()
+        if rows is None or rows.empty:
+            return None
+        return rows["time"].iloc[-1]
+
+    def append(self, timestamps: list[str], values: np.ndarray) -> "DataFrame":
+        """Appends rows and persists the merged series
+
+        The file is replaced atomically, an interrupted refresh leaves the previous series intact.
+
+        Parameters:
+            timestamps list[str]: timestamp of each new row
+            values (np.ndarray): values with the time steps along the first axis
+
+        Returns:
+            rows (DataFrame): the merged series
+        """
+        from pandas import DataFrame, concat
+
+        values = np.asarray(values, dtype=float).reshape(len(timestamps), -1)
+        columns = (
+            ["value"]
+            if values.shape[1] == 1
+            else [f"value_{index}" for index in range(values.shape[1])]
+        )
+
+        newRows = DataFrame(values, columns=columns)
+        newRows.insert(0, "time", list(timestamps))
+
+        rows = self.load()
+        if rows is not None:
+            if list(rows.columns) != list(newRows.columns):
+                raise ValueError(
+                    "New rows do not match the columns of the stored series!"
+                )
+            newRows = (
+                newRows if rows.empty else concat([rows, newRows], ignore_index=True)
+            )
+
+        temporaryPath = f"{self.path}.tmp"
+        newRows.to_csv(temporaryPath, index=False)
+        os.replace(temporaryPath, self.path)
+        return newRows
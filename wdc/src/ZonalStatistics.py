@@ -0,0 +1,207 @@
+from .helpers.types import PolygonType, ZonalStatisticTypes
+from .helpers.geometry import boundingBox, polygonMask, rasterCoordinates
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Optional, Hashable
+import numpy as np
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# Reductions applied to the masked cells of a zone
+ZonalReductions = {
+    "COUNT": lambda values: values.size,
+    "SUM": lambda values: np.sum(values) if values.size else np.nan,
+    "AVG": lambda values: np.mean(values) if values.size else np.nan,
+    "MIN": lambda values: np.min(values) if values.size else np.nan,
+    "MAX": lambda values: np.max(values) if values.size else np.nan,
+}
+
+
+class ZonalStatistics:
+    """
+    Computes statistics for many polygons (zones) with few requests.
+
+    Neighbouring zones are grouped by their centroid, the bounding box of each group
+    is fetched once and every zone is rasterized locally onto the fetched grid.
+
+    Parameters:
+        datacube (Datacube): The datacube the statistics are computed upon
+        groupDegrees (float): Size in degrees of the grid used to group neighbouring zones
+        maxWorkers (int): Number of group rasters fetched concurrently
+        latDescending (bool): True if the latitude axis of the coverage runs from north to south
+        nodata (float): Optional value marking cells that are excluded from the statistics
+    """
+
+    def __init__(
+        self,
+        datacube,
+        groupDegrees: float = 5.0,
+        maxWorkers: int = 4,
+        latDescending: bool = True,
+        nodata: Optional[float] = None,
+    ):
+        self.datacube = datacube
+        self.groupDegrees = groupDegrees
+        self.maxWorkers = maxWorkers
+        self.latDescending = latDescending
+        self.nodata = nodata
+
+    def groupZones(self, polygons: list[PolygonType]):
+        """Groups zones by the grid cell containing their centroid
+
+        Parameters:
+            polygons list[PolygonType]: (lat, long) vertices of each zone
+
+        Returns:
+            groups list[tuple[list[int], tuple]]: zone indices and the union bounding box of each group
+        """
+        groups = {}
+        for index, polygon in enumerate(polygons):
+            (latMin, latMax), (longMin, longMax) = boundingBox(polygon)
+            key = (
+                int(np.floor((latMin + latMax) / 2 / self.groupDegrees)),
+                int(np.floor((longMin + longMax) / 2 / self.groupDegrees)),
+            )
+            members, bounds = groups.get(key, ([], (latMin, latMax, longMin, longMax)))
+            members.append(index)
+            groups[key] = (
+                members,
+                (
+                    min(bounds[0], latMin),
+                    max(bounds[1], latMax),
+                    min(bounds[2], longMin),
+                    max(bounds[3], longMax),
+                ),
+            )
+
+        return [
+            (members, ((bounds[0], bounds[1]), (bounds[2], bounds[3])))
+            for members, bounds in groups.values()
+        ]
+
+    def fetchGroup(self, bounds, startDate: str, endDate: Optional[str] = None):
+        """Fetches the raster covering the bounding box of a group
+
+        Returns:
+            raster tuple: values with latitude and longitude as the last two axes, and the
+                latitude and longitude of its cells, taken from the grid of the datacube if it has one
+        """
+        grid = self.datacube.grid
+        if grid is not None:
+            bounds = (
+                grid.snapRange("lat", *bounds[0]),
+                grid.snapRange("long", *bounds[1]),
+            )
+
+        query = self.datacube.getQueryBuilder()
+        query.subset(
+            lat=bounds[0], long=bounds[1], startDate=startDate, endDate=endDate
+        )
+
+        raster = self.datacube.fetchArray(query)
+        if isinstance(raster, dict):
+            raise ValueError(
+                f"Fetching raster for {bounds} failed: {raster.get('httpError', None)}"
+            )
+        return rasterCoordinates(
+            raster,
+            bounds[0],
+            bounds[1],
+            startDate,
+            endDate,
+            self.datacube.grid,
+            self.latDescending,
+        )
+
+    def zoneValues(self, raster, polygon: PolygonType, lats, longs):
+        """Selects the valid cells of a raster lying inside a zone
+
+        Only the window spanned by the bounding box of the zone is rasterized.
+
+        Returns:
+            values (np.ndarray): flat array of the cell values inside the zone
+        """
+        (latMin, latMax), (longMin, longMax) = boundingBox(polygon)
+        rows = np.flatnonzero((lats >= latMin) & (lats <= latMax))
+        cols = np.flatnonzero((longs >= longMin) & (longs <= longMax))
+        if not rows.size or not cols.size:
+            return np.empty(0)
+
+        rows = slice(rows[0], rows[-1] + 1)
+        cols = slice(cols[0], cols[-1] + 1)
+        mask = polygonMask(polygon, lats[rows], longs[cols])
+
+        values = raster[..., rows, cols][..., mask]
+        return values[~np.isnan(values)]
+
+    def compute(
+        self,
+        polygons: list[PolygonType],
+        startDate: str,
+        endDate: Optional[str] = None,
+        stats: tuple[ZonalStatisticTypes, ...] = ("AVG", "MIN", "MAX", "COUNT"),
+        zoneIds: Optional[list[Hashable]] = None,
+    ) -> "DataFrame":
+        """Computes statistics for each zone
+
+        Parameters:
+            polygons list[PolygonType]: (lat, long) vertices of each zone
+            startDate (str): Date information
+            endDate optional(str): End Date information, cells of all time steps are included
+            stats tuple(OneOf("COUNT", "SUM", "AVG", "MIN", "MAX")): Statistics to compute
+            zoneIds optional(list): Identifier of each zone, defaults to the position of the polygon
+
+        Returns:
+            statistics (DataFrame): one row per zone, one column per statistic and an error column,
+                which holds the reason if the raster of the zone could not be fetched
+        """
+        for stat in stats:
+            if stat not in ZonalReductions:
+                raise ValueError(
+                    f"Invalid statistic. Valid statistics are: {list(ZonalReductions.keys())}"
+                )
+
+        zoneIds = list(range(len(polygons))) if zoneIds is None else list(zoneIds)
+        if len(zoneIds) != len(polygons):
+            raise ValueError(
+                "The number of zone ids has to match the number of polygons!"
+            )
+
+        rows = [None] * len(polygons)
+        groups = self.groupZones(polygons)
+
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            futures = {
+                executor.submit(self.fetchGroup, bounds, startDate, endDate): (
+                    members,
+                    bounds,
+                )
+                for members, bounds in groups
+            }
+
+            for future in as_completed(futures):
+                members, bounds = futures[future]
+                try:
+                    raster, lats, longs = future.result()
+                except Exception as error:
+                    ## A failed group only fails its own zones
+                    for index in members:
+                        rows[index] = [np.nan] * len(stats) + [str(error)]
+                    continue
+
+                if self.nodata is not None:
+                    raster[raster == self.nodata] = np.nan
+
+                for index in members:
+                    values = self.zoneValues(raster, polygons[index], lats, longs)
+                    rows[index] = [ZonalReductions[stat](values) for stat in stats]
+                    rows[index].append(None)
+
+        from pandas import DataFrame
+
+        return DataFrame(
+            rows,
+            index=zoneIds,
+            columns=[stat.lower() for stat in stats] + ["error"],
+        )
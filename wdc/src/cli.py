@@ -0,0 +1,150 @@
+"""
+Command-line interface of the datacube library, run with:
+
+    python -m wdc run specs.jsonl --workers 8 --output results.jsonl --checkpoint done.txt
+    python -m wdc proxy --port 8080 --cache-mb 256
+"""
+
+from .DatabaseConnection import DatabaseConnection
+from .BatchRunner import BatchRunner
+from .QueryProxy import QueryProxy
+
+from typing import Optional
+import argparse
+import sys
+
+DEFAULT_ENDPOINT = "https://ows.rasdaman.org/rasdaman/ows"
+
+
+def buildParser() -> argparse.ArgumentParser:
+    """Parser of the command-line arguments"""
+    parser = argparse.ArgumentParser(prog="wdc", description="Datacube query tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser(
+        "run", help="run query specs from a JSONL file concurrently"
+    )
+    run.add_argument(
+        "specs",
+        nargs="?",
+        default="-",
+        help="JSONL file with one query spec per line, - reads stdin (default)",
+    )
+    run.add_argument(
+        "--endpoint",
+        action="append",
+        help="WCPS endpoint URL, repeat to balance queries over replicas",
+    )
+    run.add_argument("--workers", type=int, default=4, help="concurrent queries")
+    run.add_argument(
+        "--output", default="-", help="JSONL file receiving the results, - for stdout"
+    )
+    run.add_argument(
+        "--output-dir", help="write each result into <id>.<extension> in this directory"
+    )
+    run.add_argument(
+        "--checkpoint", help="file recording completed ids, rerun to resume"
+    )
+    run.add_argument(
+        "--compression", action="store_true", help="request compressed responses"
+    )
+
+    proxy = commands.add_parser(
+        "proxy", help="serve a caching proxy shared by many clients"
+    )
+    proxy.add_argument("--upstream", default=DEFAULT_ENDPOINT, help="WCPS server URL")
+    proxy.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    proxy.add_argument("--port", type=int, default=8080, help="port to listen on")
+    proxy.add_argument(
+        "--cache-mb", type=float, default=256, help="size of the response cache"
+    )
+    proxy.add_argument(
+        "--ttl",
+        type=float,
+        default=3600,
+        help="seconds a cached response is served, 0 serves it until evicted; "
+        "results change when the server ingests new data (default: 3600)",
+    )
+    proxy.add_argument(
+        "--pool-size", type=int, default=16, help="connections kept open to the server"
+    )
+    proxy.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="seconds to wait for the server, 0 waits indefinitely (default: 60)",
+    )
+    return parser
+
+
+def proxyCommand(args) -> int:
+    """Serves the proxy until interrupted, returns the exit code"""
+    proxy = QueryProxy(
+        args.upstream,
+        host=args.host,
+        port=args.port,
+        maxBytes=int(args.cache_mb * 2**20),
+        ttl=args.ttl or None,
+        poolSize=args.pool_size,
+        timeout=args.timeout or None,
+    )
+    print(f"Proxying {args.upstream} at {proxy.url}", file=sys.stderr)
+    try:
+        proxy.serveForever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.shutdown()
+    print(
+        f"{proxy.hits} hits, {proxy.misses} misses, {proxy.coalesced} coalesced",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def runCommand(args) -> int:
+    """Runs the specs of the run command, returns the exit code"""
+    endpoints = args.endpoint or [DEFAULT_ENDPOINT]
+    dbc = DatabaseConnection(
+        endpoints[0] if len(endpoints) == 1 else endpoints,
+        compression=args.compression,
+    )
+
+    specs = sys.stdin if args.specs == "-" else open(args.specs)
+    output = sys.stdout if args.output == "-" else open(args.output, "a")
+    try:
+        runner = BatchRunner(
+            dbc,
+            workers=args.workers,
+            output=output,
+            outputDir=args.output_dir,
+            checkpoint=args.checkpoint,
+        )
+        report = runner.run(specs)
+    finally:
+        if specs is not sys.stdin:
+            specs.close()
+        if output is not sys.stdout:
+            output.close()
+
+    latency = (
+        f", latency p50 {report['latencyP50']:.2f}s p95 {report['latencyP95']:.2f}s"
+        if report["latencyP50"] is not None
+        else ""
+    )
+    print(
+        f"{report['succeeded']} succeeded, {report['failed']} failed, "
+        f"{report['skipped']} skipped in {report['elapsed']:.1f}s "
+        f"({report['queriesPerSecond']:.2f} queries/s, "
+        f"{report['bytesPerSecond'] / 1024:.1f} KiB/s{latency})",
+        file=sys.stderr,
+    )
+    return 1 if report["failed"] else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of the command-line interface, returns the exit code"""
+    args = buildParser().parse_args(argv)
+    if args.command == "proxy":
+        return proxyCommand(args)
+    return runCommand(args)
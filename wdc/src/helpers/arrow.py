@@ -0,0 +1,95 @@
+from .types import NetworkRequestResult
+from .utils import decodeCsvArray
+
+from typing import Callable, Optional
+import numpy as np
+
+
+def importPyarrow():
+    """
+    Import pyarrow, which is only required for Arrow and Parquet results.
+
+    Returns:
+        module: The pyarrow module.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "Arrow results require pyarrow, install it with: pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+def arrayToTable(values: np.ndarray, coordinates: Optional[dict] = None):
+    """
+    Convert an n-dimensional array into an Arrow table with one row per cell.
+
+    The value column is built from the array buffer without a copy if the array is contiguous.
+    Coordinate columns are expanded from the coordinates of each axis, string coordinates
+    (e.g. timestamps) are dictionary encoded.
+
+    Args:
+        values (np.ndarray): Cell values.
+        coordinates (Optional[dict]): Axis name to coordinates, one entry per array axis in axis order.
+
+    Returns:
+        pyarrow.Table: Coordinate columns followed by the "value" column.
+
+    Raises:
+        ValueError: If the coordinates do not match the shape of the array.
+    """
+    pa = importPyarrow()
+    values = np.asarray(values)
+    columns = {}
+
+    if coordinates:
+        if len(coordinates) != values.ndim:
+            raise ValueError("One coordinate array per axis of the values is required!")
+
+        for axis, (name, axisCoordinates) in enumerate(coordinates.items()):
+            axisCoordinates = np.asarray(axisCoordinates)
+            if len(axisCoordinates) != values.shape[axis]:
+                raise ValueError(f"Coordinates of {name} do not match the values!")
+
+            repeats = int(np.prod(values.shape[axis + 1 :]))
+            tiles = int(np.prod(values.shape[:axis]))
+            indices = np.tile(
+                np.repeat(np.arange(len(axisCoordinates), dtype=np.int32), repeats),
+                tiles,
+            )
+            if axisCoordinates.dtype.kind in "USO":
+                columns[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(indices), pa.array(axisCoordinates.tolist())
+                )
+            else:
+                columns[name] = pa.array(axisCoordinates[indices])
+
+    columns["value"] = pa.array(np.ascontiguousarray(values).reshape(-1))
+    return pa.table(columns)
+
+
+def decodeArrow(
+    requestRes: NetworkRequestResult,
+    coordinates: Optional[Callable[[tuple], dict]] = None,
+    **options,
+):
+    """
+    Decode a CSV or scalar result from a NetworkRequestResult into an Arrow table.
+
+    Args:
+        requestRes (NetworkRequestResult): Network request result containing CSV data.
+        coordinates (Optional[Callable]): Called with the shape of the result, returns the
+            coordinates of each axis, or an empty dict if they are unknown.
+
+    Returns:
+        pyarrow.Table: Coordinate columns followed by the "value" column.
+
+    Raises:
+        ValueError: If the provided request is not successful.
+    """
+    values = decodeCsvArray(requestRes)
+    return arrayToTable(values, coordinates(values.shape) if coordinates else None)
@@ -0,0 +1,95 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+## Errors raised by the decompressors on corrupt data
+DecompressionErrors = tuple(
+    error
+    for error in (
+        zlib.error,
+        getattr(brotli, "error", None),
+        getattr(zstandard, "ZstdError", None),
+    )
+    if error is not None
+)
+
+
+def acceptEncoding() -> str:
+    """
+    Value of the Accept-Encoding header offering every content coding that can be decoded.
+
+    Returns:
+        str: Content codings, zstd and brotli first if their modules are installed.
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    return ", ".join(encodings + ["gzip", "deflate"])
+
+
+class _Passthrough:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Brotli:
+    def __init__(self):
+        self.decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.decompressor.process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Zstandard:
+    def __init__(self):
+        self.decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def decompressor(contentEncoding: str):
+    """
+    Incremental decompressor for the Content-Encoding of a response.
+
+    Args:
+        contentEncoding (str): Value of the Content-Encoding header, empty if the response is not compressed.
+
+    Returns:
+        Object with decompress(bytes) -> bytes and flush() -> bytes methods.
+
+    Raises:
+        ValueError: If the content coding is not supported.
+    """
+    encoding = (contentEncoding or "identity").strip().lower()
+    if encoding == "identity":
+        return _Passthrough()
+    if encoding in {"gzip", "x-gzip"}:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj()
+    if encoding == "br" and brotli is not None:
+        return _Brotli()
+    if encoding == "zstd" and zstandard is not None:
+        return _Zstandard()
+    raise ValueError(f"Content encoding {contentEncoding} not supported!")
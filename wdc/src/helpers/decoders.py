@@ -0,0 +1,117 @@
+from .types import NetworkRequestResult
+from .utils import (
+    decodeCsv,
+    decodeCsvArray,
+    decodeImage,
+    decodeImageArray,
+    decodeText,
+)
+from .arrow import decodeArrow
+from importlib.metadata import entry_points
+from threading import Lock
+from typing import Any, Callable, Optional
+
+## Decoders are called with the network request result and the decoding options of execute_query
+Decoder = Callable[..., Any]
+
+ENTRY_POINT_GROUP = "wdc.decoders"
+
+_registry: dict[tuple[Optional[str], str], Decoder] = {}
+_entryPointsLoaded = False
+_lock = Lock()
+
+
+def registerDecoder(
+    encodingFormat: Optional[str], decoder: Decoder, resultType: str = "default"
+):
+    """
+    Register the decoder of an encoding format, replacing a previously registered one.
+
+    Third-party packages can register decoders without being imported by declaring an entry
+    point in the "wdc.decoders" group, named after the encoding format, or "FORMAT:resultType".
+
+    Args:
+        encodingFormat (Optional[str]): Encoding format of the results, None for unencoded results.
+        decoder (Decoder): Called with the network request result and the decoding options.
+        resultType (str): Result type the decoder produces.
+    """
+    with _lock:
+        _registry[(encodingFormat, resultType)] = decoder
+
+
+def _loadEntryPoints():
+    """Registers the decoders declared by installed packages, unless already registered"""
+    global _entryPointsLoaded
+    with _lock:
+        if _entryPointsLoaded:
+            return
+        _entryPointsLoaded = True
+        declared = list(entry_points(group=ENTRY_POINT_GROUP))
+
+    for entryPoint in declared:
+        encodingFormat, _, resultType = entryPoint.name.partition(":")
+        resultType = resultType or "default"
+        if (encodingFormat, resultType) not in _registry:
+            registerDecoder(encodingFormat, entryPoint.load(), resultType)
+
+
+def getDecoder(encodingFormat: Optional[str], resultType: str = "default") -> Decoder:
+    """
+    Look up the decoder of an encoding format.
+
+    Args:
+        encodingFormat (Optional[str]): Encoding format of the results, None for unencoded results.
+        resultType (str): Result type the decoder produces.
+
+    Returns:
+        Decoder: The registered decoder.
+
+    Raises:
+        NotImplementedError: If no decoder is registered for the format and result type.
+    """
+    decoder = _registry.get((encodingFormat, resultType), None)
+    if decoder is None:
+        _loadEntryPoints()
+        decoder = _registry.get((encodingFormat, resultType), None)
+    if decoder is None:
+        raise NotImplementedError(
+            f"No decoder registered for {encodingFormat} results of type {resultType}!"
+        )
+    return decoder
+
+
+def decode(
+    requestRes: NetworkRequestResult,
+    encodingFormat: Optional[str],
+    resultType: str = "default",
+    **options,
+):
+    """
+    Decode a network request result with the registered decoder.
+
+    Args:
+        requestRes (NetworkRequestResult): Network request result to decode.
+        encodingFormat (Optional[str]): Encoding format of the result, None for unencoded results.
+        resultType (str): Result type to decode into.
+        options: Decoding options passed on to the decoder, e.g. targetSize.
+
+    Returns:
+        The decoded result.
+    """
+    return getDecoder(encodingFormat, resultType)(requestRes, **options)
+
+
+## Built-in decoders, their heavy dependencies (pandas, PIL) are imported on first use
+registerDecoder("CSV", lambda response, **options: decodeCsv(response))
+registerDecoder("PNG", lambda response, **options: decodeImage(response))
+registerDecoder("JPEG", lambda response, **options: decodeImage(response))
+registerDecoder(None, lambda response, **options: decodeText(response))
+
+registerDecoder("CSV", lambda response, **options: decodeCsvArray(response), "array")
+registerDecoder(None, lambda response, **options: decodeCsvArray(response), "array")
+registerDecoder("PNG", decodeImageArray, "array")
+registerDecoder("JPEG", decodeImageArray, "array")
+
+## Arrow tables require the optional pyarrow package, imported on first use as well
+registerDecoder("CSV", decodeArrow, "arrow")
+registerDecoder(None, decodeArrow, "arrow")
@@ -1,5 +1,6 @@
 from .constants import ArthimeticToSignMap
 from .types import ClippingTypes, PolygonType, MultipolygonType, LinestringType
+from .geometry import formatVertices
 from typing import Union
 
 
@@ -25,28 +26,36 @@ def composeClipOperation(opObj: dict, composedOps: str, coverageVar: str):
         "clippingValue"
     ]
     formattedClippingValue = ""
+    precision = opObj["args"].get("precision", None)
 
-    formatPoly = lambda polygon: [f"{vertice[0]} {vertice[1]}" for vertice in polygon]
+    formatPoly = lambda polygon: formatVertices(polygon, precision)
 
     if clipType == "Polygon":
-        polygonDefinition = formatPoly(clippingValue)
-        polygonStr = ",".join(polygonDefinition)
-        formattedClippingValue = f"POLYGON(({polygonStr}))"
+        formattedClippingValue = f"POLYGON(({formatPoly(clippingValue)}))"
 
     elif clipType == "Multipolygon":
         formattedPolys = []
         for poly in clippingValue:
-            formattedPolys.append(f"""(({",".join(formatPoly(poly))}))""")
+            formattedPolys.append(f"""(({formatPoly(poly)}))""")
         formattedClippingValue = f"""Multipolygon({",".join(formattedPolys)})"""
     elif clipType == "LineString":
-        formattedClippingValue = (
-            f"""LineString({",".join(formatPoly(clippingValue))})"""
-        )
+        formattedClippingValue = f"""LineString({formatPoly(clippingValue)})"""
     else:
         raise NotImplementedError(f"Clipping type {clipType} not supported!")
 
     crs = opObj["args"]["crs"]
 
+    ## Restrict the clipped coverage to the bounding box of the geometry
+    bbox = opObj["args"].get("bbox", None)
+    if bbox:
+        (latMin, latMax), (longMin, longMax) = bbox
+        trimmed = (
+            f"({composedOps})"
+            if composedOps and composedOps != coverageVar
+            else coverageVar
+        )
+        composedOps = f"{trimmed}[Lat({latMin}:{latMax}),Long({longMin}:{longMax})]"
+
     return f"clip({composedOps or coverageVar}, {formattedClippingValue}{',' + crs if crs else ''})"
 
 
@@ -0,0 +1,228 @@
+from .types import PolygonType
+from typing import Optional
+
+import numpy as np
+
+
+def boundingBox(vertices: PolygonType):
+    """
+    Compute the bounding box of a list of (lat, long) vertices.
+
+    Args:
+        vertices (PolygonType): Vertices of a polygon or a line string.
+
+    Returns:
+        tuple: ((latMin, latMax), (longMin, longMax))
+    """
+    points = np.asarray(vertices, dtype=float)
+    return (
+        (float(points[:, 0].min()), float(points[:, 0].max())),
+        (float(points[:, 1].min()), float(points[:, 1].max())),
+    )
+
+
+def cellCentres(lower: float, upper: float, count: int, descending: bool = False):
+    """
+    Approximate the cell centres of an axis trimmed to [lower, upper],
+    assuming the trim spans the returned cells evenly.
+
+    Args:
+        lower (float): Lower bound of the trim.
+        upper (float): Upper bound of the trim.
+        count (int): Number of cells returned by the server along the axis.
+        descending (bool): True if the grid axis runs from upper to lower coordinates.
+
+    Returns:
+        np.ndarray: Coordinate of each cell along the axis, in grid order.
+    """
+    centres = lower + (np.arange(count) + 0.5) * (upper - lower) / count
+    return centres[::-1] if descending else centres
+
+
+def rasterCoordinates(
+    raster,
+    latRange: tuple[float, float],
+    longRange: tuple[float, float],
+    startDate: str,
+    endDate: Optional[str] = None,
+    grid=None,
+    latDescending: bool = True,
+):
+    """
+    Shape a raster fetched for a lat/long trim and find the coordinates of its cells.
+
+    With a CoverageGrid the raster is reordered from the axis order of the server and the
+    coordinates are those of the grid cells inside the trim. Without one they are approximated
+    with cellCentres, and axes of length one dropped from the response are restored.
+
+    Args:
+        raster (np.ndarray): Values returned by the server.
+        latRange (tuple): Lower and upper latitude of the trim.
+        longRange (tuple): Lower and upper longitude of the trim.
+        startDate (str): Date information of the trim.
+        endDate (str): End Date information of the trim, the raster keeps a time axis if given.
+        grid (CoverageGrid): Optional grid of the coverage.
+        latDescending (bool): True if the latitude axis runs from north to south, without a grid.
+
+    Returns:
+        tuple: raster with (time,) lat and long as its axes, latitude and longitude of its cells
+    """
+    raster = np.asarray(raster, dtype=float)
+    if grid is not None:
+        ranges = [
+            grid.indexRange("lat", *latRange),
+            grid.indexRange("long", *longRange),
+            grid.indexRange("time", startDate, endDate),
+        ]
+        if int(np.prod([stop - start for start, stop in ranges])) == raster.size:
+            local = np.moveaxis(grid.toLocalOrder(raster, ranges), -1, 0)
+            return (
+                local if endDate else local[0],
+                grid.lats[slice(*ranges[0])],
+                grid.longs[slice(*ranges[1])],
+            )
+
+    ndim = 3 if endDate else 2
+    if raster.ndim < ndim and longRange[0] == longRange[1]:
+        raster = raster[..., np.newaxis]
+    if raster.ndim < ndim and latRange[0] == latRange[1]:
+        raster = np.expand_dims(raster, -2)
+    while raster.ndim < ndim:
+        raster = raster[np.newaxis]
+
+    return (
+        raster,
+        cellCentres(*latRange, raster.shape[-2], latDescending),
+        cellCentres(*longRange, raster.shape[-1]),
+    )
+
+
+def polygonMask(polygon: PolygonType, lats: np.ndarray, longs: np.ndarray):
+    """
+    Rasterize a polygon onto a grid using the even-odd rule.
+
+    Each grid row is intersected with all polygon edges at once, the cells
+    between pairs of crossings are inside the polygon.
+
+    Args:
+        polygon (PolygonType): (lat, long) vertices of the polygon.
+        lats (np.ndarray): Latitude of each grid row.
+        longs (np.ndarray): Longitude of each grid column.
+
+    Returns:
+        np.ndarray: Boolean mask of shape (len(lats), len(longs)).
+    """
+    points = np.asarray(polygon, dtype=float)
+    y0, x0 = points[:, 0], points[:, 1]
+    y1, x1 = np.roll(y0, -1), np.roll(x0, -1)
+
+    mask = np.zeros((len(lats), len(longs)), dtype=bool)
+    for row, lat in enumerate(lats):
+        crossing = (y0 > lat) != (y1 > lat)
+        if not crossing.any():
+            continue
+        crossings = np.sort(
+            x0[crossing]
+            + (lat - y0[crossing])
+            * (x1[crossing] - x0[crossing])
+            / (y1[crossing] - y0[crossing])
+        )
+        mask[row] = np.searchsorted(crossings, longs) % 2 == 1
+
+    return mask
+
+
+def formatVertices(vertices: PolygonType, precision: Optional[int] = None) -> str:
+    """
+    Format (lat, long) vertices as a WKT coordinate list, e.g. "53.08 8.8,53.1 8.9".
+
+    Args:
+        vertices (PolygonType): Vertices of a polygon or a line string, a list or a numpy array.
+        precision (int): Optional number of decimals the coordinates are rounded to.
+
+    Returns:
+        str: Comma separated coordinate pairs.
+    """
+    if precision is not None:
+        vertices = np.round(np.asarray(vertices, dtype=float), precision)
+    if isinstance(vertices, np.ndarray):
+        vertices = vertices.tolist()
+    return ",".join(map("%r %r".__mod__, map(tuple, vertices)))
+
+
+def _segmentDistances(points: np.ndarray, start: np.ndarray, end: np.ndarray):
+    """Distance of each point to the segment between start and end"""
+    direction = end - start
+    length = direction @ direction
+    if length == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ direction / length, 0, 1)
+    return np.hypot(*(points - start - t[:, None] * direction).T)
+
+
+def simplifyLine(vertices: PolygonType, tolerance: float) -> PolygonType:
+    """
+    Simplify a line string with the Douglas-Peucker algorithm.
+
+    Every removed vertex lies within `tolerance` of the simplified line.
+
+    Args:
+        vertices (PolygonType): (lat, long) vertices of the line string.
+        tolerance (float): Maximum distance in degrees between the original and the simplified line.
+
+    Returns:
+        PolygonType: The retained vertices.
+    """
+    points = np.asarray(vertices, dtype=float)
+    if len(points) < 3:
+        return [tuple(point) for point in points.tolist()]
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _segmentDistances(
+            points[first + 1 : last], points[first], points[last]
+        )
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [tuple(point) for point in points[keep].tolist()]
+
+
+def simplifyPolygon(vertices: PolygonType, tolerance: float) -> PolygonType:
+    """
+    Simplify a polygon ring with the Douglas-Peucker algorithm.
+
+    The ring is split at its first vertex and the vertex farthest from it, both halves
+    are simplified as line strings. Rings collapsing below three vertices are returned unchanged.
+
+    Args:
+        vertices (PolygonType): (lat, long) vertices of the polygon.
+        tolerance (float): Maximum distance in degrees between the original and the simplified ring.
+
+    Returns:
+        PolygonType: The retained vertices, closed if the input ring was closed.
+    """
+    points = np.asarray(vertices, dtype=float)
+    closed = len(points) > 1 and bool(np.all(points[0] == points[-1]))
+    ring = points[:-1] if closed else points
+    if len(ring) < 4:
+        return list(vertices)
+
+    split = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    firstHalf = simplifyLine(ring[: split + 1], tolerance)
+    secondHalf = simplifyLine(np.vstack([ring[split:], ring[:1]]), tolerance)
+    simplified = firstHalf + secondHalf[1:-1]
+
+    if len(simplified) < 3:
+        return list(vertices)
+    return simplified + simplified[:1] if closed else simplified
@@ -0,0 +1,133 @@
+import numpy as np
+
+
+def roundHalfAwayFromZero(values):
+    """Rounds like WCPS ROUND, halves are rounded away from zero instead of to the even neighbour"""
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+
+# Numpy equivalents of binary WCPS operations
+LocalBinaryOperations = {
+    "ADD": np.add,
+    "SUB": np.subtract,
+    "PROD": np.multiply,
+    "DIV": np.true_divide,
+    "MOD": np.mod,
+    "POW": np.power,
+    "GTE": np.greater_equal,
+    "LTE": np.less_equal,
+    "GT": np.greater,
+    "LT": np.less,
+    "EQ": np.equal,
+    "NE": np.not_equal,
+}
+
+# Numpy equivalents of unary WCPS operations
+LocalUnaryOperations = {
+    "ROUND": roundHalfAwayFromZero,
+    "ABS": np.abs,
+    "LN": np.log,
+    "EXP": np.exp,
+    "LOG": np.log10,
+    "SQRT": np.sqrt,
+    "FLOOR": np.floor,
+    "CEIL": np.ceil,
+    "SIN": np.sin,
+    "COS": np.cos,
+    "TAN": np.tan,
+    "SINH": np.sinh,
+    "COSH": np.cosh,
+    "TANH": np.tanh,
+    "ARCSIN": np.arcsin,
+    "ARCCOS": np.arccos,
+    "ARCTAN": np.arctan,
+}
+
+# Numpy equivalents of WCPS aggregations, these reduce a coverage to a scalar
+LocalAggregations = {
+    "COUNT": np.count_nonzero,
+    "SUM": np.sum,
+    "AVG": np.mean,
+    "MIN": np.min,
+    "MAX": np.max,
+    "SOME": np.any,
+    "ALL": np.all,
+}
+
+
+def _localValue(value):
+    """Returns the operand as a number, or None if it can only be evaluated by the server"""
+    if isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def canEvaluateLocally(operations) -> bool:
+    """
+    Check whether a list of operations can be evaluated on a fetched array.
+
+    Args:
+        operations (list[dict]): Operations following the shared slice operation.
+
+    Returns:
+        bool: True if every operation has a local equivalent.
+    """
+    for operation in operations:
+        op = operation["OP"]
+        if op in LocalBinaryOperations:
+            if _localValue(operation["args"]["value"]) is None:
+                return False
+        elif op not in LocalUnaryOperations and op not in LocalAggregations:
+            return False
+    return True
+
+
+def hasScalarResult(operations) -> bool:
+    """
+    Check whether a list of operations reduces the coverage to a scalar.
+
+    Args:
+        operations (list[dict]): Operations of a query.
+
+    Returns:
+        bool: True if the operations contain an aggregation.
+    """
+    return any(operation["OP"] in LocalAggregations for operation in operations)
+
+
+def evaluateOperations(array: np.ndarray, operations):
+    """
+    Apply a list of operations to an array, mirroring the server side evaluation.
+
+    Args:
+        array (np.ndarray): Values of the fetched coverage subset.
+        operations (list[dict]): Operations following the shared slice operation.
+
+    Returns:
+        np.ndarray | int | float | bool: The evaluated array, or a scalar after an aggregation.
+
+    Raises:
+        NotImplementedError: If an operation has no local equivalent.
+    """
+    result = array
+    for operation in operations:
+        op = operation["OP"]
+        if op in LocalBinaryOperations:
+            result = LocalBinaryOperations[op](
+                result, _localValue(operation["args"]["value"])
+            )
+        elif op in LocalUnaryOperations:
+            result = LocalUnaryOperations[op](result)
+        elif op in LocalAggregations:
+            result = LocalAggregations[op](result)
+        else:
+            raise NotImplementedError(f"Operation: {op} can not be evaluated locally!")
+
+    if np.ndim(result) == 0:
+        return np.asarray(result).item()
+    return result
@@ -10,6 +10,12 @@ class NetworkRequestResult(TypedDict):
         result (any): The result of the network request.
         errorCode (Optional[ErrorCodeType]): Error code if the request was unsuccessful.
         errorDetails (Optional[any]): Details about the error if the request was unsuccessful.
+        compressedBytes (Optional[int]): Bytes received, if the response was streamed.
+        uncompressedBytes (Optional[int]): Bytes after decompression, if the response was streamed.
+        queryPath (Optional[str]): "wcs" if sent as GetCoverage request, "wcps" if sent as WCPS query.
+        elapsed (Optional[float]): Seconds the request took on its query path.
+        pieces (Optional[int]): Number of requests the result was merged from, if the query was split.
+        timedOut (Optional[bool]): True if the request failed because it exceeded the timeout.
     """
 
     success: bool
@@ -17,6 +23,12 @@ class NetworkRequestResult(TypedDict):
     httpCode: int
     httpError: NotRequired[str]
     errorDetails: NotRequired[Any]
+    compressedBytes: NotRequired[int]
+    uncompressedBytes: NotRequired[int]
+    queryPath: NotRequired[str]
+    elapsed: NotRequired[float]
+    pieces: NotRequired[int]
+    timedOut: NotRequired[bool]
 
 
 class SubsetType(TypedDict):
@@ -63,5 +75,40 @@ PolygonType = list[Tuple[float, float]]
 MultipolygonType = list[PolygonType]
 LinestringType = PolygonType
 
+# Define statistics supported by the zonal statistics
+ZonalStatisticTypes = Literal["COUNT", "SUM", "AVG", "MIN", "MAX"]
+
+# Define interpolation methods supported by the point sampling
+SamplingMethods = Literal["nearest", "bilinear"]
+
+# Define the axes of a coverage grid
+CoverageAxes = Literal["lat", "long", "time"]
+
 # Define supported return types
 ReturnTypes = Literal["CSV", "PNG", "JPEG"]
+
+# Define how execute_query decodes results
+ResultTypes = Literal["default", "array", "arrow"]
+
+# Define execution strategies of the query planner
+PlanModes = Literal["LOCAL", "PUSHDOWN"]
+
+
+class QueryPlan(TypedDict):
+    """
+    Type representing the execution plan for a set of queries sharing a subset.
+
+    Attributes:
+        mode (PlanModes): LOCAL fetches the subset once and evaluates the queries locally,
+            PUSHDOWN sends every query to the server.
+        subset (SubsetType): The shared slice operation arguments.
+        estimatedCells (int): Estimated number of cells selected by the subset.
+        localQueries (list[int]): Indices of the queries evaluated on the fetched subset.
+        pushdownQueries (list[int]): Indices of the queries sent to the server.
+    """
+
+    mode: PlanModes
+    subset: SubsetType
+    estimatedCells: int
+    localQueries: list[int]
+    pushdownQueries: list[int]
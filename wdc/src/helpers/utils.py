@@ -1,9 +1,18 @@
 from .types import NetworkRequestResult, SubsetType
-from typing import Unpack
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Unpack, Union
 
-from PIL import Image
+import re
+import numpy as np
 from io import BytesIO, StringIO
-from pandas import DataFrame, read_csv
+
+## pandas and PIL are only imported by the decoders using them, to keep the import of wdc light
+if TYPE_CHECKING:
+    from PIL import Image
+    from pandas import DataFrame
+
+## End date of a subset reaching up to the latest time step of the coverage
+OPEN_END = "*"
 
 
 def getSubset(**kwargs: Unpack[SubsetType]):
@@ -24,13 +33,13 @@ def getSubset(**kwargs: Unpack[SubsetType]):
     ]
 
     filters = []
-    if lat:
+    if lat is not None:
         if type(lat) is tuple:
             filters.append(f"Lat({lat[0]}:{lat[1]})")
         else:
             filters.append(f"Lat({lat})")
 
-    if long:
+    if long is not None:
         if type(long) is tuple:
             filters.append(f"Long({long[0]}:{long[1]})")
         else:
@@ -39,14 +48,49 @@ def getSubset(**kwargs: Unpack[SubsetType]):
     if startDate and not endDate:
         filters.append(f'ansi("{startDate}")')
     elif startDate and endDate:
-        filters.append(f'ansi("{startDate}":"{endDate}")')
+        end = endDate if endDate == OPEN_END else f'"{endDate}"'
+        filters.append(f'ansi("{startDate}":{end})')
     else:
         raise ValueError("Start Date has to be specified!")
 
     return f'[{",".join(filters)}]'
 
 
-def decodeImage(requestRes: NetworkRequestResult) -> Image.Image:
+def getCoverageSubsets(**kwargs: Unpack[SubsetType]) -> list[str]:
+    """
+    Format slice operations as the subset parameters of a WCS GetCoverage request.
+
+    Args:
+        **kwargs: Keyword arguments representing subset parameters, as for getSubset.
+
+    Returns:
+        list[str]: One subset parameter per axis, e.g. Lat(50,52) or ansi("2014-01").
+
+    Raises:
+        ValueError: If start date is not specified.
+    """
+    lat, long, startDate, endDate = [
+        kwargs.get(key, None) for key in ["lat", "long", "startDate", "endDate"]
+    ]
+    if not startDate:
+        raise ValueError("Start Date has to be specified!")
+
+    subsets = []
+    for axis, value in (("Lat", lat), ("Long", long)):
+        if value is not None:
+            bounds = value if type(value) is tuple else (value,)
+            subsets.append(f"{axis}({','.join(map(str, bounds))})")
+
+    dates = (startDate, endDate) if endDate else (startDate,)
+    subsets.append(
+        "ansi("
+        + ",".join(date if date == OPEN_END else f'"{date}"' for date in dates)
+        + ")"
+    )
+    return subsets
+
+
+def decodeImage(requestRes: NetworkRequestResult) -> "Image.Image":
     """
     Decode image from a NetworkRequestResult.
 
@@ -60,12 +104,75 @@ def decodeImage(requestRes: NetworkRequestResult) -> Image.Image:
         ValueError: If the provided request is not successful.
     """
     if requestRes.get("success", False):
+        from PIL import Image
+
         img = Image.open(BytesIO(requestRes.get("result", None)))
         return img
     else:
         raise ValueError("Provided request is not successful")
 
 
+def decodeImageArray(
+    requestRes: NetworkRequestResult, targetSize: Optional[tuple[int, int]] = None
+) -> np.ndarray:
+    """
+    Decode a PNG or JPEG result from a NetworkRequestResult into a numpy array.
+
+    Single band images are returned as (height, width) arrays, multi band images such as the
+    {red; green; blue} structs of conditionalReturn as (height, width, bands). The dtype follows
+    the image mode, e.g. uint8 for 8 bit and uint16 for 16 bit grayscale. JPEGs are decoded at a
+    reduced scale by the decoder itself if a smaller targetSize is requested.
+
+    Args:
+        requestRes (NetworkRequestResult): Network request result containing image data.
+        targetSize (Optional[tuple[int, int]]): Width and height the image is downscaled to.
+
+    Returns:
+        np.ndarray: Decoded pixel values.
+
+    Raises:
+        ValueError: If the provided request is not successful.
+    """
+    if not requestRes.get("success", False):
+        raise ValueError("Provided request is not successful")
+
+    from PIL import Image
+
+    img = Image.open(BytesIO(requestRes.get("result", None)))
+    if targetSize is not None:
+        targetSize = tuple(targetSize)
+        if img.format == "JPEG":
+            img.draft(img.mode, targetSize)
+        if img.size != targetSize:
+            img = img.resize(targetSize, Image.Resampling.BILINEAR)
+
+    if img.mode == "P":
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    return np.asarray(img)
+
+
+def decodeImageArrays(
+    results: list[NetworkRequestResult],
+    targetSize: Optional[tuple[int, int]] = None,
+    maxWorkers: int = 4,
+) -> list[np.ndarray]:
+    """
+    Decode a batch of PNG or JPEG results into numpy arrays in a thread pool.
+
+    Args:
+        results (list[NetworkRequestResult]): Network request results containing image data.
+        targetSize (Optional[tuple[int, int]]): Width and height the images are downscaled to.
+        maxWorkers (int): Number of images decoded concurrently.
+
+    Returns:
+        list[np.ndarray]: Decoded pixel values in the order of the results.
+    """
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        return list(
+            executor.map(lambda result: decodeImageArray(result, targetSize), results)
+        )
+
+
 def decodeText(requestRes: NetworkRequestResult) -> str:
     """
     Decode text from a NetworkRequestResult.
@@ -85,7 +192,7 @@ def decodeText(requestRes: NetworkRequestResult) -> str:
         raise ValueError("Provided request is not successful")
 
 
-def decodeCsv(requestRes: NetworkRequestResult) -> DataFrame:
+def decodeCsv(requestRes: NetworkRequestResult) -> "DataFrame":
     """
     Decode CSV data from a NetworkRequestResult.
 
@@ -99,6 +206,236 @@ def decodeCsv(requestRes: NetworkRequestResult) -> DataFrame:
         ValueError: If the provided request is not successful.
     """
     if requestRes["success"]:
+        from pandas import read_csv
+
         return read_csv(StringIO(decodeText(requestRes)), header=None).transpose()
     else:
         raise ValueError("Provided request is not successful")
+
+
+def parseScalar(text: str) -> Union[int, float, bool]:
+    """
+    Parse a scalar value as returned by the server (e.g. the result of an aggregation).
+
+    Args:
+        text (str): Textual scalar value.
+
+    Returns:
+        int | float | bool: Parsed value.
+
+    Raises:
+        ValueError: If the text does not represent a scalar.
+    """
+    text = text.strip()
+    if text.lower() in {"true", "t"}:
+        return True
+    if text.lower() in {"false", "f"}:
+        return False
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class CsvArrayDecoder:
+    """
+    Incremental parser for the CSV encoding of the server.
+
+    Chunks of the response are fed as they arrive, so the text is never held in full.
+    Nested dimensions are delimited by curly braces, e.g. "{1,2},{3,4}" for a 2x2 array.
+    Every pair of braces is an axis and the outermost axis has none, so leading axes of
+    length one are kept: "{1,2,3}" has shape (1, 3), "1,2,3" has shape (3,).
+    """
+
+    def __init__(self):
+        ## The whole result is treated as enclosed in a pair of braces at depth 1
+        self.__depth = 1
+        self.__groupsPerDepth = [0, 1]
+        self.__values = []
+        self.__carry = b""
+
+    def feed(self, chunk: bytes):
+        """
+        Parse the complete tokens of a chunk, keeping a trailing partial token for the next chunk.
+
+        Args:
+            chunk (bytes): Next part of the CSV encoded coverage.
+        """
+        data = self.__carry + chunk
+        end = max(
+            data.rfind(delimiter) for delimiter in (b"{", b"}", b",", b"\n", b" ")
+        )
+        self.__carry = data[end + 1 :]
+        if end >= 0:
+            self.__parse(data[: end + 1])
+
+    def __parse(self, data: bytes):
+        chars = np.frombuffer(data, dtype=np.uint8)
+        opens, closes = chars == ord("{"), chars == ord("}")
+        depth = self.__depth + np.cumsum(opens) - np.cumsum(closes) + closes
+        for level, count in enumerate(np.bincount(depth[opens])):
+            if level >= len(self.__groupsPerDepth):
+                self.__groupsPerDepth.append(0)
+            self.__groupsPerDepth[level] += int(count)
+        self.__depth += int(opens.sum()) - int(closes.sum())
+
+        tokens = [token for token in re.split(rb"[{},\s]+", data) if token]
+        try:
+            values = np.array(tokens, dtype=float)
+        except ValueError:
+            values = np.array(
+                [parseScalar(token.decode("ascii", "replace")) for token in tokens],
+                dtype=float,
+            )
+        self.__values.append(values)
+
+    def finish(self) -> np.ndarray:
+        """
+        Parse the remaining input and shape the values.
+
+        Returns:
+            np.ndarray: Parsed values, one array dimension per brace level.
+        """
+        if self.__carry:
+            self.__parse(self.__carry)
+            self.__carry = b""
+
+        values = np.concatenate(self.__values) if self.__values else np.empty(0)
+        groupsPerLevel = self.__groupsPerDepth[1:]
+
+        shape = [int(n // m) for m, n in zip(groupsPerLevel, groupsPerLevel[1:])]
+        shape.append(values.size // int(groupsPerLevel[-1]))
+
+        if int(np.prod(shape)) != values.size:
+            return values
+        return values.reshape(shape)
+
+
+def parseCsvArray(text: str) -> np.ndarray:
+    """
+    Parse the CSV encoding of the server into an n-dimensional array.
+
+    Nested dimensions are delimited by curly braces, e.g. "{1,2},{3,4}" for a 2x2 array.
+
+    Args:
+        text (str): CSV encoded coverage.
+
+    Returns:
+        np.ndarray: Parsed values, one array dimension per brace level.
+    """
+    decoder = CsvArrayDecoder()
+    decoder.feed(text.strip().encode("ascii", "replace"))
+    return decoder.finish()
+
+
+def formatCsvArray(values: np.ndarray) -> str:
+    """
+    Encode an array in the CSV encoding of the server, the inverse of parseCsvArray.
+
+    Args:
+        values (np.ndarray): Values to encode, integral values are written without a fraction.
+
+    Returns:
+        str: CSV encoded coverage, nesting dimensions in curly braces.
+    """
+    values = np.asarray(values)
+    if (
+        values.size
+        and np.all(np.isfinite(values))
+        and np.all(values == np.round(values))
+    ):
+        values = values.astype(np.int64)
+
+    def format(array):
+        if array.ndim <= 1:
+            return ",".join(map(str, np.atleast_1d(array).tolist()))
+        return ",".join("{" + format(subArray) + "}" for subArray in array)
+
+    return format(values)
+
+
+def decodeCsvArray(requestRes: NetworkRequestResult) -> np.ndarray:
+    """
+    Decode CSV data from a NetworkRequestResult into a numpy array.
+
+    Args:
+        requestRes (NetworkRequestResult): Network request result containing CSV data.
+
+    Returns:
+        np.ndarray: Decoded values, shaped after the dimensions of the coverage.
+
+    Raises:
+        ValueError: If the provided request is not successful.
+    """
+    if requestRes["success"]:
+        return parseCsvArray(decodeText(requestRes))
+    else:
+        raise ValueError("Provided request is not successful")
+
+
+def monthIndex(date: str) -> int:
+    """
+    Convert an ansi date string ("2014", "2014-07", "2014-07-15", ...) into a month counter.
+
+    Args:
+        date (str): Date string.
+
+    Returns:
+        int: Number of months since year zero.
+    """
+    parts = date.strip('"').split("-")
+    year = int(parts[0])
+    month = int(parts[1][:2]) if len(parts) > 1 else 1
+    return year * 12 + month - 1
+
+
+def shiftMonths(date: str, months: int) -> str:
+    """
+    Shift an ansi date string by a number of months, keeping its format.
+
+    Args:
+        date (str): Date string, e.g. "2014-07" or "2014-07-15".
+        months (int): Number of months to shift by, may be negative.
+
+    Returns:
+        str: The shifted date string.
+    """
+    index = monthIndex(date) + months
+    year, month = divmod(index, 12)
+    parts = date.split("-", 2)
+    if len(parts) == 1:
+        return f"{year:04d}"
+    rest = parts[1][2:] + ("-" + parts[2] if len(parts) > 2 else "")
+    return f"{year:04d}-{month + 1:02d}{rest}"
+
+
+def estimateSubsetSize(
+    cellsPerDegree: float = 1.0,
+    stepsPerMonth: float = 1.0,
+    **kwargs: Unpack[SubsetType],
+) -> int:
+    """
+    Estimate the number of cells selected by a slice operation.
+
+    Args:
+        cellsPerDegree (float): Spatial resolution of the coverage.
+        stepsPerMonth (float): Temporal resolution of the coverage.
+        **kwargs: Keyword arguments representing subset parameters.
+
+    Returns:
+        int: Estimated number of cells.
+    """
+    cells = 1
+    for key, extent in (("lat", 180), ("long", 360)):
+        value = kwargs.get(key, None)
+        if value is None:
+            cells *= int(extent * cellsPerDegree)
+        elif type(value) is tuple:
+            cells *= int(abs(value[1] - value[0]) * cellsPerDegree) + 1
+
+    startDate, endDate = kwargs.get("startDate", None), kwargs.get("endDate", None)
+    if startDate and endDate and endDate != OPEN_END:
+        months = abs(monthIndex(endDate) - monthIndex(startDate))
+        cells *= int(months * stepsPerMonth) + 1
+
+    return cells
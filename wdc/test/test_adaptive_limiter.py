@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+from requests.exceptions import HTTPError, Timeout
+
+from src.AdaptiveLimiter import AdaptiveLimiter
+from src.DatabaseConnection import DatabaseConnection
+
+
+def respond(httpCode=200):
+    return {"success": httpCode == 200, "result": b"1", "httpCode": httpCode}
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    """
+    Unit tests for the AdaptiveLimiter class.
+    """
+
+    def test_limitGrowsWhileLatencyIsFlat(self):
+        """
+        Test the additive increase of the limit.
+        """
+        limiter = AdaptiveLimiter(initialLimit=2, maxLimit=4, latencyTolerance=1e9)
+        for _ in range(20):
+            limiter.call(lambda query: respond(), "query")
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.inFlight, 0)
+
+    def test_limitIsCutOnOverload(self):
+        """
+        Test the multiplicative decrease on 429/503 responses and timeouts.
+        """
+        limiter = AdaptiveLimiter(initialLimit=8)
+        limiter.call(lambda query: respond(503), "query")
+        self.assertEqual(limiter.limit, 4)
+        limiter.call(lambda query: respond(429), "query")
+        self.assertEqual(limiter.limit, 2)
+        limiter.call(
+            lambda query: {
+                "success": False,
+                "httpCode": None,
+                "httpError": "Read timed out",
+                "timedOut": True,
+            },
+            "query",
+        )
+        self.assertEqual(limiter.limit, 1)
+        limiter.call(lambda query: respond(404), "query")
+        self.assertEqual(limiter.decreases, 3)
+
+    def test_singleCutPerCongestionEvent(self):
+        """
+        Test that requests in flight during a cut do not cut the limit again.
+        """
+        limiter = AdaptiveLimiter(initialLimit=8)
+        starts = [limiter.acquire() for _ in range(4)]
+        for start in starts:
+            limiter.release(start, overloaded=True)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_concurrencyIsBounded(self):
+        """
+        Test that no more requests than the limit are in flight and waiting is measured.
+        """
+        limiter = AdaptiveLimiter(initialLimit=2, maxLimit=2)
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def send(query):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return respond()
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda i: limiter.call(send, str(i)), range(6)))
+
+        self.assertEqual(peak[0], 2)
+        self.assertGreater(limiter.queueDelay, 0)
+
+    @patch("requests.post")
+    def test_databaseConnectionUsesLimiter(self, mock_post):
+        """
+        Test that requests of a DatabaseConnection pass through its limiter.
+        """
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        mock_response.raise_for_status.side_effect = HTTPError(
+            "503 Service Unavailable"
+        )
+        mock_post.return_value = mock_response
+
+        limiter = AdaptiveLimiter(initialLimit=4)
+        dbc = DatabaseConnection(limiter=limiter)
+        result = dbc.send_request("query")
+
+        self.assertFalse(result["success"])
+        self.assertEqual(limiter.limit, 2)
+        mock_post.assert_called_once_with(
+            dbc.endpoint_url, data={"query": "query"}, timeout=None
+        )
+
+    def test_singleSlowRequestIsNotCongestion(self):
+        """
+        Test that one large query among fast ones does not cut the limit, a slower series does.
+        """
+        limiter = AdaptiveLimiter(initialLimit=4, recentSamples=3)
+        for latency in [0.01] * 10 + [1.0] + [0.01] * 3:
+            limiter.release(time.monotonic() - latency)
+        self.assertEqual(limiter.decreases, 0)
+
+        for _ in range(3):
+            limiter.release(time.monotonic() - 1.0)
+        self.assertEqual(limiter.decreases, 1)
+
+    @patch("requests.post")
+    def test_timeoutIsOverload(self, mock_post):
+        """
+        Test that the configured request timeout is applied and reported as overload.
+        """
+        mock_post.side_effect = Timeout("Read timed out")
+        limiter = AdaptiveLimiter(initialLimit=4)
+        dbc = DatabaseConnection(limiter=limiter, timeout=2.5)
+        result = dbc.send_request("query")
+
+        self.assertTrue(result["timedOut"])
+        self.assertEqual(limiter.limit, 2)
+        self.assertEqual(mock_post.call_args.kwargs["timeout"], 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
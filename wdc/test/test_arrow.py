@@ -0,0 +1,138 @@
+import importlib.util
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.Datacube import Datacube
+from src.CoverageGrid import CoverageGrid
+from src.ParquetDatasetWriter import ParquetDatasetWriter
+from src.helpers.utils import formatCsvArray
+
+
+def serveSubset(grid, data, query):
+    """Answer a subset query of the mocked server from the full coverage"""
+    lat = re.search(r"Lat\(([-\d.]+):([-\d.]+)\)", query).groups()
+    long = re.search(r"Long\(([-\d.]+):([-\d.]+)\)", query).groups()
+    dates = re.search(r'ansi\("([^"]+)":"([^"]+)"\)', query).groups()
+
+    rows = slice(*grid.indexRange("lat", float(lat[0]), float(lat[1])))
+    cols = slice(*grid.indexRange("long", float(long[0]), float(long[1])))
+    steps = slice(*grid.indexRange("time", *dates))
+
+    subset = data[rows, cols, steps].transpose(2, 0, 1)
+    return {"success": True, "result": formatCsvArray(subset).encode(), "httpCode": 200}
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestArrow(unittest.TestCase):
+    """
+    Unit tests for Arrow results and Parquet export.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection serving a 6x8x4 coverage.
+        """
+        dates = ["2014-01", "2014-02", "2014-03", "2014-04"]
+        self.grid = CoverageGrid.regular((0, 6), (0, 8), 1, dates)
+        self.data = np.arange(6 * 8 * 4, dtype=float).reshape(6, 8, 4)
+
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = lambda query: serveSubset(
+            self.grid, self.data, query
+        )
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp", grid=self.grid)
+
+    def test_arrowResultWithGrid(self):
+        """
+        Test that coordinate columns are taken from the grid.
+        """
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(1, 3), long=(0, 2), startDate="2014-02", endDate="2014-03"
+        )
+        table = self.dataCube.execute_query(query, "CSV", resultType="arrow")
+
+        self.assertEqual(table.column_names, ["time", "lat", "long", "value"])
+        self.assertEqual(table.num_rows, 2 * 2 * 2)
+        row = table.slice(5, 1).to_pylist()[0]
+        self.assertEqual(row["time"], "2014-03")
+        self.assertEqual((row["lat"], row["long"]), (2.5, 1.5))
+        self.assertEqual(row["value"], self.data[3, 1, 2])
+
+    def test_arrowResultSingleTimeStep(self):
+        """
+        Test that a time range of one step keeps its time column.
+        """
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(1, 3), long=(0, 2), startDate="2014-02", endDate="2014-02"
+        )
+        table = self.dataCube.execute_query(query, "CSV", resultType="arrow")
+
+        self.assertEqual(table.column_names, ["time", "lat", "long", "value"])
+        self.assertEqual(table.num_rows, 2 * 2)
+
+    def test_arrowResultWithoutGrid(self):
+        """
+        Test that coordinates are derived from the subset without a grid.
+        """
+        self.db_connection.send_request.side_effect = None
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": formatCsvArray(np.arange(12).reshape(3, 2, 2)).encode(),
+        }
+        datacube = Datacube(self.db_connection, "AvgLandTemp")
+        query = datacube.getQueryBuilder().subset(
+            lat=(50, 52), long=(8, 10), startDate="2014-01", endDate="2014-03"
+        )
+        table = datacube.execute_query(query, "CSV", resultType="arrow")
+
+        self.assertEqual(
+            table.column("time").to_pylist()[::4], ["2014-01", "2014-02", "2014-03"]
+        )
+        self.assertEqual(table.column("lat").to_pylist()[:4], [51.5, 51.5, 50.5, 50.5])
+        self.assertEqual(table.column("value").to_pylist(), list(range(12)))
+
+    def test_exportParquet(self):
+        """
+        Test streaming the results of several queries into a partitioned dataset.
+        """
+        queries = [
+            self.dataCube.getQueryBuilder().subset(
+                lat=(0, 6), long=(0, 8), startDate=start, endDate=end
+            )
+            for start, end in [("2014-01", "2014-02"), ("2014-03", "2014-04")]
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            rows = self.dataCube.exportParquet(
+                queries, directory, partitionCols=["time"], maxWorkers=2
+            )
+            self.assertEqual(rows, [96, 96])
+            self.assertEqual(len(os.listdir(directory)), 4)
+
+            table = ParquetDatasetWriter(directory, ["time"]).read()
+            self.assertEqual(table.num_rows, 192)
+            self.assertAlmostEqual(
+                sum(table.column("value").to_pylist()), self.data.sum()
+            )
+
+    def test_writersAppend(self):
+        """
+        Test that writers sharing a directory do not replace each other's files.
+        """
+        import pyarrow as pa
+
+        table = pa.table({"time": ["2014-01", "2014-01"], "value": [1.0, 2.0]})
+        with tempfile.TemporaryDirectory() as directory:
+            ParquetDatasetWriter(directory, ["time"]).write(table)
+            ParquetDatasetWriter(directory, ["time"]).write(table)
+
+            dataset = ParquetDatasetWriter(directory, ["time"]).read()
+            self.assertEqual(dataset.num_rows, 4)
+            self.assertEqual(sorted(dataset.column("value").to_pylist()), [1, 1, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from src.BatchRunner import BatchRunner, buildQuery
+from src.cli import main
+
+
+class TestBatchRunner(unittest.TestCase):
+    """
+    Unit tests for the BatchRunner class and the run command.
+    """
+
+    def setUp(self):
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = lambda query: (
+            {"success": False, "httpCode": 500, "httpError": "Internal Server Error"}
+            if "Lat(1)" in query
+            else {"success": True, "result": b"42"}
+        )
+        self.specs = [
+            json.dumps(
+                {
+                    "id": f"q{lat}",
+                    "coverage": "AvgLandTemp",
+                    "subset": {"lat": lat, "long": 8, "startDate": "2014-01"},
+                    "operations": [{"op": "aggregationFuncs", "args": ["AVG"]}],
+                    "encoding": "CSV",
+                }
+            )
+            for lat in range(1, 6)
+        ]
+
+    def test_buildQuery(self):
+        """
+        Test that specs are translated into the same query as the QueryBuilder calls.
+        """
+        query = buildQuery(
+            {
+                "coverage": "AvgLandTemp",
+                "subset": {"lat": [50, 52], "startDate": "2014-01"},
+                "operations": [
+                    {"op": "compareFuncs", "args": ["GT", 20]},
+                    {"op": "aggregationFuncs", "args": ["COUNT"]},
+                ],
+            }
+        )
+        self.assertIn("Lat(50:52)", query.composeQueryFromOPS())
+        self.assertIn("count", query.composeQueryFromOPS())
+
+        with self.assertRaises(ValueError):
+            buildQuery({"coverage": "AvgLandTemp", "operations": [{"op": "reset"}]})
+
+    def test_runAndResume(self):
+        """
+        Test that results and errors are written per query and a rerun only retries failures.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "done.txt")
+            output = io.StringIO()
+            report = BatchRunner(
+                self.db_connection, workers=2, output=output, checkpoint=checkpoint
+            ).run(self.specs + ["not json"])
+
+            records = {
+                record["id"]: record
+                for record in map(json.loads, output.getvalue().splitlines())
+            }
+            self.assertEqual(len(records), 6)
+            self.assertEqual(records["q3"]["result"], "42")
+            self.assertEqual(records["q1"]["httpCode"], 500)
+            self.assertFalse(records["5"]["success"])
+            self.assertEqual((report["succeeded"], report["failed"]), (4, 2))
+            self.assertGreater(report["bytesPerSecond"], 0)
+
+            self.db_connection.send_request.reset_mock()
+            report = BatchRunner(
+                self.db_connection, output=io.StringIO(), checkpoint=checkpoint
+            ).run(self.specs)
+            self.assertEqual(self.db_connection.send_request.call_count, 1)
+            self.assertEqual((report["skipped"], report["failed"]), (4, 1))
+
+    def test_failuresDoNotStopRun(self):
+        """
+        Test that raising requests and ids unusable as file names become failed records.
+        """
+        self.db_connection.send_request.side_effect = lambda query: (
+            {"success": True, "result": b"42"}
+            if "Lat(2)" in query
+            else (_ for _ in ()).throw(RuntimeError("connection lost"))
+        )
+        specs = [json.loads(spec) for spec in self.specs[:3]]
+        specs[0]["id"], specs[2]["id"] = "../escape", "a/b"
+
+        with tempfile.TemporaryDirectory() as directory:
+            outputDir = os.path.join(directory, "results")
+            output = io.StringIO()
+            report = BatchRunner(
+                self.db_connection, output=output, outputDir=outputDir
+            ).run(map(json.dumps, specs))
+
+            records = {
+                record["id"]: record
+                for record in map(json.loads, output.getvalue().splitlines())
+            }
+            self.assertEqual((report["succeeded"], report["failed"]), (1, 2))
+            self.assertIn("file name", records["../escape"]["error"])
+            self.assertIn("file name", records["a/b"]["error"])
+            self.assertEqual(os.listdir(directory), ["results"])
+            self.assertEqual(os.listdir(outputDir), ["q2.csv"])
+
+        output = io.StringIO()
+        report = BatchRunner(self.db_connection, output=output).run(
+            map(json.dumps, specs)
+        )
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual((report["succeeded"], report["failed"]), (1, 2))
+        self.assertTrue(
+            all("connection lost" in r["error"] for r in records if not r["success"])
+        )
+
+    def test_runCommand(self):
+        """
+        Test the run command writing results into per-query files.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            specs = os.path.join(directory, "specs.jsonl")
+            with open(specs, "w") as file:
+                file.write("\n".join(self.specs[1:]))
+
+            with patch(
+                "src.cli.DatabaseConnection", return_value=self.db_connection
+            ), patch("sys.stdout", io.StringIO()) as stdout, patch(
+                "sys.stderr", io.StringIO()
+            ) as stderr:
+                code = main(["run", specs, "--workers", "3", "--output-dir", directory])
+
+            self.assertEqual(code, 0)
+            with open(os.path.join(directory, "q2.csv"), "rb") as file:
+                self.assertEqual(file.read(), b"42")
+            self.assertEqual(len(stdout.getvalue().splitlines()), 4)
+            self.assertIn("4 succeeded", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
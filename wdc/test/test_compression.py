@@ -0,0 +1,146 @@
+import gzip
+import unittest
+import zlib
+from unittest.mock import patch, Mock
+from requests.exceptions import ChunkedEncodingError
+
+import numpy as np
+from src.DatabaseConnection import DatabaseConnection
+from src.Datacube import Datacube
+from src.helpers.compression import acceptEncoding, decompressor
+from src.helpers.utils import CsvArrayDecoder
+
+
+def streamedResponse(body: bytes, contentEncoding: str, chunkSize: int = 7):
+    """Mock a streamed response delivering body in small chunks"""
+    response = Mock()
+    response.status_code = 200
+    response.headers = {"Content-Encoding": contentEncoding}
+    response.raw.stream.return_value = (
+        body[i : i + chunkSize] for i in range(0, len(body), chunkSize)
+    )
+    return response
+
+
+class TestCompression(unittest.TestCase):
+    """
+    Unit tests for compressed, streamed responses.
+    """
+
+    def setUp(self):
+        self.csv = b"{{1,2.5,3},{4,5,6}},{{7,8,9},{10,11,12}}"
+
+    def test_acceptEncoding(self):
+        """
+        Test that gzip and deflate are always offered.
+        """
+        self.assertTrue(acceptEncoding().endswith("gzip, deflate"))
+
+    def test_decompressor(self):
+        """
+        Test incremental decompression of gzip and deflate.
+        """
+        for encoding, body in [
+            ("gzip", gzip.compress(self.csv)),
+            ("deflate", zlib.compress(self.csv)),
+            ("", self.csv),
+        ]:
+            decoder = decompressor(encoding)
+            data = b"".join(
+                decoder.decompress(body[i : i + 5]) for i in range(0, len(body), 5)
+            )
+            self.assertEqual(data + decoder.flush(), self.csv)
+
+        with self.assertRaises(ValueError):
+            decompressor("compress")
+
+    def test_streamedCsvDecoding(self):
+        """
+        Test that the CSV decoder handles values split across chunks.
+        """
+        decoder = CsvArrayDecoder()
+        for i in range(0, len(self.csv), 3):
+            decoder.feed(self.csv[i : i + 3])
+        expected = np.arange(1, 13, dtype=float).reshape(2, 2, 3)
+        expected[0, 0, 1] = 2.5
+        np.testing.assert_array_equal(decoder.finish(), expected)
+
+    def test_leadingAxesOfLengthOne(self):
+        """
+        Test that every brace level is an axis, so a leading axis of length one is kept.
+        """
+        for csv, shape in [
+            (b"{{1,2},{3,4}}", (1, 2, 2)),
+            (b"{1,2,3}", (1, 3)),
+            (b"1,2,3", (3,)),
+        ]:
+            decoder = CsvArrayDecoder()
+            decoder.feed(csv)
+            self.assertEqual(decoder.finish().shape, shape)
+
+    @patch("requests.post")
+    def test_sendRequestCompressed(self, mock_post):
+        """
+        Test that compression is negotiated and the byte counts are reported.
+        """
+        body = gzip.compress(self.csv)
+        mock_post.return_value = streamedResponse(body, "gzip")
+        db_conn = DatabaseConnection(compression=True)
+
+        result = db_conn.send_request("query")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"], self.csv)
+        self.assertEqual(result["compressedBytes"], len(body))
+        self.assertEqual(result["uncompressedBytes"], len(self.csv))
+        self.assertEqual(db_conn.compressed_bytes, len(body))
+        headers = mock_post.call_args.kwargs["headers"]
+        self.assertIn("gzip", headers["Accept-Encoding"])
+
+    @patch("requests.post")
+    def test_unreadableBodyIsFailure(self, mock_post):
+        """
+        Test that unsupported or corrupt encodings and broken streams are returned as failures.
+        """
+        db_conn = DatabaseConnection(compression=True)
+
+        broken = streamedResponse(b"", "gzip")
+        broken.raw.stream.side_effect = ChunkedEncodingError("Connection broken")
+        for response in [
+            streamedResponse(self.csv, "compress"),
+            streamedResponse(b"not gzip at all", "gzip"),
+            broken,
+        ]:
+            mock_post.return_value = response
+            result = db_conn.send_request("query")
+            self.assertFalse(result["success"])
+            self.assertEqual(result["httpCode"], 200)
+            self.assertIn("Reading the response failed", result["httpError"])
+
+    @patch("requests.get")
+    @patch("requests.post")
+    def test_fetchArrayStreams(self, mock_post, mock_get):
+        """
+        Test that fetchArray decodes a compressed response while it streams in,
+        through GetCoverage for plain subsets and WCPS otherwise.
+        """
+        mock_get.return_value = streamedResponse(gzip.compress(self.csv), "gzip")
+        datacube = Datacube(DatabaseConnection(compression=True), "AvgLandTemp")
+        query = datacube.getQueryBuilder().subset(
+            startDate="2014-01", endDate="2014-02"
+        )
+
+        array = datacube.fetchArray(query)
+        self.assertEqual(array.shape, (2, 2, 3))
+        self.assertEqual(array[1, 1, 2], 12)
+        self.assertEqual(datacube.queryPaths["wcs"]["requests"], 1)
+
+        mock_post.return_value = streamedResponse(gzip.compress(self.csv), "gzip")
+        array = datacube.fetchArray(query.copy().arthimetic("ADD", 0))
+        self.assertEqual(array[1, 1, 2], 12)
+        mock_post.assert_called_once()
+        self.assertEqual(datacube.queryPaths["wcps"]["requests"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
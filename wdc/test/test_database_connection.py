@@ -137,7 +137,7 @@ class TestDatabaseConnection(unittest.TestCase):
         self.assertEqual(result["httpCode"], 200)
         self.assertNotIn("httpError", result)
         self.assertNotIn("errorDetails", result)
-        mock_post.assert_called_once_with(custom_url, data={"query": self.query})
+        mock_post.assert_called_once_with(custom_url, data={"query": self.query}, timeout=None)
 
 
 if __name__ == "__main__":
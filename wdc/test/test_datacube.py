@@ -1,4 +1,6 @@
+import asyncio
 import unittest
+from unittest.mock import Mock
 import requests
 from src.Datacube import Datacube
 from src.QueryBuilder import QueryBuilder
@@ -177,9 +179,75 @@ class TestDatacube(unittest.TestCase):
         ]
         query = QueryBuilder(self.dataCube)
         clipQuery = query.clip(clipType="Multipolygon", clippingValue=polygon)
+        expectedStr = """clip($c[Lat(-28.4204:-19.9527),Long(124.1895:142.4268)], Multipolygon(((-20.427 131.6931,-28.4204 124.1895,-27.9944 139.4604,-26.3919 129.0015)),((-20.427 131.6931,-19.9527 142.4268,-27.9944 139.4604,-21.8819 140.5151))))"""
+        self.assertEqual(repr(clipQuery), expectedStr)
+
+        query = QueryBuilder(self.dataCube)
+        clipQuery = query.clip(
+            clipType="Multipolygon", clippingValue=polygon, autoSubset=False
+        )
         expectedStr = """clip($c, Multipolygon(((-20.427 131.6931,-28.4204 124.1895,-27.9944 139.4604,-26.3919 129.0015)),((-20.427 131.6931,-19.9527 142.4268,-27.9944 139.4604,-21.8819 140.5151))))"""
         self.assertEqual(repr(clipQuery), expectedStr)
 
+    def test_clipExtendsSubset(self):
+        """
+        Test that clipping adds the bounding box of the geometry to a preceding date subset
+        """
+        polygon = [(10, 20), (10, 30), (15, 25)]
+        query = QueryBuilder(self.dataCube)
+        clipQuery = query.subset(startDate="2014-07").clip(
+            clipType="Polygon", clippingValue=polygon
+        )
+        self.assertEqual(
+            repr(clipQuery),
+            """clip($c[Lat(10.0:15.0),Long(20.0:30.0),ansi("2014-07")], POLYGON((10 20,10 30,15 25)))""",
+        )
+
+    def test_clipTrimsPrecedingOperations(self):
+        """
+        Test that clipping trims the result of preceding non-subset operations to the bounding box,
+        unless a subset already restricts lat/long
+        """
+        polygon = [(10, 20), (10, 30), (15, 25)]
+        clipQuery = (
+            QueryBuilder(self.dataCube)
+            .subset(startDate="2014-07")
+            .arthimetic("ADD", 1)
+            .clip(clipType="Polygon", clippingValue=polygon)
+        )
+        self.assertEqual(
+            repr(clipQuery),
+            """clip(($c[ansi("2014-07")] + 1)[Lat(10.0:15.0),Long(20.0:30.0)], POLYGON((10 20,10 30,15 25)))""",
+        )
+
+        clipQuery = (
+            QueryBuilder(self.dataCube)
+            .subset(lat=(0, 20), startDate="2014-07")
+            .arthimetic("ADD", 1)
+            .clip(clipType="Polygon", clippingValue=polygon)
+        )
+        self.assertEqual(
+            repr(clipQuery),
+            """clip($c[Lat(0:20),ansi("2014-07")] + 1, POLYGON((10 20,10 30,15 25)))""",
+        )
+
+    def test_clipSimplification(self):
+        """
+        Test that nearly collinear vertices are removed within the tolerance
+        """
+        polygon = [(0, 0), (0, 5), (0.001, 10), (10, 10), (10, 0), (0, 0)]
+        query = QueryBuilder(self.dataCube)
+        clipQuery = query.clip(
+            clipType="Polygon",
+            clippingValue=polygon,
+            autoSubset=False,
+            simplifyTolerance=0.01,
+        )
+        self.assertEqual(
+            repr(clipQuery),
+            """clip($c, POLYGON((0.0 0.0,0.001 10.0,10.0 10.0,10.0 0.0,0.0 0.0)))""",
+        )
+
     def test_scaleFunction(self):
         """
         Test scalar scaling function
@@ -202,6 +270,92 @@ class TestDatacube(unittest.TestCase):
         expected_query = """for $c in (AvgLandTemp) return encode(scale($c[Lat(53.08),Long(8.8),ansi("2014-01":"2014-12")] + 273.15, 5), "text/csv")"""
         self.assertEqual(composed_query, expected_query)
 
+    def test_immutableQuery(self):
+        """
+        Test that immutable queries fork into variants sharing their common operations.
+        """
+        base = self.dataCube.getQueryBuilder(immutable=True).subset(
+            lat=53.08, long=8.80, startDate="2014-01", endDate="2014-12"
+        )
+        kelvin = base.arthimetic("ADD", 273.15)
+        average = kelvin.aggregationFuncs("AVG")
+
+        self.assertEqual(
+            repr(base), """$c[Lat(53.08),Long(8.8),ansi("2014-01":"2014-12")]"""
+        )
+        self.assertEqual(
+            repr(average),
+            """avg($c[Lat(53.08),Long(8.8),ansi("2014-01":"2014-12")] + 273.15)""",
+        )
+        self.assertIs(average.operations[0], base.operations[0])
+        self.assertEqual(repr(average.pop()), repr(kelvin))
+        self.assertEqual(average.reset().operations, ())
+        with self.assertRaises(TypeError):
+            base.operations[0]["args"]["lat"] = 0
+
+        moved = average.withSubset(startDate="2015-01", endDate="2015-12")
+        self.assertEqual(
+            repr(moved),
+            """avg($c[Lat(53.08),Long(8.8),ansi("2015-01":"2015-12")] + 273.15)""",
+        )
+        self.assertEqual(len(average.operations), 3)
+
+        clipped = (
+            self.dataCube.getQueryBuilder(immutable=True)
+            .subset(startDate="2014-07")
+            .clip("Polygon", [(0, 0), (0, 2), (2, 2)])
+        )
+        self.assertEqual(clipped.operations[0]["args"]["lat"], (0, 2))
+        self.assertEqual(len(clipped.operations), 2)
+
+        polygon = [[0, 0], [0, 2], [2, 2]]
+        clipped = base.clip("Polygon", polygon)
+        composed = repr(clipped)
+        polygon[0][0] = 1
+        polygon.append([2, 0])
+        self.assertEqual(repr(clipped), composed)
+        with self.assertRaises(TypeError):
+            clipped.operations[-1]["args"]["clippingValue"][0][0] = 1
+
+    def test_progressiveQuery(self):
+        """
+        Test that progressive execution delivers the downscaled levels first.
+        """
+        dbc = Mock()
+        dbc.send_request.side_effect = lambda query: {
+            "success": True,
+            "result": query.encode(),
+            "httpCode": 200,
+        }
+        datacube = Datacube(dbc, "AvgLandTemp")
+        query = datacube.getQueryBuilder().subset(startDate="2014-07")
+
+        levels = []
+        result = datacube.executeProgressive(
+            query,
+            lambda level, res: levels.append((level, res)),
+            levels=(1, 0.25),
+            raw=True,
+        )
+
+        self.assertEqual([level for level, _ in levels], [0.25, 1])
+        self.assertEqual(
+            levels[0][1],
+            b"""for $c in (AvgLandTemp) return encode(scale($c[ansi("2014-07")], 0.25), "image/png")""",
+        )
+        self.assertEqual(
+            result,
+            b"""for $c in (AvgLandTemp) return encode($c[ansi("2014-07")], "image/png")""",
+        )
+        self.assertEqual(repr(query), """$c[ansi("2014-07")]""")
+
+        async def collectLevels():
+            return [
+                level async for level, _ in datacube.aiterProgressive(query, raw=True)
+            ]
+
+        self.assertEqual(asyncio.run(collectLevels()), [0.125, 0.25, 0.5, 1])
+
     @pytest.mark.slow
     def test_ReturnValueForQuery(self):
         """
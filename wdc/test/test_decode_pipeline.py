@@ -0,0 +1,106 @@
+import os
+import time
+import unittest
+from io import BytesIO
+from unittest.mock import Mock
+
+import numpy as np
+from PIL import Image
+from src.Datacube import Datacube
+from src.DecodePipeline import DecodePipeline
+from src.helpers.utils import formatCsvArray
+
+
+def encodeImage(array, format):
+    """Encode an array like the server encodes a coverage"""
+    buffer = BytesIO()
+    Image.fromarray(array).save(buffer, format=format)
+    return {"success": True, "result": buffer.getvalue(), "httpCode": 200}
+
+
+class TestDecodePipeline(unittest.TestCase):
+    """
+    Unit tests for the DecodePipeline class.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start the worker processes once for all tests.
+        """
+        cls.pipeline = DecodePipeline(processes=2, fetchWorkers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pipeline.shutdown()
+
+    def setUp(self):
+        self.db_connection = Mock()
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+        self.queries = [
+            self.dataCube.getQueryBuilder().subset(startDate=date)
+            for date in ["2014-01", "2014-02", "2014-03"]
+        ]
+
+    def test_decode(self):
+        """
+        Test decoding a single payload in a worker process.
+        """
+        data = np.arange(24, dtype=float).reshape(2, 3, 4)
+        np.testing.assert_array_equal(
+            self.pipeline.decode(formatCsvArray(data).encode()), data
+        )
+
+    def test_executeBatchCsv(self):
+        """
+        Test that results are decoded in the order of the queries and failures are passed through.
+        """
+
+        def send(query):
+            if "2014-02" in query:
+                return {"success": False, "result": None, "httpCode": 500}
+            value = 1 if "2014-01" in query else 3
+            return {"success": True, "result": b"{%d,2},{3,4}" % value}
+
+        self.db_connection.send_request.side_effect = send
+        results = self.dataCube.executeBatch(self.queries, pipeline=self.pipeline)
+
+        np.testing.assert_array_equal(results[0], [[1, 2], [3, 4]])
+        self.assertEqual(results[1]["httpCode"], 500)
+        np.testing.assert_array_equal(results[2], [[3, 2], [3, 4]])
+
+    def test_executeBatchImages(self):
+        """
+        Test decoding images with a target size.
+        """
+        rgb = np.full((40, 60, 3), 200, dtype=np.uint8)
+        self.db_connection.send_request.return_value = encodeImage(rgb, "JPEG")
+
+        results = self.dataCube.executeBatch(
+            self.queries, "JPEG", targetSize=(30, 20), pipeline=self.pipeline
+        )
+        for array in results:
+            self.assertEqual(array.shape, (20, 30, 3))
+            self.assertEqual(array.dtype, np.uint8)
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "requires POSIX shared memory")
+    def test_sharedMemoryReleasedOnError(self):
+        """
+        Test that payloads already handed to the workers are released if fetching raises.
+        """
+
+        def send(query):
+            if "2014-02" in query:
+                time.sleep(0.2)
+                raise ConnectionResetError("Connection reset by peer")
+            return {"success": True, "result": b"{1,2},{3,4}"}
+
+        self.db_connection.send_request.side_effect = send
+        before = set(os.listdir("/dev/shm"))
+        with self.assertRaises(ConnectionResetError):
+            self.dataCube.executeBatch(self.queries, pipeline=self.pipeline)
+        self.assertEqual(set(os.listdir("/dev/shm")) - before, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
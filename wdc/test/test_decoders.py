@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import Mock, patch
+
+from src.Datacube import Datacube
+from src.helpers import decoders
+
+
+class TestDecoders(unittest.TestCase):
+    """
+    Unit tests for the decoder registry.
+    """
+
+    def setUp(self):
+        self.db_connection = Mock()
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"1,2",
+        }
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+        self.query = self.dataCube.getQueryBuilder().subset(startDate="2014-01")
+
+    def test_registeredDecoderIsUsed(self):
+        """
+        Test that execute_query dispatches to the registered decoder.
+        """
+        original = decoders.getDecoder("CSV")
+        self.addCleanup(decoders.registerDecoder, "CSV", original)
+
+        decoders.registerDecoder("CSV", lambda response, **options: "decoded")
+        self.assertEqual(self.dataCube.execute_query(self.query, "CSV"), "decoded")
+        self.assertEqual(self.dataCube.execute_query(self.query), "1,2")
+
+    def test_entryPoints(self):
+        """
+        Test that decoders declared as entry points are registered on first use.
+        """
+        entryPoint = Mock()
+        entryPoint.name = "GTiff:array"
+        entryPoint.load.return_value = lambda response, **options: "tiff"
+
+        with patch.object(decoders, "_entryPointsLoaded", False), patch.object(
+            decoders, "entry_points", return_value=[entryPoint]
+        ) as entry_points, patch.dict(decoders._registry):
+            self.assertEqual(
+                decoders.decode({"success": True}, "GTiff", "array"), "tiff"
+            )
+            entry_points.assert_called_once_with(group=decoders.ENTRY_POINT_GROUP)
+            with self.assertRaises(NotImplementedError):
+                decoders.getDecoder("GTiff")
+
+    def test_heavyDependenciesAreLazy(self):
+        """
+        Test that importing the datacube does not import pandas or PIL.
+        """
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, src.Datacube; "
+                "print(sorted({'pandas', 'PIL'} & set(sys.modules)))",
+            ],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        self.assertEqual(loaded, "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
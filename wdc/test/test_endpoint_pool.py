@@ -0,0 +1,154 @@
+import unittest
+from unittest.mock import patch, Mock
+from requests.exceptions import ConnectionError, HTTPError
+from urllib3.exceptions import ReadTimeoutError
+
+from src.DatabaseConnection import DatabaseConnection
+from src.EndpointPool import EndpointPool
+
+
+class TestEndpointPool(unittest.TestCase):
+    """
+    Unit tests for the EndpointPool class and multi-endpoint connections.
+    """
+
+    def setUp(self):
+        self.urls = ["http://replica-a", "http://replica-b"]
+
+    def test_fastestEndpointIsPreferred(self):
+        """
+        Test that the endpoint with the lower moving average latency is chosen.
+        """
+        pool = EndpointPool(self.urls)
+        pool.latency = {"http://replica-a": 0.5, "http://replica-b": 0.1}
+        url = pool.acquire()
+        self.assertEqual(url, "http://replica-b")
+        pool.release(url, 0.3)
+        self.assertAlmostEqual(pool.latency[url], 0.16)
+
+    def test_loadIsSpread(self):
+        """
+        Test that requests in flight count against an endpoint.
+        """
+        pool = EndpointPool(self.urls)
+        pool.latency = {"http://replica-a": 0.1, "http://replica-b": 0.15}
+        self.assertEqual(
+            {pool.acquire(), pool.acquire()}, {"http://replica-a", "http://replica-b"}
+        )
+
+    def test_unhealthyEndpointIsSkipped(self):
+        """
+        Test that an endpoint is skipped during its cooldown after a connection error.
+        """
+        pool = EndpointPool(self.urls, cooldown=60)
+        pool.latency = {"http://replica-a": 0.1, "http://replica-b": 1.0}
+        pool.release(pool.acquire())
+        self.assertEqual(pool.healthy(), ["http://replica-b"])
+        self.assertEqual(pool.acquire(), "http://replica-b")
+        self.assertEqual(pool.acquire(exclude=["http://replica-b"]), "http://replica-a")
+
+    @patch("requests.post")
+    def test_failover(self, mock_post):
+        """
+        Test that a query is sent to the next replica on a connection error.
+        """
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"42"
+
+        def post(url, data, timeout=None):
+            if url == "http://replica-a":
+                raise ConnectionError("Failed to establish a new connection")
+            return mock_response
+
+        mock_post.side_effect = post
+        db_conn = DatabaseConnection(self.urls)
+        db_conn.endpoints.latency = {"http://replica-a": 0.1, "http://replica-b": 1.0}
+
+        result = db_conn.send_request("query")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"], b"42")
+        self.assertEqual(db_conn.endpoints.failures["http://replica-a"], 1)
+
+        mock_post.side_effect = ConnectionError("Failed to establish a new connection")
+        result = db_conn.send_request("query")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["httpError"], "Failed to establish a new connection")
+
+    @patch("requests.post")
+    def test_failoverOnServerError(self, mock_post):
+        """
+        Test that a replica answering 503 is failed over and not scored by its latency.
+        """
+        unavailable = Mock()
+        unavailable.status_code = 503
+        unavailable.raise_for_status.side_effect = HTTPError("503 Service Unavailable")
+        available = Mock()
+        available.status_code = 200
+        available.content = b"42"
+
+        mock_post.side_effect = lambda url, data, timeout=None: (
+            unavailable if url == "http://replica-a" else available
+        )
+        db_conn = DatabaseConnection(self.urls)
+        db_conn.endpoints.latency = {"http://replica-a": 0.1, "http://replica-b": 1.0}
+
+        result = db_conn.send_request("query")
+        self.assertEqual(result["result"], b"42")
+        self.assertEqual(db_conn.endpoints.failures["http://replica-a"], 1)
+        self.assertEqual(db_conn.endpoints.latency["http://replica-a"], 0.1)
+        self.assertEqual(db_conn.endpoints.healthy(), ["http://replica-b"])
+
+        mock_post.side_effect = lambda url, data, timeout=None: unavailable
+        result = db_conn.send_request("query")
+        self.assertEqual(result["httpCode"], 503)
+
+    @patch("requests.post")
+    def test_noFailoverAfterPartialBody(self, mock_post):
+        """
+        Test that a stream failing after part of its body reached the sink is not repeated on the next replica,
+        while a stream failing before its first byte is.
+        """
+
+        def streamed(chunks):
+            response = Mock()
+            response.status_code = 200
+            response.headers = {"Content-Encoding": "identity"}
+
+            def stream(chunkSize, decode_content=False):
+                for chunk in chunks:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+
+            response.raw.stream.side_effect = stream
+            return response
+
+        timeout = ReadTimeoutError(None, None, "Read timed out.")
+        responses = {
+            "http://replica-a": lambda: streamed([b"1,2,", timeout]),
+            "http://replica-b": lambda: streamed([b"1,2,", b"3,4"]),
+        }
+        mock_post.side_effect = lambda url, data, headers=None, stream=False, timeout=None: responses[url]()
+        db_conn = DatabaseConnection(self.urls, compression=True)
+        db_conn.endpoints.latency = {"http://replica-a": 0.1, "http://replica-b": 1.0}
+
+        received = []
+        result = db_conn.stream_request("query", received.append)
+        self.assertFalse(result["success"])
+        self.assertTrue(result["timedOut"])
+        self.assertEqual(b"".join(received), b"1,2,")
+        self.assertEqual(mock_post.call_count, 1)
+
+        responses["http://replica-a"] = lambda: streamed([timeout])
+        db_conn = DatabaseConnection(self.urls, compression=True)
+        db_conn.endpoints.latency = {"http://replica-a": 0.1, "http://replica-b": 1.0}
+        received = []
+        result = db_conn.stream_request("query", received.append)
+        self.assertTrue(result["success"])
+        self.assertEqual(b"".join(received), b"1,2,3,4")
+        self.assertEqual(db_conn.endpoints.failures["http://replica-a"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
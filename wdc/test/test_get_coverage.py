@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from src.DatabaseConnection import DatabaseConnection
+from src.Datacube import Datacube
+
+
+def httpResponse(content=b"1,2", status=200):
+    response = Mock(status_code=status, content=content)
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestGetCoverage(unittest.TestCase):
+    """
+    Unit tests for sending plain subsets as WCS GetCoverage requests.
+    """
+
+    def setUp(self):
+        self.dataCube = Datacube(
+            DatabaseConnection("http://example.org/ows"), "AvgLandTemp"
+        )
+
+    def test_composeGetCoverage(self):
+        """
+        Test that only plain subsets with an encoding have a GetCoverage request.
+        """
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(50, 52), long=8.8, startDate="2014-01", endDate="2014-12"
+        )
+        params = query.composeGetCoverage("CSV")
+        self.assertEqual(params["coverageId"], "AvgLandTemp")
+        self.assertEqual(params["format"], "text/csv")
+        self.assertEqual(
+            params["subset"], ["Lat(50,52)", "Long(8.8)", 'ansi("2014-01","2014-12")']
+        )
+
+        self.assertIsNone(query.composeGetCoverage())
+        self.assertIsNone(query.aggregationFuncs("AVG").composeGetCoverage("CSV"))
+
+    @patch("requests.post")
+    @patch("requests.get")
+    def test_fastPath(self, mock_get, mock_post):
+        """
+        Test that plain subsets are sent as GetCoverage and other queries as WCPS.
+        """
+        mock_get.return_value = httpResponse()
+        mock_post.return_value = httpResponse(b"1.5")
+
+        query = self.dataCube.getQueryBuilder().subset(lat=53.08, startDate="2014-01")
+        self.assertEqual(self.dataCube.execute_query(query, "CSV", raw=True), b"1,2")
+        mock_get.assert_called_once_with(
+            "http://example.org/ows",
+            params=query.composeGetCoverage("CSV"),
+            timeout=None,
+        )
+        mock_post.assert_not_called()
+
+        query.aggregationFuncs("AVG")
+        self.assertEqual(self.dataCube.execute_query(query, "CSV", raw=True), b"1.5")
+        self.assertEqual(mock_post.call_count, 1)
+
+        self.assertEqual(self.dataCube.queryPaths["wcs"]["requests"], 1)
+        self.assertEqual(self.dataCube.queryPaths["wcps"]["requests"], 1)
+
+    @patch("requests.post")
+    @patch("requests.get")
+    def test_fallback(self, mock_get, mock_post):
+        """
+        Test that GetCoverage requests with an unsupported subset or format are retried as WCPS queries,
+        and other rejected requests return their error.
+        """
+        from requests.exceptions import HTTPError
+
+        def rejected(exceptionCode, locator=None, status=400):
+            locator = f' locator="{locator}"' if locator else ""
+            response = httpResponse(
+                f'<ows:ExceptionReport><ows:Exception exceptionCode="{exceptionCode}"{locator}>'
+                "</ows:Exception></ows:ExceptionReport>".encode(),
+                status,
+            )
+            response.raise_for_status.side_effect = HTTPError(f"{status} Client Error")
+            return response
+
+        mock_post.return_value = httpResponse()
+        query = self.dataCube.getQueryBuilder().subset(lat=53.08, startDate="2014-01")
+
+        for response in [
+            rejected("InvalidSubsetting"),
+            rejected("InvalidParameterValue", "format"),
+        ]:
+            mock_get.return_value = response
+            self.assertEqual(
+                self.dataCube.execute_query(query, "CSV", raw=True), b"1,2"
+            )
+        self.assertEqual(self.dataCube.queryPaths["wcs"]["fallbacks"], 2)
+        self.assertEqual(self.dataCube.queryPaths["wcps"]["requests"], 2)
+
+        for response in [
+            rejected("NoSuchCoverage", status=404),
+            rejected("InvalidParameterValue", "coverageId"),
+            httpResponse(b"Bad Request", 400),
+        ]:
+            response.raise_for_status.side_effect = HTTPError("4xx Client Error")
+            mock_get.return_value = response
+            result = self.dataCube.execute_query(query, "CSV")
+            self.assertFalse(result["success"])
+            self.assertEqual(result["queryPath"], "wcs")
+        self.assertEqual(mock_post.call_count, 2)
+
+        self.dataCube.getCoverage = False
+        self.dataCube.execute_query(query, "CSV")
+        self.assertEqual(mock_get.call_count, 5)
+        self.assertEqual(mock_post.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from io import BytesIO
+from unittest.mock import Mock
+
+import numpy as np
+from PIL import Image
+from src.Datacube import Datacube
+from src.helpers.utils import decodeImageArray, decodeImageArrays
+
+
+def encodeImage(array, format):
+    """Encode an array like the server encodes a coverage"""
+    buffer = BytesIO()
+    Image.fromarray(array).save(buffer, format=format)
+    return {"success": True, "result": buffer.getvalue(), "httpCode": 200}
+
+
+class TestImageArrays(unittest.TestCase):
+    """
+    Unit tests for decoding image results into numpy arrays.
+    """
+
+    def setUp(self):
+        self.gray = np.arange(64 * 48, dtype=np.uint8).reshape(48, 64)
+        self.rgb = np.zeros((48, 64, 3), dtype=np.uint8)
+        self.rgb[:, :32] = (255, 0, 0)
+        self.rgb[:, 32:] = (0, 0, 255)
+
+    def test_bandLayout(self):
+        """
+        Test that single band and {red; green; blue} images keep their values and layout.
+        """
+        gray = decodeImageArray(encodeImage(self.gray, "PNG"))
+        self.assertEqual(gray.dtype, np.uint8)
+        np.testing.assert_array_equal(gray, self.gray)
+
+        rgb = decodeImageArray(encodeImage(self.rgb, "PNG"))
+        self.assertEqual(rgb.shape, (48, 64, 3))
+        np.testing.assert_array_equal(rgb, self.rgb)
+
+        wide = decodeImageArray(encodeImage(self.gray.astype(np.uint16) * 256, "PNG"))
+        self.assertEqual(wide.max(), 255 * 256)
+
+    def test_targetSize(self):
+        """
+        Test that JPEG and PNG results are downscaled to the target size.
+        """
+        for format in ["JPEG", "PNG"]:
+            array = decodeImageArray(encodeImage(self.rgb, format), targetSize=(16, 12))
+            self.assertEqual(array.shape, (12, 16, 3))
+            self.assertGreater(array[6, 2, 0], 200)
+            self.assertGreater(array[6, 14, 2], 200)
+
+    def test_batch(self):
+        """
+        Test decoding batches in a thread pool and through the datacube.
+        """
+        results = [encodeImage(self.gray + i, "PNG") for i in range(5)]
+        arrays = decodeImageArrays(results, maxWorkers=2)
+        for i, array in enumerate(arrays):
+            np.testing.assert_array_equal(array, self.gray + i)
+
+        dbc = Mock()
+        dbc.send_request.return_value = results[3]
+        datacube = Datacube(dbc, "AvgLandTemp")
+        queries = [
+            datacube.getQueryBuilder().subset(startDate=date)
+            for date in ["2014-01", "2014-02"]
+        ]
+        for array in datacube.fetchImageArrays(queries, targetSize=(32, 24)):
+            self.assertEqual(array.shape, (24, 32))
+
+    def test_arrayResultType(self):
+        """
+        Test that CSV and scalar results are decoded into arrays.
+        """
+        dbc = Mock()
+        datacube = Datacube(dbc, "AvgLandTemp")
+        query = datacube.getQueryBuilder().subset(startDate="2014-01")
+
+        dbc.send_request.return_value = {"success": True, "result": b"{1,2},{3,4}"}
+        array = datacube.execute_query(query, "CSV", resultType="array")
+        np.testing.assert_array_equal(array, [[1, 2], [3, 4]])
+
+        dbc.send_request.return_value = {"success": True, "result": b"15.5"}
+        np.testing.assert_array_equal(
+            datacube.execute_query(query, resultType="array"), [15.5]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
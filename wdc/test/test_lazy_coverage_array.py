@@ -0,0 +1,130 @@
+import re
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.Datacube import Datacube
+from src.CoverageGrid import CoverageGrid
+
+
+def formatCsv(array):
+    """Encode an array like the server, nesting dimensions in curly braces"""
+    if array.ndim == 1:
+        return ",".join(str(value) for value in array)
+    return ",".join("{" + formatCsv(subArray) + "}" for subArray in array)
+
+
+def serveSubset(grid, data, query):
+    """Answer a subset query of the mocked server from the full coverage"""
+    lat = re.search(r"Lat\(([-\d.]+):([-\d.]+)\)", query).groups()
+    long = re.search(r"Long\(([-\d.]+):([-\d.]+)\)", query).groups()
+    dates = re.search(r'ansi\("([^"]+)":"([^"]+)"\)', query).groups()
+
+    rows = slice(*grid.indexRange("lat", float(lat[0]), float(lat[1])))
+    cols = slice(*grid.indexRange("long", float(long[0]), float(long[1])))
+    steps = slice(*grid.indexRange("time", *dates))
+
+    subset = data[rows, cols, steps].transpose(2, 0, 1)
+    return {"success": True, "result": formatCsv(subset).encode(), "httpCode": 200}
+
+
+class TestLazyCoverageArray(unittest.TestCase):
+    """
+    Unit tests for the LazyCoverageArray class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection serving a 6x8x4 coverage.
+        """
+        dates = ["2014-01", "2014-02", "2014-03", "2014-04"]
+        self.grid = CoverageGrid.regular((0, 6), (0, 8), 1, dates)
+        self.data = np.arange(6 * 8 * 4, dtype=float).reshape(6, 8, 4)
+
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = lambda query: serveSubset(
+            self.grid, self.data, query
+        )
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp", grid=self.grid)
+
+    def test_grid(self):
+        """
+        Test the grid description.
+        """
+        self.assertEqual(self.grid.shape, (6, 8, 4))
+        self.assertEqual(self.grid.lats[0], 5.5)
+        self.assertEqual(self.grid.indexRange("lat", 1, 3), (3, 5))
+        self.assertEqual(self.grid.indexRange("time", "2014-02", "2014-03"), (1, 3))
+
+    def test_indexing(self):
+        """
+        Test that indexing returns the same values as indexing the full array.
+        """
+        array = self.dataCube.lazy(chunks=(4, 4, 2))
+        self.assertEqual(array.shape, (6, 8, 4))
+
+        for key in [
+            (slice(1, 5), slice(2, 7), slice(0, 3)),
+            (2, slice(None), 1),
+            (slice(None, None, 2), -1),
+            (slice(5, 0, -2), slice(3, 4), slice(1, 4)),
+        ]:
+            np.testing.assert_array_equal(array[key], self.data[key])
+
+    def test_chunksAreReused(self):
+        """
+        Test that only touched chunks are fetched and overlapping indices reuse them.
+        """
+        array = self.dataCube.lazy(chunks=(4, 4, 4))
+
+        array[0:2, 0:2, :]
+        self.assertEqual(array.chunkRequests, 1)
+
+        array[1:4, 1:6, :]
+        self.assertEqual(array.chunkRequests, 2)
+        self.assertEqual(self.db_connection.send_request.call_count, 2)
+
+    def test_sparseIndicesSkipChunks(self):
+        """
+        Test that strided and scattered indices only fetch the chunks holding selected cells.
+        """
+        array = self.dataCube.lazy(chunks=(2, 2, 4))
+
+        np.testing.assert_array_equal(array[[0, -1]], self.data[[0, -1]])
+        self.assertEqual(array.chunkRequests, 8)
+
+        array.clearCache()
+        array.chunkRequests = 0
+        np.testing.assert_array_equal(array[::5, ::7], self.data[::5, ::7])
+        self.assertEqual(array.chunkRequests, 4)
+
+        np.testing.assert_array_equal(
+            array[[5, 0, 5], 7, [3, 0]], self.data[[5, 0, 5], 7][:, [3, 0]]
+        )
+        self.assertEqual(array.chunkRequests, 4)
+        with self.assertRaises(IndexError):
+            array[[6]]
+
+    def test_cacheIsBounded(self):
+        """
+        Test that the least recently used chunks are evicted.
+        """
+        array = self.dataCube.lazy(chunks=(2, 2, 4), maxCachedChunks=2)
+        array[:, :, :]
+        self.assertEqual(array.chunkRequests, 12)
+
+        array[4:6, 6:8, :]
+        self.assertEqual(array.chunkRequests, 12)
+        array[0:2, 0:2, :]
+        self.assertEqual(array.chunkRequests, 13)
+
+    def test_lazyRequiresGrid(self):
+        """
+        Test that a grid is required.
+        """
+        with self.assertRaises(ValueError):
+            Datacube(self.db_connection, "AvgLandTemp").lazy()
+
+
+if __name__ == "__main__":
+    unittest.main()
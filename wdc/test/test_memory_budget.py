@@ -0,0 +1,150 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import requests
+from src.CoverageGrid import CoverageGrid
+from src.DatabaseConnection import DatabaseConnection
+from src.Datacube import Datacube
+from src.MemoryBudget import MemoryBudget
+
+
+def streamedResponse(body: bytes, contentEncoding: str, chunkSize: int = 7):
+    """Mock a streamed response delivering body in small chunks"""
+    response = Mock()
+    response.status_code = 200
+    response.headers = {"Content-Encoding": contentEncoding}
+    response.raw.stream.return_value = (
+        body[i : i + chunkSize] for i in range(0, len(body), chunkSize)
+    )
+    return response
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """
+    Unit tests for the MemoryBudget class.
+    """
+
+    def test_reserveAndRelease(self):
+        """
+        Test that reservations beyond the budget wait until bytes are released.
+        """
+        budget = MemoryBudget(limitBytes=100)
+        first = budget.reserve(60)
+        self.assertEqual((budget.used, budget.available), (60, 40))
+
+        with self.assertRaises(TimeoutError):
+            budget.reserve(50, timeout=0.01)
+        self.assertEqual(budget.waiting, 0)
+
+        threading.Timer(0.05, first.release).start()
+        second = budget.reserve(50)
+        self.assertEqual(budget.used, 50)
+        self.assertEqual(budget.waits, 2)
+        self.assertGreater(budget.waitTime, 0.03)
+
+        second.resize(80)
+        second.release()
+        second.release()
+        self.assertEqual((budget.used, budget.peak), (0, 80))
+
+        ## A result larger than the budget is admitted once nothing else is reserved
+        with budget.reserve(500):
+            self.assertEqual(budget.used, 500)
+        self.assertEqual(budget.used, 0)
+
+    @patch("requests.post")
+    def test_contentLength(self, mock_post):
+        """
+        Test that the reservation of a request is resized to its Content-Length and released.
+        """
+        budget = MemoryBudget(limitBytes=1000, defaultEstimate=10)
+        response = streamedResponse(b"1,2,3,4", "")
+        response.headers["Content-Length"] = "700"
+        mock_post.return_value = response
+
+        dbc = DatabaseConnection(memory_budget=budget)
+        result = dbc.send_request("query")
+
+        self.assertEqual(result["result"], b"1,2,3,4")
+        self.assertEqual((budget.used, budget.peak, budget.reservations), (0, 700, 1))
+
+    @patch("requests.post")
+    def test_backpressure(self, mock_post):
+        """
+        Test that concurrent queries wait while the results in flight exhaust the budget.
+        """
+        budget = MemoryBudget(limitBytes=2 * 2**20, defaultEstimate=2**20)
+        inFlight, maxInFlight = [0], [0]
+        lock = threading.Lock()
+
+        def respond(url, **kwargs):
+            with lock:
+                inFlight[0] += 1
+                maxInFlight[0] = max(maxInFlight[0], inFlight[0])
+            time.sleep(0.02)
+            with lock:
+                inFlight[0] -= 1
+            return streamedResponse(b"1,2", "")
+
+        mock_post.side_effect = respond
+        dataCube = Datacube(
+            DatabaseConnection(memory_budget=budget), "AvgLandTemp", getCoverage=False
+        )
+        query = dataCube.getQueryBuilder().subset(startDate="2014-01")
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(
+                executor.map(
+                    lambda _: dataCube.execute_query(query, "CSV", resultType="array"),
+                    range(6),
+                )
+            )
+
+        self.assertEqual([result.tolist() for result in results], [[1, 2]] * 6)
+        self.assertEqual(maxInFlight[0], 2)
+        self.assertEqual((budget.used, budget.reservations), (0, 6))
+        self.assertGreater(budget.waits, 0)
+
+    @patch("requests.post")
+    def test_splitQueryKeepsReservation(self, mock_post):
+        """
+        Test that the halves of a split query share its reservation instead of waiting for the budget it holds.
+        """
+        budget = MemoryBudget(limitBytes=2**20, defaultEstimate=2**20)
+        tooLarge = Mock(status_code=413, content=b"")
+        tooLarge.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "413 Client Error: Payload Too Large"
+        )
+        responses = [tooLarge]
+        mock_post.side_effect = lambda url, **kwargs: (
+            responses.pop() if responses else streamedResponse(b"1", "")
+        )
+
+        grid = CoverageGrid.regular((0, 2), (0, 2), 1, ["2014-01", "2014-02"])
+        dataCube = Datacube(
+            DatabaseConnection(memory_budget=budget), "AvgLandTemp", grid=grid
+        )
+        dataCube.enableSplitting()
+        query = (
+            dataCube.getQueryBuilder()
+            .subset(lat=(0, 2), long=(0, 2), startDate="2014-01", endDate="2014-02")
+            .aggregationFuncs("SUM")
+        )
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(dataCube.execute_query(query)), daemon=True
+        )
+        thread.start()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, ["2"])
+        self.assertEqual((budget.used, budget.reservations), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.CoverageGrid import CoverageGrid
+from src.Datacube import Datacube
+from src.PointSampler import PointSampler
+
+
+class TestPointSampler(unittest.TestCase):
+    """
+    Unit tests for the PointSampler class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection returning a 3x3 raster.
+        """
+        self.db_connection = Mock()
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"{1,2,3},{4,5,6},{7,8,9}",
+            "httpCode": 200,
+        }
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+
+    def test_clusterPoints(self):
+        """
+        Test that points are clustered by tile.
+        """
+        sampler = PointSampler(self.dataCube, tileDegrees=10)
+        tiles = sampler.clusterPoints(np.array([1, 55, 2, 3]), np.array([1, 1, 2, 3]))
+        self.assertEqual(sorted(tile.tolist() for tile in tiles), [[0, 2, 3], [1]])
+
+    def test_sampleNearest(self):
+        """
+        Test nearest neighbour lookup with a single request per tile.
+        """
+        values = self.dataCube.samplePoints(
+            np.array([0, 1, 2, 2]),
+            np.array([0, 1, 2, 0]),
+            startDate="2014-07",
+            cellSize=0.5,
+            tileDegrees=10,
+        )
+        self.db_connection.send_request.assert_called_once()
+        np.testing.assert_array_equal(values, [7, 5, 3, 1])
+
+    def test_sampleNoPoints(self):
+        """
+        Test that sampling no points returns an empty result without a request.
+        """
+        values = self.dataCube.samplePoints([], [], startDate="2014-01")
+        self.assertEqual(values.shape, (0,))
+        self.db_connection.send_request.assert_not_called()
+
+    def test_failedTile(self):
+        """
+        Test that a failed tile only fails its own points.
+        """
+        raster = self.db_connection.send_request.return_value
+
+        def respond(query):
+            if "Lat(54.5" in query:
+                return {"success": False, "httpCode": 500, "httpError": "Server Error"}
+            return raster
+
+        self.db_connection.send_request.side_effect = respond
+        sampler = PointSampler(self.dataCube, cellSize=0.5, tileDegrees=10)
+        values = sampler.sample(
+            np.array([0, 55, 2]), np.array([0, 1, 2]), startDate="2014-07"
+        )
+        np.testing.assert_array_equal(values, [7, np.nan, 3])
+        self.assertEqual(list(sampler.errors), [1])
+        self.assertIn("Server Error", sampler.errors[1])
+
+        self.db_connection.send_request.side_effect = lambda query: respond("Lat(54.5")
+        with self.assertRaises(ValueError):
+            sampler.sample(np.array([55]), np.array([1]), startDate="2014-07")
+
+    def test_sampleBilinear(self):
+        """
+        Test bilinear interpolation between the four neighbouring cells.
+        """
+        values = self.dataCube.samplePoints(
+            np.array([0, 0.5, 1, 2]),
+            np.array([0, 0.5, 1.5, 2]),
+            startDate="2014-07",
+            method="bilinear",
+            cellSize=0.5,
+            tileDegrees=10,
+        )
+        np.testing.assert_allclose(values, [7, 6, 5.5, 3])
+
+    def test_sampleTimeSeries(self):
+        """
+        Test that time ranges return one column per time step.
+        """
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"{{1,2},{3,4}},{{5,6},{7,8}}",
+            "httpCode": 200,
+        }
+        values = self.dataCube.samplePoints(
+            np.array([0, 1]),
+            np.array([1, 0]),
+            startDate="2014-01",
+            endDate="2014-02",
+            cellSize=0.5,
+            tileDegrees=10,
+        )
+        np.testing.assert_array_equal(values, [[4, 8], [1, 5]])
+
+    def test_sampleOnGrid(self):
+        """
+        Test that points are located on the cells of the grid, not of the requested bounds.
+        """
+        grid = CoverageGrid.regular((0, 3), (0, 3), 1.0, ["2014-07"])
+        dataCube = Datacube(self.db_connection, "AvgLandTemp", grid=grid)
+        values = dataCube.samplePoints(
+            np.array([0.6, 2.4]),
+            np.array([0.6, 2.4]),
+            startDate="2014-07",
+            tileDegrees=10,
+        )
+        np.testing.assert_array_equal(values, [7, 3])
+
+    def test_sampleSingleLatitude(self):
+        """
+        Test points sharing their latitude with a time range, whose response drops the lat axis.
+        """
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"{1,2},{3,4}",
+            "httpCode": 200,
+        }
+        values = self.dataCube.samplePoints(
+            np.array([1, 1]),
+            np.array([0, 1]),
+            startDate="2014-01",
+            endDate="2014-02",
+            tileDegrees=10,
+        )
+        np.testing.assert_array_equal(values, [[1, 3], [2, 4]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import time
+import unittest
+from threading import Event
+from unittest.mock import Mock
+
+from src.Datacube import Datacube
+from src.Prefetcher import isMovement, shiftSubset, subsetDelta
+
+
+class TestPrefetcher(unittest.TestCase):
+    """
+    Unit tests for the Prefetcher class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube with prefetching backed by a mocked DatabaseConnection.
+        """
+        self.release = Event()
+        self.release.set()
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = self.respond
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+        self.prefetcher = self.dataCube.enablePrefetch(maxWorkers=1)
+
+    def tearDown(self):
+        self.release.set()
+        self.dataCube.disablePrefetch()
+
+    def respond(self, query):
+        ## Only the prefetch of March is held back
+        if "2014-03" in query:
+            self.release.wait(5)
+        return {"success": True, "result": query.encode(), "httpCode": 200}
+
+    def executeMonth(self, month: str):
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(50, 55), long=(5, 10), startDate=month
+        )
+        return self.dataCube.execute_query(query, encodingFormat="PNG", raw=True)
+
+    def waitForPrefetch(self):
+        deadline = time.time() + 5
+        while not self.prefetcher.cachedBytes and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_subsetDelta(self):
+        """
+        Test step detection and prediction of subsets.
+        """
+        previous = {"lat": (50, 55), "startDate": "2014-11"}
+        current = {"lat": (52, 57), "startDate": "2014-12"}
+        delta = subsetDelta(previous, current)
+        self.assertEqual(delta, {"lat": (2, 2), "startDate": 1})
+        self.assertEqual(
+            shiftSubset(current, delta), {"lat": (54, 59), "startDate": "2015-01"}
+        )
+        self.assertIsNone(subsetDelta(previous, {"startDate": "2014-12"}))
+        self.assertFalse(isMovement(subsetDelta(current, current)))
+
+    def test_repeatedQueryDoesNotPrefetch(self):
+        """
+        Test that re-running the same query with range subsets prefetches nothing.
+        """
+        self.executeMonth("2014-01")
+        self.executeMonth("2014-01")
+        self.assertEqual(self.prefetcher.pending, ())
+        self.assertEqual(self.db_connection.send_request.call_count, 2)
+
+    def test_failedPrefetchIsNotServed(self):
+        """
+        Test that a failed prefetch is dropped and the query is sent live.
+        """
+        failure = {"success": False, "httpCode": 504, "httpError": "timed out"}
+        self.db_connection.send_request.side_effect = lambda query: (
+            failure if "2014-03" in query else self.respond(query)
+        )
+        self.executeMonth("2014-01")
+        self.executeMonth("2014-02")
+        time.sleep(0.1)
+
+        self.db_connection.send_request.side_effect = self.respond
+        result = self.executeMonth("2014-03")
+        self.assertIn(b'ansi("2014-03")', result)
+        self.assertEqual(self.prefetcher.hits, 0)
+
+    def test_expiredPrefetchIsNotServed(self):
+        """
+        Test that prefetched results older than maxAge are sent live.
+        """
+        self.prefetcher.maxAge = 0
+        self.executeMonth("2014-01")
+        self.executeMonth("2014-02")
+        self.waitForPrefetch()
+
+        self.executeMonth("2014-03")
+        self.assertEqual(self.prefetcher.hits, 0)
+        self.assertEqual(self.prefetcher.cachedBytes, 0)
+
+    def test_prefetchNextMonth(self):
+        """
+        Test that stepping through time prefetches the next month.
+        """
+        self.executeMonth("2014-01")
+        self.executeMonth("2014-02")
+        self.waitForPrefetch()
+        self.assertEqual(self.db_connection.send_request.call_count, 3)
+
+        result = self.executeMonth("2014-03")
+        self.assertIn(b'ansi("2014-03")', result)
+        self.assertEqual(self.prefetcher.hits, 1)
+
+    def test_patternChangeCancels(self):
+        """
+        Test that pending prefetches are discarded when the user changes the pattern.
+        """
+        self.release.clear()
+        self.executeMonth("2014-01")
+        self.executeMonth("2014-02")
+        self.assertIn('ansi("2014-03")', self.prefetcher.pending[0])
+
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(40, 45), long=(5, 10), startDate="2014-02"
+        )
+        self.dataCube.execute_query(query, encodingFormat="PNG", raw=True)
+        self.assertFalse(
+            any('ansi("2014-03")' in pending for pending in self.prefetcher.pending)
+        )
+
+        self.release.set()
+        self.executeMonth("2014-03")
+        self.assertEqual(self.prefetcher.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
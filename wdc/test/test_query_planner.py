@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.Datacube import Datacube
+from src.QueryPlanner import QueryPlanner
+from src.helpers.localEvaluation import evaluateOperations
+from src.helpers.utils import estimateSubsetSize, getSubset, parseCsvArray
+
+
+class TestQueryPlanner(unittest.TestCase):
+    """
+    Unit tests for the QueryPlanner class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection.
+        """
+        self.db_connection = Mock()
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+        self.subset = dict(lat=53.08, long=8.80, startDate="2014-01", endDate="2014-04")
+
+    def buildQueries(self):
+        queries = []
+        for op in ["AVG", "MAX", "MIN"]:
+            queries.append(
+                self.dataCube.getQueryBuilder()
+                .subset(**self.subset)
+                .aggregationFuncs(op)
+            )
+        queries.append(
+            self.dataCube.getQueryBuilder()
+            .subset(**self.subset)
+            .compareFuncs("GT", 15)
+            .aggregationFuncs("COUNT")
+        )
+        return queries
+
+    def test_parseCsvArray(self):
+        """
+        Test parsing of nested CSV results.
+        """
+        self.assertEqual(parseCsvArray("1,2,3").shape, (3,))
+        np.testing.assert_array_equal(
+            parseCsvArray("{1,2,3},{4,5,6}"), [[1, 2, 3], [4, 5, 6]]
+        )
+        self.assertEqual(parseCsvArray("{{1,2},{3,4}},{{5,6},{7,8}}").shape, (2, 2, 2))
+
+    def test_roundLikeServer(self):
+        """
+        Test that ROUND rounds halves away from zero like the server.
+        """
+        np.testing.assert_array_equal(
+            evaluateOperations(np.array([0.5, 1.5, 2.5, -2.5]), [{"OP": "ROUND"}]),
+            [1, 2, 3, -3],
+        )
+
+    def test_zeroCoordinates(self):
+        """
+        Test that a coordinate of zero is a slice for both the query and its size estimate.
+        """
+        self.assertEqual(
+            getSubset(lat=0, long=(0, 2), startDate="2014-01"),
+            '[Lat(0),Long(0:2),ansi("2014-01")]',
+        )
+        self.assertEqual(estimateSubsetSize(lat=0, long=(0, 2), startDate="2014-01"), 3)
+
+    def test_planLocal(self):
+        """
+        Test that small subsets shared by several queries are fetched once.
+        """
+        plan = self.dataCube.planQueries(self.buildQueries())
+        self.assertEqual(plan["mode"], "LOCAL")
+        self.assertEqual(plan["localQueries"], [0, 1, 2, 3])
+        self.assertEqual(plan["estimatedCells"], 4)
+
+    def test_planPushdown(self):
+        """
+        Test that large subsets are pushed down to the server.
+        """
+        queries = [
+            self.dataCube.getQueryBuilder()
+            .subset(startDate="2014-01")
+            .aggregationFuncs(op)
+            for op in ["AVG", "MAX"]
+        ]
+        plan = QueryPlanner(self.dataCube, cellsPerDegree=10).plan(queries)
+        self.assertEqual(plan["mode"], "PUSHDOWN")
+        self.assertEqual(plan["pushdownQueries"], [0, 1])
+
+    def test_planRequiresSharedSubset(self):
+        """
+        Test that queries with different subsets are rejected.
+        """
+        queries = self.buildQueries()
+        queries.append(
+            self.dataCube.getQueryBuilder()
+            .subset(startDate="2015-01")
+            .aggregationFuncs("AVG")
+        )
+        with self.assertRaises(ValueError):
+            self.dataCube.planQueries(queries)
+
+    def test_executeLocal(self):
+        """
+        Test that local execution needs a single round trip and matches the expected statistics.
+        """
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"10,20,16,14",
+            "httpCode": 200,
+        }
+        results = self.dataCube.executeMany(self.buildQueries())
+
+        self.db_connection.send_request.assert_called_once_with(
+            """for $c in (AvgLandTemp) return encode($c[Lat(53.08),Long(8.8),ansi("2014-01":"2014-04")], "text/csv")"""
+        )
+        self.assertEqual(results, [15.0, 20.0, 10.0, 2])
+
+    def test_executePushdown(self):
+        """
+        Test that pushed down aggregations are sent as they are.
+        """
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"15.5",
+            "httpCode": 200,
+        }
+        queries = self.buildQueries()[:1]
+        results = self.dataCube.executeMany(queries)
+
+        self.db_connection.send_request.assert_called_once_with(
+            queries[0].composeQueryFromOPS()
+        )
+        self.assertEqual(results, [15.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
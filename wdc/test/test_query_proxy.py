@@ -0,0 +1,138 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from src.DatabaseConnection import DatabaseConnection
+from src.Datacube import Datacube
+from src.QueryProxy import QueryProxy, normalizeQuery
+from src.cli import main
+
+
+class TestQueryProxy(unittest.TestCase):
+    """
+    Unit tests for the QueryProxy class.
+    """
+
+    def setUp(self):
+        """
+        Start a proxy on a free port in front of a mocked server.
+        """
+        self.proxy = QueryProxy("http://upstream.example/ows", port=0, maxBytes=6)
+        self.addCleanup(self.proxy.shutdown)
+
+        def respond(url, data=None, params=None, timeout=None):
+            time.sleep(0.05)
+            return Mock(
+                status_code=200,
+                headers={"Content-Type": "text/csv"},
+                content=b"1,2" if data else b"3,4",
+            )
+
+        self.proxy.session.post = Mock(side_effect=respond)
+        self.proxy.session.get = Mock(side_effect=respond)
+        self.proxy.start()
+
+    def test_normalizeQuery(self):
+        """
+        Test that equal queries written differently share a cache key.
+        """
+        query = (
+            Datacube(None, "AvgLandTemp")
+            .getQueryBuilder()
+            .subset(lat=53.08, long=8.8, startDate="2014-01")
+        )
+        self.assertEqual(
+            normalizeQuery(query.composeQueryFromOPS("CSV")),
+            normalizeQuery(
+                "for $c in ( AvgLandTemp ) return encode( $c[Lat(53.080), Long(8.80),"
+                ' ansi("2014-01")] , "text/csv" )'
+            ),
+        )
+        self.assertNotEqual(
+            normalizeQuery('ansi("2014-01")'), normalizeQuery('ansi("2014-1")')
+        )
+
+    def test_cachingAndCoalescing(self):
+        """
+        Test that concurrent and repeated queries of several clients reach the server once.
+        """
+        clients = [DatabaseConnection(self.proxy.url) for _ in range(4)]
+        queries = ["for $c in (A) return 1", "for $c in (A)  return  1"] * 2
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda args: args[0].send_request(args[1]), zip(clients, queries)
+                )
+            )
+
+        self.assertEqual([result["result"] for result in results], [b"1,2"] * 4)
+        self.assertEqual(self.proxy.session.post.call_count, 1)
+        self.assertEqual(self.proxy.coalesced, 3)
+
+        self.assertEqual(clients[0].send_request(queries[1])["result"], b"1,2")
+        self.assertEqual(self.proxy.hits, 1)
+        self.assertEqual(self.proxy.session.post.call_count, 1)
+
+    def test_getCoverageAndEviction(self):
+        """
+        Test that key-value requests are forwarded as GET and the cache stays within maxBytes.
+        """
+        dataCube = Datacube(DatabaseConnection(self.proxy.url), "AvgLandTemp")
+        for date in ["2014-01", "2014-02", "2014-03", "2014-01"]:
+            query = dataCube.getQueryBuilder().subset(startDate=date)
+            self.assertEqual(dataCube.execute_query(query, "CSV", raw=True), b"3,4")
+
+        self.assertEqual(dataCube.queryPaths["wcs"]["requests"], 4)
+        self.assertEqual(self.proxy.session.get.call_count, 4)
+        self.assertEqual(self.proxy.cachedBytes, 6)
+
+    def test_failuresAndTimeouts(self):
+        """
+        Test that unexpected upstream errors become 502 and waiting for a pending request is bounded.
+        """
+        self.proxy.session.post.side_effect = ValueError("malformed response")
+        response, source = self.proxy.fetch(query="for $c in (A) return 1")
+        self.assertEqual((response[0], source), (502, "MISS"))
+        self.assertIn(b"malformed response", response[2])
+
+        ## The proxy keeps serving and failures are not cached
+        client = DatabaseConnection(self.proxy.url)
+        self.assertEqual(client.send_request("for $c in (A) return 1")["httpCode"], 502)
+        self.assertEqual(self.proxy.session.post.call_count, 2)
+
+        self.proxy.timeout = 0.05
+        release = threading.Event()
+        self.proxy.session.post.side_effect = lambda url, **kwargs: (
+            release.wait(5),
+            Mock(status_code=200, headers={}, content=b"1"),
+        )[1]
+        leader = threading.Thread(
+            target=self.proxy.fetch, kwargs={"query": "for $c in (B) return 1"}
+        )
+        leader.start()
+        time.sleep(0.02)
+        response, source = self.proxy.fetch(query="for $c in (B) return 1")
+        release.set()
+        leader.join()
+        self.assertEqual((response[0], source), (504, "COALESCED"))
+
+    @patch("src.cli.QueryProxy")
+    def test_proxyCommand(self, proxy):
+        """
+        Test that the proxy command expires responses and bounds waits by default.
+        """
+        proxy.return_value.serveForever.side_effect = KeyboardInterrupt
+        self.assertEqual(main(["proxy", "--port", "0"]), 0)
+        self.assertEqual(proxy.call_args.kwargs["ttl"], 3600)
+        self.assertEqual(proxy.call_args.kwargs["timeout"], 60)
+
+        main(["proxy", "--ttl", "0", "--timeout", "0"])
+        self.assertIsNone(proxy.call_args.kwargs["ttl"])
+        self.assertIsNone(proxy.call_args.kwargs["timeout"])
+
+
+if __name__ == "__main__":
+    unittest.main()
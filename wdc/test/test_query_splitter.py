@@ -0,0 +1,183 @@
+import re
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.CoverageGrid import CoverageGrid
+from src.Datacube import Datacube
+from src.helpers.utils import formatCsvArray, monthIndex
+
+
+def serveSubset(grid, data, query):
+    """Answer a subset query of the mocked server from the full coverage"""
+    lat = re.search(r"Lat\(([-\d.]+):([-\d.]+)\)", query).groups()
+    long = re.search(r"Long\(([-\d.]+):([-\d.]+)\)", query).groups()
+    dates = re.search(r'ansi\("([^"]+)":"([^"]+)"\)', query).groups()
+
+    rows = slice(*grid.indexRange("lat", float(lat[0]), float(lat[1])))
+    cols = slice(*grid.indexRange("long", float(long[0]), float(long[1])))
+    steps = slice(*grid.indexRange("time", *dates))
+
+    subset = data[rows, cols, steps].transpose(2, 0, 1)
+    return {"success": True, "result": formatCsvArray(subset).encode(), "httpCode": 200}
+
+
+TOO_LARGE = {
+    "success": False,
+    "result": None,
+    "httpCode": 413,
+    "httpError": "413 Client Error: Payload Too Large",
+}
+
+
+class TestQuerySplitter(unittest.TestCase):
+    """
+    Unit tests for the QuerySplitter class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked server rejecting subsets of more than 40 cells.
+        """
+        dates = ["2014-01", "2014-02", "2014-03", "2014-04"]
+        self.grid = CoverageGrid.regular((0, 6), (0, 8), 1, dates)
+        self.data = np.arange(6 * 8 * 4, dtype=float).reshape(6, 8, 4)
+        self.sent = []
+
+        def serve(query):
+            response = serveSubset(self.grid, self.data, query)
+            cells = len(re.split(r"[{},]+", response["result"].decode().strip("{}")))
+            self.sent.append(cells)
+            return TOO_LARGE if cells > 40 else response
+
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = serve
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp", grid=self.grid)
+
+    def test_splitArray(self):
+        """
+        Test that a rejected subset is bisected and the halves are concatenated.
+        """
+        splitter = self.dataCube.enableSplitting(minCells=1)
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(0, 6), long=(0, 8), startDate="2014-01", endDate="2014-04"
+        )
+        array = self.dataCube.fetchArray(query)
+
+        np.testing.assert_array_equal(array, self.data.transpose(2, 0, 1))
+        ## Both halves may be sent before the first of them lowers the limit
+        self.assertEqual(self.sent.count(24), 8)
+        self.assertEqual(set(self.sent), {24, 48, 96, 192})
+        self.assertEqual(splitter.maxSafeCells["AvgLandTemp"], 47)
+
+        ## The learned size splits later queries up front
+        self.sent.clear()
+        np.testing.assert_array_equal(
+            self.dataCube.fetchArray(query), self.data.transpose(2, 0, 1)
+        )
+        self.assertEqual(self.sent, [24] * 8)
+
+        ## Enough successes close to the limit let it grow back
+        self.assertEqual(splitter.maxSafeCells["AvgLandTemp"], 94)
+        self.sent.clear()
+        np.testing.assert_array_equal(
+            self.dataCube.fetchArray(query), self.data.transpose(2, 0, 1)
+        )
+        self.assertEqual(max(self.sent), 48)
+        self.assertEqual(splitter.maxSafeCells["AvgLandTemp"], 47)
+
+    def test_prefetchedQueriesAreSplit(self):
+        """
+        Test that queries sent by the prefetcher go through the splitter.
+        """
+        self.dataCube.enableSplitting(minCells=1)
+        self.dataCube.enablePrefetch(maxWorkers=1)
+        try:
+            query = self.dataCube.getQueryBuilder().subset(
+                lat=(0, 6), long=(0, 8), startDate="2014-01", endDate="2014-04"
+            )
+            array = self.dataCube.execute_query(query, "CSV", resultType="array")
+        finally:
+            self.dataCube.disablePrefetch()
+
+        np.testing.assert_array_equal(array, self.data.transpose(2, 0, 1))
+        self.assertEqual(self.sent.count(24), 8)
+
+    def test_learnedLimit(self):
+        """
+        Test that transient failures are retried and only size signals lower the limit, down to minCells.
+        """
+        splitter = self.dataCube.enableSplitting()
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(0, 6), long=(0, 8), startDate="2014-01", endDate="2014-04"
+        )
+        unavailable = {"success": False, "httpCode": 503, "httpError": "Unavailable"}
+        seven = {"success": True, "result": b"7", "httpCode": 200}
+        total = query.copy().aggregationFuncs("SUM")
+
+        responses = [seven, unavailable]
+        self.db_connection.send_request.side_effect = lambda wcps: responses.pop()
+        self.assertEqual(self.dataCube.execute_query(total), "7")
+        self.assertEqual((splitter.retries, splitter.splits), (1, 0))
+        self.assertEqual(splitter.maxSafeCells, {})
+
+        ## Failures persisting in the halves are no evidence of the size
+        self.db_connection.send_request.side_effect = lambda wcps: unavailable
+        self.assertEqual(self.dataCube.execute_query(total)["httpCode"], 503)
+        self.assertEqual(splitter.maxSafeCells, {})
+
+        self.db_connection.send_request.side_effect = lambda wcps: (
+            unavailable if "Long(0:8)" in wcps else seven
+        )
+        self.assertEqual(self.dataCube.execute_query(total), "14")
+        self.assertEqual(splitter.maxSafeCells["AvgLandTemp"], 1024)
+
+    def test_splitAggregation(self):
+        """
+        Test that aggregations of the halves are combined and the original failure is kept if a query can not be split.
+        """
+        self.dataCube.enableSplitting()
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(0, 6), long=(0, 8), startDate="2014-01", endDate="2014-04"
+        )
+        self.db_connection.send_request.side_effect = lambda wcps: (
+            TOO_LARGE
+            if "Long(0:8)" in wcps
+            else {"success": True, "result": b"7", "httpCode": 200}
+        )
+        self.assertEqual(
+            self.dataCube.execute_query(query.copy().aggregationFuncs("SUM")), "14"
+        )
+        response = self.dataCube.execute_query(query.copy().aggregationFuncs("AVG"))
+        self.assertEqual(response["httpCode"], 413)
+
+    def test_splitTimeWithoutGrid(self):
+        """
+        Test that monthly time ranges are split without a grid.
+        """
+        datacube = Datacube(self.db_connection, "AvgLandTemp")
+        datacube.enableSplitting()
+
+        def serve(query):
+            start, end = re.search(r'ansi\("([^"]+)":"([^"]+)"\)', query).groups()
+            months = monthIndex(end) - monthIndex(start) + 1
+            if months > 3:
+                return {
+                    "success": False,
+                    "httpCode": None,
+                    "httpError": "Read timed out.",
+                    "timedOut": True,
+                }
+            return {"success": True, "result": str(months).encode(), "httpCode": 200}
+
+        self.db_connection.send_request.side_effect = serve
+        query = datacube.getQueryBuilder().subset(
+            lat=53.08, long=8.8, startDate="2014-01", endDate="2014-12"
+        )
+        self.assertEqual(
+            datacube.execute_query(query.aggregationFuncs("COUNT"), raw=True), b"12"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
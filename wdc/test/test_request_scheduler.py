@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from src.Datacube import Datacube
+from src.RequestScheduler import RequestScheduler
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """
+    Unit tests for the RequestScheduler class.
+    """
+
+    def setUp(self):
+        """
+        Create a scheduler with a single worker that is blocked by a first request until released.
+        """
+        self.sentQueries = []
+        self.release = threading.Event()
+
+        def send(query):
+            if query == "blocker":
+                self.release.wait()
+            else:
+                self.sentQueries.append(query)
+            return {"success": True, "result": query.encode(), "httpCode": 200}
+
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = send
+        self.scheduler = RequestScheduler(self.db_connection, workers=1)
+        self.blocker = self.scheduler.submit("blocker")
+        while not self.blocker.running():
+            time.sleep(0.001)
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+
+    def test_priorityAndFairness(self):
+        """
+        Test that higher priorities are sent first and tenants are served round-robin.
+        """
+        futures = [
+            self.scheduler.submit("backfill-a1", priority=1, tenant="a"),
+            self.scheduler.submit("backfill-a2", priority=1, tenant="a"),
+            self.scheduler.submit("backfill-a3", priority=1, tenant="a"),
+            self.scheduler.submit("backfill-b1", priority=1, tenant="b"),
+            self.scheduler.submit("dashboard", priority=0),
+        ]
+        self.assertEqual(self.scheduler.waiting, 5)
+        self.release.set()
+        for future in futures:
+            future.result()
+
+        self.assertEqual(
+            self.sentQueries,
+            ["dashboard", "backfill-a1", "backfill-b1", "backfill-a2", "backfill-a3"],
+        )
+
+    def test_expiredRequestsAreDropped(self):
+        """
+        Test that requests are not sent once their deadline passed.
+        """
+        expired = self.scheduler.submit("expired", timeout=0)
+        kept = self.scheduler.submit("kept", timeout=60)
+        time.sleep(0.01)
+        self.release.set()
+
+        self.assertFalse(expired.result()["success"])
+        self.assertTrue(kept.result()["success"])
+        self.assertEqual(self.sentQueries, ["kept"])
+        self.assertEqual(self.scheduler.dropped, 1)
+
+    def test_boundConnection(self):
+        """
+        Test that a datacube can send its queries through a bound connection.
+        """
+        self.release.set()
+        datacube = Datacube(
+            self.scheduler.bind(priority=1, tenant="AvgLandTemp"), "AvgLandTemp"
+        )
+        query = datacube.getQueryBuilder().subset(startDate="2014-07")
+
+        self.assertEqual(
+            datacube.execute_query(query, raw=True),
+            query.composeQueryFromOPS().encode(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import re
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.Datacube import Datacube
+from src.CoverageGrid import CoverageGrid
+from src.TileCache import TileCache
+from src.helpers.utils import formatCsvArray
+
+
+def serveSubset(grid, data, query):
+    """Answer a subset query of the mocked server from the full coverage"""
+    lat = re.search(r"Lat\(([-\d.]+):([-\d.]+)\)", query).groups()
+    long = re.search(r"Long\(([-\d.]+):([-\d.]+)\)", query).groups()
+    dates = re.search(r'ansi\("([^"]+)":"([^"]+)"\)', query).groups()
+
+    rows = slice(*grid.indexRange("lat", float(lat[0]), float(lat[1])))
+    cols = slice(*grid.indexRange("long", float(long[0]), float(long[1])))
+    steps = slice(*grid.indexRange("time", *dates))
+
+    subset = data[rows, cols, steps].transpose(2, 0, 1)
+    return {"success": True, "result": formatCsvArray(subset).encode(), "httpCode": 200}
+
+
+class TestTileCache(unittest.TestCase):
+    """
+    Unit tests for the TileCache class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection serving a 6x8x4 coverage.
+        """
+        dates = ["2014-01", "2014-02", "2014-03", "2014-04"]
+        self.grid = CoverageGrid.regular((0, 6), (0, 8), 1, dates)
+        self.data = np.arange(6 * 8 * 4, dtype=float).reshape(6, 8, 4)
+
+        self.db_connection = Mock()
+        self.db_connection.send_request.side_effect = lambda query: serveSubset(
+            self.grid, self.data, query
+        )
+
+    def buildDatacube(self, tileCache):
+        return Datacube(
+            self.db_connection, "AvgLandTemp", grid=self.grid, tileCache=tileCache
+        )
+
+    def subsetQuery(self, dataCube, **subset):
+        return dataCube.getQueryBuilder().subset(**subset)
+
+    def test_subsetFromTiles(self):
+        """
+        Test that subsets are assembled from tiles and shaped like the server result.
+        """
+        dataCube = self.buildDatacube(TileCache(tileShape=(4, 4)))
+
+        # Rows are ordered north to south, lat 4.5 is the second row
+        array = dataCube.fetchArray(
+            self.subsetQuery(dataCube, lat=(1, 4.5), long=(2, 6), startDate="2014-02")
+        )
+        np.testing.assert_array_equal(array, self.data[1:5, 2:6, 1])
+
+        series = dataCube.fetchArray(
+            self.subsetQuery(
+                dataCube, lat=3.5, long=0.5, startDate="2014-01", endDate="2014-04"
+            )
+        )
+        np.testing.assert_array_equal(series, self.data[2, 0, :])
+
+    def test_pannedSubsetReusesTiles(self):
+        """
+        Test that only missing tiles are fetched when the subset moves.
+        """
+        tileCache = TileCache(tileShape=(4, 4))
+        dataCube = self.buildDatacube(tileCache)
+
+        dataCube.fetchArray(
+            self.subsetQuery(dataCube, lat=(3, 5), long=(1, 3), startDate="2014-01")
+        )
+        self.assertEqual(self.db_connection.send_request.call_count, 1)
+
+        dataCube.fetchArray(
+            self.subsetQuery(
+                dataCube, lat=(2.5, 5.5), long=(0, 3.5), startDate="2014-01"
+            )
+        )
+        self.assertEqual(self.db_connection.send_request.call_count, 1)
+        self.assertEqual(tileCache.hits, 1)
+
+        dataCube.fetchArray(
+            self.subsetQuery(dataCube, lat=(2.5, 5.5), long=(2, 5), startDate="2014-01")
+        )
+        self.assertEqual(self.db_connection.send_request.call_count, 2)
+
+    def test_tilesOnDisk(self):
+        """
+        Test that tiles persisted to disk are memory-mapped and shared between caches.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            subset = dict(lat=(0, 5), long=(0, 7), startDate="2014-03")
+
+            dataCube = self.buildDatacube(TileCache((4, 4), directory=directory))
+            dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(self.db_connection.send_request.call_count, 4)
+
+            dataCube = self.buildDatacube(TileCache((4, 4), directory=directory))
+            array = dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(self.db_connection.send_request.call_count, 4)
+            np.testing.assert_array_equal(array, self.data[1:6, 0:7, 2])
+
+    def test_tilesOnDiskAreKeyedByLayout(self):
+        """
+        Test that a shared directory does not serve tiles of another tile shape or grid,
+        and that tiles loaded from disk count against maxTiles.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            subset = dict(lat=(0, 5), long=(0, 7), startDate="2014-03")
+
+            dataCube = self.buildDatacube(TileCache((4, 4), directory=directory))
+            dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(self.db_connection.send_request.call_count, 4)
+
+            dataCube = self.buildDatacube(TileCache((2, 2), directory=directory))
+            array = dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(self.db_connection.send_request.call_count, 16)
+            np.testing.assert_array_equal(array, self.data[1:6, 0:7, 2])
+
+            self.grid = CoverageGrid.regular((0, 12), (0, 16), 2, self.grid.dates)
+            self.data = self.data * 2
+            dataCube = self.buildDatacube(TileCache((4, 4), directory=directory))
+            array = dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(self.db_connection.send_request.call_count, 18)
+            np.testing.assert_array_equal(
+                array, self.data[self.grid.indexRange("lat", 0, 5)[0] :, 0:4, 2]
+            )
+
+            tileCache = TileCache((2, 2), directory=directory, maxTiles=3)
+            dataCube = self.buildDatacube(tileCache)
+            self.grid = CoverageGrid.regular((0, 6), (0, 8), 1, self.grid.dates)
+            dataCube.grid = self.grid
+            dataCube.fetchArray(self.subsetQuery(dataCube, **subset))
+            self.assertEqual(len(tileCache), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from src.CoverageGrid import CoverageGrid
+from src.Datacube import Datacube
+from src.TimeSeriesStore import TimeSeriesStore
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """
+    Unit tests for the incremental refresh of time series.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection and a temporary store.
+        """
+        self.db_connection = Mock()
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = TimeSeriesStore(os.path.join(self.directory.name, "series.csv"))
+
+        self.query = self.dataCube.getQueryBuilder().subset(
+            lat=53.08, long=8.80, startDate="2014-01", endDate="2014-03"
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def respond(self, content: bytes):
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": content,
+            "httpCode": 200,
+        }
+
+    def test_initialFetch(self):
+        """
+        Test that the first refresh stores the whole series.
+        """
+        self.respond(b"1,2,3")
+        series = self.dataCube.refreshTimeSeries(self.query, self.store)
+
+        self.assertEqual(series["time"].tolist(), ["2014-01", "2014-02", "2014-03"])
+        self.assertEqual(series["value"].tolist(), [1, 2, 3])
+        self.assertEqual(self.store.lastTimestamp, "2014-03")
+
+    def test_incrementalRefresh(self):
+        """
+        Test that a refresh only requests the time steps after the last stored one.
+        """
+        self.respond(b"1,2,3")
+        self.dataCube.refreshTimeSeries(self.query, self.store)
+
+        self.respond(b"3,4,5")
+        series = self.dataCube.refreshTimeSeries(
+            self.query, self.store, endDate="2014-05"
+        )
+
+        self.db_connection.send_request.assert_called_with(
+            """for $c in (AvgLandTemp) return encode($c[Lat(53.08),Long(8.8),ansi("2014-03":"2014-05")], "text/csv")"""
+        )
+        self.assertEqual(
+            series["time"].tolist(),
+            ["2014-01", "2014-02", "2014-03", "2014-04", "2014-05"],
+        )
+        self.assertEqual(series["value"].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(len(TimeSeriesStore(self.store.path).load()), 5)
+
+    def test_refreshUpToLatest(self):
+        """
+        Test that a refresh without endDate requests every time step after the last stored one.
+        """
+        self.respond(b"1,2,3")
+        self.dataCube.refreshTimeSeries(self.query, self.store)
+
+        self.respond(b"3,4,5")
+        series = self.dataCube.refreshTimeSeries(self.query, self.store)
+
+        self.db_connection.send_request.assert_called_with(
+            """for $c in (AvgLandTemp) return encode($c[Lat(53.08),Long(8.8),ansi("2014-03":*)], "text/csv")"""
+        )
+        self.assertEqual(series["time"].tolist()[-2:], ["2014-04", "2014-05"])
+        self.assertEqual(series["value"].tolist(), [1, 2, 3, 4, 5])
+
+        ## With a grid the series is refreshed up to its last date
+        self.dataCube.grid = CoverageGrid.regular(
+            (53.08, 53.08), (8.8, 8.8), 1, ["2014-04", "2014-05", "2014-06"]
+        )
+        self.respond(b"5,6")
+        series = self.dataCube.refreshTimeSeries(self.query, self.store)
+        self.assertIn(
+            'ansi("2014-05":"2014-06")', self.db_connection.send_request.call_args[0][0]
+        )
+        self.assertEqual(series["value"].tolist(), [1, 2, 3, 4, 5, 6])
+
+        send = self.db_connection.send_request.call_count
+        self.assertEqual(
+            self.dataCube.refreshTimeSeries(self.query, self.store)["value"].tolist(),
+            [1, 2, 3, 4, 5, 6],
+        )
+        self.assertEqual(self.db_connection.send_request.call_count, send)
+
+    def test_spatialSeriesWithoutNewStep(self):
+        """
+        Test that refreshing a spatial series without a new time step returns it unchanged,
+        also if the single step of the result comes without its time axis.
+        """
+        query = self.dataCube.getQueryBuilder().subset(
+            lat=(53, 54), long=8.80, startDate="2014-01", endDate="2014-02"
+        )
+        self.respond(b"{1,2},{3,4}")
+        stored = self.dataCube.refreshTimeSeries(query, self.store)
+        self.assertEqual(stored["value_1"].tolist(), [2, 4])
+
+        for content in (b"{3,4}", b"3,4"):
+            self.respond(content)
+            series = self.dataCube.refreshTimeSeries(query, self.store)
+            self.assertEqual(series.values.tolist(), stored.values.tolist())
+        self.assertEqual(len(TimeSeriesStore(self.store.path).load()), 2)
+
+    def test_timeStepNotInferable(self):
+        """
+        Test that timestamps are not guessed if the values do not match monthly steps.
+        """
+        self.respond(b"1,2,3,4,5")
+        with self.assertRaises(ValueError):
+            self.dataCube.refreshTimeSeries(self.query, self.store)
+
+        series = self.dataCube.refreshTimeSeries(self.query, self.store, timeStep="D")
+        self.assertEqual(series["time"].tolist()[-1], "2014-01-05")
+
+    def test_requiresDateRange(self):
+        """
+        Test that a single date can not be refreshed.
+        """
+        query = self.dataCube.getQueryBuilder().subset(startDate="2014-01")
+        with self.assertRaises(ValueError):
+            self.dataCube.refreshTimeSeries(query, self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+from src.Datacube import Datacube
+from src.ZonalStatistics import ZonalStatistics
+from src.helpers.geometry import polygonMask
+
+
+class TestZonalStatistics(unittest.TestCase):
+    """
+    Unit tests for the ZonalStatistics class.
+    """
+
+    def setUp(self):
+        """
+        Create a datacube backed by a mocked DatabaseConnection returning a 4x4 raster.
+        """
+        self.db_connection = Mock()
+        self.db_connection.send_request.return_value = {
+            "success": True,
+            "result": b"{1,2,3,4},{5,6,7,8},{9,10,11,12},{13,14,15,16}",
+            "httpCode": 200,
+        }
+        self.dataCube = Datacube(self.db_connection, "AvgLandTemp")
+
+    def test_polygonMask(self):
+        """
+        Test rasterization of a triangle.
+        """
+        triangle = [(0, 0), (0, 4), (4, 0)]
+        mask = polygonMask(triangle, np.array([0.5, 1.5, 2.5, 3.5]), np.arange(4) + 0.5)
+        np.testing.assert_array_equal(mask.sum(axis=1), [4, 3, 2, 1])
+
+    def test_groupZones(self):
+        """
+        Test that neighbouring zones share one group.
+        """
+        zones = [
+            [(0, 0), (0, 1), (1, 1)],
+            [(1, 1), (1, 2), (2, 2)],
+            [(40, 40), (40, 41), (41, 41)],
+        ]
+        groups = ZonalStatistics(self.dataCube).groupZones(zones)
+        self.assertEqual(sorted(members for members, _ in groups), [[0, 1], [2]])
+
+    def test_zonalStatistics(self):
+        """
+        Test statistics of two zones computed from a single request.
+        """
+        south = [(-0.5, -0.5), (-0.5, 3.5), (1.5, 3.5), (1.5, -0.5)]
+        north = [(1.5, -0.5), (1.5, 1.5), (3.5, 1.5), (3.5, -0.5)]
+
+        stats = self.dataCube.zonalStatistics(
+            [south, north],
+            startDate="2014-07",
+            stats=("AVG", "MIN", "MAX", "COUNT"),
+            zoneIds=["south", "north"],
+        )
+
+        self.db_connection.send_request.assert_called_once()
+        self.assertEqual(list(stats.columns), ["avg", "min", "max", "count", "error"])
+        self.assertEqual(stats.loc["south"].tolist(), [12.5, 9, 16, 8, None])
+        self.assertEqual(stats.loc["north"].tolist(), [3.5, 1, 6, 4, None])
+
+    def test_failedGroup(self):
+        """
+        Test that a group whose raster can not be fetched only fails its own zones.
+        """
+        failure = {"success": False, "httpCode": 503, "httpError": "Unavailable"}
+        self.db_connection.send_request.side_effect = lambda query: (
+            failure
+            if "Lat(40" in query
+            else self.db_connection.send_request.return_value
+        )
+        zones = [
+            [(-0.5, -0.5), (-0.5, 3.5), (3.5, 3.5), (3.5, -0.5)],
+            [(40, 40), (40, 41), (41, 41)],
+        ]
+
+        stats = self.dataCube.zonalStatistics(zones, startDate="2014-07")
+
+        self.assertEqual(stats.loc[0, "count"], 16)
+        self.assertIsNone(stats.loc[0, "error"])
+        self.assertTrue(np.isnan(stats.loc[1, "avg"]))
+        self.assertIn("Unavailable", stats.loc[1, "error"])
+
+
+if __name__ == "__main__":
+    unittest.main()